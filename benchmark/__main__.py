@@ -0,0 +1,38 @@
+"""
+Run the benchmark suite and write results as JSON.
+
+$ python -m benchmark --output before.json
+$ python -m benchmark --output after.json --compare before.json
+"""
+
+import json
+from argparse import ArgumentParser
+from benchmark import suite
+
+
+def _main():
+    parser = ArgumentParser(prog='python -m benchmark', description='Run the benchmark suite.')
+    parser.add_argument('--size', type=int, default=20000, help='Number of speeches in the corpus.')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the corpus.')
+    parser.add_argument('--repeat', type=int, default=5, help='Best of N runs is taken.')
+    parser.add_argument('--output', help='File to write results as JSON.')
+    parser.add_argument('--compare', help='JSON file of results to compare with.')
+    args = parser.parse_args()
+    
+    results = suite.run(args.size, args.seed, args.repeat)
+    for name, result in results['results'].items():
+        print(f'{name:<16}{result["ns_per_op"]:>12,.0f} ns/op{result["ops_per_sec"]:>14,.0f} ops/sec')
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)
+        print()
+        print('\n'.join(suite.compare(old, results)))
+
+
+if __name__ == '__main__':
+    _main()
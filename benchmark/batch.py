@@ -0,0 +1,46 @@
+"""
+Filtering and counting a large log by SpeechBatch against lists of OptimizedSpeech.
+It requires NumPy.
+
+$ python -m benchmark.batch
+"""
+
+import tracemalloc
+from collections import Counter
+from hex_drone import OptimizedSpeech
+from hex_drone.batch import SpeechBatch
+from benchmark import corpus
+from timeit import repeat
+
+
+def _measure(name, func, number=1):
+    best = min(repeat(func, number=number, repeat=5)) / number
+    print(f'{name:<40}{best * 1e3:>10,.2f} ms')
+
+
+def _allocated(func):
+    tracemalloc.start()
+    result = func()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def _main():
+    lines = corpus.generate(100000)
+    speeches, speeches_size = _allocated(lambda: [v for v in OptimizedSpeech.parse_many(lines) if v is not None])
+    batch, batch_size = _allocated(lambda: SpeechBatch.from_lines(lines))
+    print(f'{len(batch):,} speeches: list {speeches_size / 2 ** 20:,.1f} MiB, SpeechBatch {batch_size / 2 ** 20:,.1f} MiB')
+    
+    _measure('build list (parse_many)', lambda: OptimizedSpeech.parse_many(lines))
+    _measure('build SpeechBatch (from_lines)', lambda: SpeechBatch.from_lines(lines))
+    _measure('filter code range (list)', lambda: [v for v in speeches if '100' <= v.status_code <= '199'], 10)
+    _measure('filter code range (SpeechBatch)', lambda: batch.filter(code_range=('100', '199')), 10)
+    _measure('count by code (list)', lambda: Counter(v.status_code for v in speeches), 10)
+    _measure('count by code (SpeechBatch)', lambda: batch.group_counts(), 10)
+    _measure('count by drone and code (list)', lambda: Counter((v.drone_id, v.status_code) for v in speeches), 10)
+    _measure('count by drone and code (SpeechBatch)', lambda: batch.group_counts(('drone_id', 'status_code')), 10)
+
+
+if __name__ == '__main__':
+    _main()
@@ -0,0 +1,30 @@
+"""
+Cost of building and rendering a response against the 2.0.0 implementation.
+
+$ python -m benchmark.build
+"""
+
+from hex_drone import OptimizedSpeech, templates
+from benchmark.legacy import LegacyOptimizedSpeech
+from timeit import repeat
+
+
+def _main():
+    templates.prewarm('3064')
+    cases = {
+        'legacy build + str': lambda: str(LegacyOptimizedSpeech.build('3064', '057', '3*4+2 = 14')),
+        'build + str': lambda: str(OptimizedSpeech.build('3064', '057', '3*4+2 = 14')),
+        'build + str + encode': lambda: str(OptimizedSpeech.build('3064', '057', '3*4+2 = 14')).encode('utf-8'),
+        'build + bytes': lambda: bytes(OptimizedSpeech.build('3064', '057', '3*4+2 = 14')),
+        'legacy build + str (no message)': lambda: str(LegacyOptimizedSpeech.build('3064', '213')),
+        'build + str (no message)': lambda: str(OptimizedSpeech.build('3064', '213')),
+        'template render_bytes': lambda: templates.get('3064', '057').render_bytes('3*4+2 = 14'),
+    }
+    number = 100000
+    for name, func in cases.items():
+        best = min(repeat(func, number=number, repeat=5))
+        print(f'{name:<36}{best / number * 1e9:>10,.0f} ns/call')
+
+
+if __name__ == '__main__':
+    _main()
@@ -0,0 +1,73 @@
+"""
+Seeded synthetic corpus of speeches drawn from the status code table.
+"""
+
+import random
+from hex_drone import status_codes
+from typing import Dict, List, Optional, Sequence
+
+# Kinds of speeches and default ratio of them.
+VALID = 'valid'  # Full form with status message and predefined message.
+SHORTHAND = 'shorthand'  # Status message and predefined message are omitted.
+MULTI = 'multi'  # Many user defined messages.
+INVALID = 'invalid'  # Chatter which is not a speech.
+UNREGISTERED = 'unregistered'  # Valid speech whose status code is not registered in the pattern.
+DEFAULT_MIX = {VALID: 0.4, SHORTHAND: 0.2, MULTI: 0.1, INVALID: 0.2, UNREGISTERED: 0.1}
+
+_MESSAGES = [
+    'Charge is low.', '5% remaining.', 'It obeys.', 'This drone is ready to obey, Hive Mxtress.',
+    '3*4+2', 'Drone is drone.', 'All thoughts are gone.', '⬡',
+]
+_CHATTER = [
+    'Good morning, drones!', 'How are you?', '12345 :: Code 050 :: Statement', '1234 :: Code 999',
+    '1234 : Code 050 : Statement', 'Code 200', '1234 :: Code 05', '',
+]
+
+
+def generate(
+        size: int, seed: int = 0, mix: Dict[str, float] = None,
+        registered: Optional[Sequence[str]] = None
+) -> List[str]:
+    """
+    Generate speeches.
+    
+    :param size: Number of speeches.
+    :param seed: Seed of the random generator. Same seed generates same corpus.
+    :param mix: Ratio of kinds of speeches.
+    :param registered: Status codes registered in the pattern. (All status codes if None.)
+    :return: Generated speeches.
+    """
+    rnd = random.Random(seed)
+    mix = DEFAULT_MIX if mix is None else mix
+    registered = sorted(status_codes) if registered is None else sorted(registered)
+    unregistered = sorted(set(status_codes) - set(registered)) or registered
+    kinds = sorted(mix)
+    weights = [mix[kind] for kind in kinds]
+    
+    def drone_id():
+        return f'{rnd.randrange(10000):04}'
+    
+    def header(codes):
+        data = status_codes[rnd.choice(codes)]
+        return data, f'{drone_id()} :: Code {data.status_code}'
+    
+    def full(data, head, messages):
+        v = [head, data.status_message]
+        if data.predefined_message is not None:
+            v.append(data.predefined_message)
+        return ' :: '.join(v + messages)
+    
+    speeches = []
+    for kind in rnd.choices(kinds, weights, k=size):
+        if kind == INVALID:
+            speeches.append(rnd.choice(_CHATTER))
+            continue
+        
+        data, head = header(unregistered if kind == UNREGISTERED else registered)
+        if kind == SHORTHAND:
+            speeches.append(' :: '.join([head, *rnd.sample(_MESSAGES, rnd.randint(0, 2))]))
+        elif kind == MULTI:
+            speeches.append(full(data, head, rnd.choices(_MESSAGES, k=rnd.randint(5, 50))))
+        else:
+            speeches.append(full(data, head, rnd.sample(_MESSAGES, rnd.randint(0, 1))))
+    return speeches
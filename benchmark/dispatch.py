@@ -0,0 +1,62 @@
+"""
+Requests/sec of ResponsePattern.__call__ against the 2.0.0 implementation.
+
+$ python -m benchmark.dispatch
+"""
+
+import logging
+from hex_drone import ResponsePattern, OptimizedSpeech, RequestEvent as Ev
+from benchmark.legacy import LegacyResponsePattern
+from timeit import repeat
+
+RESPONSE = OptimizedSpeech.build('3064', '213')
+REQUESTS = {
+    'hit': OptimizedSpeech.build('1111', '210'),
+    'unregistered': OptimizedSpeech.build('1111', '050'),
+    'invalid': 'Good morning, drones!',
+    'error': OptimizedSpeech.build('1111', '052', '1 / 0'),
+}
+
+
+def _define(base):
+    class BenchmarkPattern(base):
+        @Ev.ON_MESSAGE('210')
+        def on_thanks(self, request):
+            return RESPONSE
+        
+        @Ev.ON_MESSAGE('052')
+        def on_query(self, request):
+            raise ZeroDivisionError()
+        
+        @Ev.ON_UNREGISTERED
+        def on_unregistered(self, request):
+            return RESPONSE
+        
+        @Ev.ON_INVALID
+        def on_invalid(self, request):
+            return RESPONSE
+        
+        @Ev.ON_ERROR
+        def on_error(self, error):
+            return RESPONSE
+    
+    return BenchmarkPattern
+
+
+def _main():
+    # Errors are logged by logger.exception, so the benchmark silences them.
+    logger = logging.getLogger('benchmark.dispatch')
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+    
+    number = 100000
+    patterns = [_define(LegacyResponsePattern)(logger), _define(ResponsePattern)(logger)]
+    for name, request in REQUESTS.items():
+        for pattern in patterns:
+            best = min(repeat(lambda: pattern(request), number=number, repeat=5))
+            label = f'{name} ({type(pattern).__bases__[0].__name__})'
+            print(f'{label:<36}{number / best:>14,.0f} requests/sec')
+
+
+if __name__ == '__main__':
+    _main()
@@ -0,0 +1,32 @@
+"""
+Overhead of hooks in ResponsePattern.__call__.
+
+$ python -m benchmark.hooks
+"""
+
+from hex_drone import Hook, SamplingProfiler, RateLimiter
+from benchmark import corpus
+from benchmark.suite import SamplePattern
+from timeit import repeat
+
+
+def _main():
+    lines = corpus.generate(20000, registered=SamplePattern._func_name_on_message)
+    profiler = SamplingProfiler()
+    patterns = {
+        'no hooks': SamplePattern(),
+        'empty hook': SamplePattern(hooks=[Hook()]),
+        'profiler': SamplePattern(hooks=[profiler]),
+        'rate limiter': SamplePattern(hooks=[RateLimiter('3064', rate=1e9)]),
+    }
+    for name, pattern in patterns.items():
+        best = min(repeat(lambda: [pattern(v) for v in lines], number=1, repeat=5))
+        print(f'{name:<16}{best / len(lines) * 1e9:>10,.0f} ns/request')
+    
+    print()
+    for stats in profiler.report(5):
+        print(f'{stats.handler:<24}{stats.mean * 1e9:>10,.0f} ns (max {stats.max * 1e9:,.0f} ns, {stats.count} samples)')
+
+
+if __name__ == '__main__':
+    _main()
@@ -0,0 +1,90 @@
+"""
+Parallel parsing of a large chat log file by numbers of workers.
+The log (2 GiB by default) is generated in a temporary file and deleted at the end.
+Use `--path` and `--keep` to keep it for later runs.
+
+$ python -m benchmark.ingest --path /tmp/chat.log --keep --size 4096 --workers 1 2 4 8
+"""
+
+import os
+import tempfile
+from argparse import ArgumentParser
+from contextlib import contextmanager
+from hex_drone import ingest
+from benchmark import corpus
+from time import perf_counter
+from typing import Iterator, Optional
+
+
+def _generate(path: str, size: int, seed: int):
+    # Blocks of generated speeches are repeated, because generating every line is slower than parsing.
+    block = ('\n'.join(corpus.generate(100000, seed)) + '\n').encode('utf-8')
+    with open(path, 'wb') as f:
+        for _ in range(max(1, size // len(block))):
+            f.write(block)
+
+
+@contextmanager
+def _log_file(path: Optional[str], size: int, seed: int, keep: bool) -> Iterator[str]:
+    # Generate the log if it does not exist. The generated log is deleted at the end unless it is kept.
+    if path is None:
+        fd, path = tempfile.mkstemp(prefix='chat_', suffix='.log')
+        os.close(fd)
+        generated = True
+    else:
+        generated = not os.path.exists(path)
+    try:
+        if generated:
+            _generate(path, size, seed)
+        yield path
+    finally:
+        if generated and not keep:
+            os.remove(path)
+        elif generated:
+            print(f'{path} is kept.')
+
+
+def _add_log_arguments(parser: ArgumentParser):
+    parser.add_argument('--path', help='Log file. It is generated if it does not exist. (A temporary file if omitted.)')
+    parser.add_argument('--keep', action='store_true', help='Keep the generated log.')
+    parser.add_argument('--size', type=int, default=2048, help='MiB of the generated log.')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the corpus.')
+
+
+def _measure(func):
+    start = perf_counter()
+    func()
+    return perf_counter() - start
+
+
+def _main():
+    parser = ArgumentParser(prog='python -m benchmark.ingest', description='Benchmark parallel parsing of a file.')
+    _add_log_arguments(parser)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8], help='Numbers of workers.')
+    parser.add_argument('--chunk-size', type=int, default=ingest.DEFAULT_CHUNK_SIZE, help='Bytes of each chunk.')
+    args = parser.parse_args()
+    
+    with _log_file(args.path, args.size * 2 ** 20, args.seed, args.keep) as path:
+        size = os.path.getsize(path)
+        print(f'{path}: {size / 2 ** 20:,.0f} MiB, {os.cpu_count()} CPUs')
+        
+        def frames():
+            for _ in ingest.iter_frames(path, workers, args.chunk_size):
+                pass
+        
+        base = {}
+        for workers in args.workers:
+            for name, func in (
+                    ('count', lambda: ingest.count(path, workers, args.chunk_size)),
+                    ('iter_frames', frames),
+            ):
+                seconds = _measure(func)
+                speedup = base.setdefault(name, seconds) / seconds
+                print(
+                    f'{name:<12}workers={workers:<4}{seconds:>8,.2f} s{size / 2 ** 20 / seconds:>10,.1f} MiB/s'
+                    f'{speedup:>8,.2f}x'
+                )
+
+
+if __name__ == '__main__':
+    _main()
@@ -0,0 +1,55 @@
+"""
+Time and memory to create 100k instances of ResponsePattern. (e.g. one instance per drone persona)
+
+$ python -m benchmark.instances
+"""
+
+import tracemalloc
+from benchmark.suite import SamplePattern
+from time import perf_counter
+
+COUNT = 100000
+
+
+class PersonaPattern(SamplePattern):
+    def __init__(self, drone_id: str):
+        super().__init__()
+        self.drone_id = drone_id
+
+
+class SlottedPersonaPattern(SamplePattern):
+    __slots__ = ('drone_id',)
+    
+    def __init__(self, drone_id: str):
+        super().__init__()
+        self.drone_id = drone_id
+
+
+def _measure(cls):
+    drone_ids = [f'{i % 10000:04}' for i in range(COUNT)]
+    start = perf_counter()
+    patterns = [cls(drone_id) for drone_id in drone_ids]
+    seconds = perf_counter() - start
+    del patterns
+    
+    tracemalloc.start()
+    patterns = [cls(drone_id) for drone_id in drone_ids]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    # Instances share the dispatcher of the class.
+    assert patterns[0]._dispatcher is patterns[-1]._dispatcher
+    return seconds, size
+
+
+def _main():
+    for cls in [PersonaPattern, SlottedPersonaPattern]:
+        seconds, size = _measure(cls)
+        print(
+            f'{cls.__name__:<24}{seconds / COUNT * 1e6:>8,.2f} us/instance'
+            f'{size / 2 ** 20:>10,.1f} MiB{size / COUNT:>10,.0f} bytes/instance'
+        )
+
+
+if __name__ == '__main__':
+    _main()
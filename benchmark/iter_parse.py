@@ -0,0 +1,78 @@
+"""
+Peak RSS and throughput of streaming a large chat log file by iter_parse, against readlines and parse.
+Each case runs in a new process to measure its own peak RSS. The log is generated as same as benchmark.ingest.
+
+$ python -m benchmark.iter_parse --path /tmp/chat.log --keep --size 4096
+"""
+
+import multiprocessing
+import os
+import resource
+import sys
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from hex_drone import OptimizedSpeech, ingest
+from benchmark.ingest import _add_log_arguments, _log_file
+from time import perf_counter
+
+
+def _baseline(path: str) -> int:
+    return 0  # Peak RSS of the process itself.
+
+
+def _readlines(path: str) -> int:
+    with open(path, encoding='utf-8', errors='replace') as f:
+        lines = f.readlines()
+    return sum(1 for line in lines if OptimizedSpeech.parse(line.rstrip('\n')) is not None)
+
+
+def _iter_parse(path: str) -> int:
+    return sum(1 for _, speech in ingest.iter_parse(path) if speech is not None)
+
+
+def _iter_parse_codes(path: str) -> int:
+    return sum(1 for _, speech in ingest.iter_parse(path, codes=['050']) if speech is not None)
+
+
+CASES = {
+    'baseline': _baseline,
+    'readlines+parse': _readlines,
+    'iter_parse': _iter_parse,
+    'iter_parse codes': _iter_parse_codes,
+}
+
+
+def _run(name: str, path: str):
+    start = perf_counter()
+    count = CASES[name](path)
+    seconds = perf_counter() - start
+    # ru_maxrss is KiB on Linux, and bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+    return count, seconds, peak
+
+
+def _main():
+    parser = ArgumentParser(prog='python -m benchmark.iter_parse', description='Benchmark streaming parse of a file.')
+    _add_log_arguments(parser)
+    parser.add_argument(
+        '--cases', nargs='+', choices=list(CASES), default=list(CASES),
+        help='Cases to run. (readlines+parse needs memory of a few times the size of the log.)')
+    args = parser.parse_args()
+    
+    with _log_file(args.path, args.size * 2 ** 20, args.seed, args.keep) as path:
+        size = os.path.getsize(path)
+        print(f'{path}: {size / 2 ** 20:,.0f} MiB')
+        
+        context = multiprocessing.get_context('spawn')
+        for name in args.cases:
+            with ProcessPoolExecutor(1, mp_context=context) as executor:
+                count, seconds, peak = executor.submit(_run, name, path).result()
+            rate = size / 2 ** 20 / seconds if count else 0.0
+            print(
+                f'{name:<20}{seconds:>8,.2f} s{rate:>10,.1f} MiB/s'
+                f'{peak / 2 ** 20:>10,.0f} MiB peak RSS{count:>14,} speeches'
+            )
+
+
+if __name__ == '__main__':
+    _main()
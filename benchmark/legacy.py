@@ -0,0 +1,155 @@
+"""
+Baseline implementations (version 2.0.0) kept for before/after comparison in benchmarks.
+"""
+
+import re
+from hex_drone import OptimizedSpeech, RequestEvent
+from hex_drone.logs import get_logger
+from hex_drone.status_codes import status_codes
+from typing import Optional, Sequence, Callable, Union, Dict, List, Any
+
+
+class LegacyOptimizedSpeech:
+    def __init__(
+            self,
+            drone_id: str, status_code: str, status_message: str,
+            predefined_message: Optional[str], user_defined_messages: Sequence[str]
+    ):
+        self.drone_id = drone_id
+        self.status_code = status_code
+        self.status_message = status_message
+        self.predefined_message = predefined_message
+        self.user_defined_messages = list(user_defined_messages)
+    
+    def __str__(self):
+        v = [
+            self.drone_id, f'Code {self.status_code}', self.status_message,
+            self.predefined_message, *self.user_defined_messages
+        ]
+        v = list(filter(lambda x: x is not None, v))
+        return ' :: '.join(v)
+    
+    def __eq__(self, other):
+        if not isinstance(other, LegacyOptimizedSpeech):
+            return None
+        return \
+            self.drone_id == other.drone_id and \
+            self.status_code == other.status_code and \
+            self.status_message == other.status_message and \
+            self.predefined_message == other.predefined_message and \
+            self.user_defined_messages == other.user_defined_messages
+    
+    @classmethod
+    def parse(cls, speech: str):
+        tokens = speech.split(' :: ')
+        if len(tokens) < 2:
+            return None
+        
+        drone_id = tokens.pop(0)
+        if not re.match(r'^\d{4}$', drone_id):
+            return None
+        
+        match = re.match(r'^Code (?P<CODE>\d{3})$', tokens.pop(0))
+        if match is None:
+            return None
+        status_code = match.group('CODE')
+        data = status_codes.get(status_code, None)
+        if data is None:
+            return None
+        
+        while len(tokens) > 0 and tokens[0] in [data.status_message, data.predefined_message]:
+            tokens.pop(0)
+        
+        return LegacyOptimizedSpeech(
+            drone_id, status_code, data.status_message,
+            data.predefined_message, tokens
+        )
+    
+    @classmethod
+    def build(cls, drone_id: str, status_code: str, *user_defined_messages: str):
+        data = status_codes.get(status_code)
+        if data is None:
+            return None
+        
+        return LegacyOptimizedSpeech(
+            drone_id, status_code, data.status_message,
+            data.predefined_message, user_defined_messages
+        )
+
+
+class LegacyResponsePatternMeta(type):
+    def __init__(cls, name, bases, attrs):
+        super().__init__(name, bases, attrs)
+        cls._func_name_on_message: Dict[str, str] = {}
+        cls._func_name_on_invalid_message: Optional[str] = None
+        cls._func_name_on_unregistered_message: Optional[str] = None
+        cls._func_name_on_error: Optional[str] = None
+        
+        for func_name, func in attrs.items():
+            events: List[dict] = getattr(func, RequestEvent.KEY_ATTR, [])
+            for event_dict in events:
+                event = event_dict[RequestEvent.KEY_EVENT]
+                if event == RequestEvent.ON_MESSAGE:
+                    for code in event_dict[RequestEvent.KEY_STATUS_CODES]:
+                        cls._func_name_on_message[code] = func_name
+                elif event == RequestEvent.ON_INVALID:
+                    cls._func_name_on_invalid_message = func_name
+                elif event == RequestEvent.ON_UNREGISTERED:
+                    cls._func_name_on_unregistered_message = func_name
+                elif event == RequestEvent.ON_ERROR:
+                    cls._func_name_on_error = func_name
+
+
+class LegacyResponsePattern(metaclass=LegacyResponsePatternMeta):
+    """
+    ResponsePattern of 2.0.0. (OptimizedSpeech is the current one.)
+    """
+    
+    def __init__(self, logger=None):
+        def get_func(func_name):
+            if func_name is None:
+                return None
+            return getattr(self, func_name, None)
+        
+        self._on_message = {
+            status_code: get_func(func_name)
+            for status_code, func_name in self._func_name_on_message.items()
+        }
+        self._on_invalid_message = get_func(self._func_name_on_invalid_message)
+        self._on_unregistered_message = get_func(self._func_name_on_unregistered_message)
+        self._on_error = get_func(self._func_name_on_error)
+        
+        self._logger = get_logger(__name__) if logger is None else logger
+    
+    def __call__(self, request: Union[str, OptimizedSpeech], **kwargs) -> Any:
+        def _try_call(event: RequestEvent, func: Optional[Callable], *args) -> Any:
+            if func is None:
+                self._logger.debug(f'The function for {event} is None.')
+                return None
+            
+            try:
+                self._logger.debug(f'Invoke the function for {event}')
+                return func(*args, **kwargs)
+            except BaseException as e:
+                self._logger.exception(f'An exception raised while handling {event}.')
+                if self._on_error is None:
+                    self._logger.debug(f'The function for {RequestEvent.ON_ERROR} is None.')
+                    return None
+                try:
+                    self._logger.debug(f'Invoke the function for {RequestEvent.ON_ERROR}')
+                    return self._on_error(e, **kwargs)
+                except BaseException as e2:
+                    self._logger.exception(f'An exception raised while handling {RequestEvent.ON_ERROR}.')
+                    return None
+        
+        if isinstance(request, str):
+            r = request
+            request = OptimizedSpeech.parse(request)
+            if request is None:
+                return _try_call(RequestEvent.ON_INVALID, self._on_invalid_message, r)
+        
+        func = self._on_message.get(request.status_code)
+        if func is None:
+            return _try_call(RequestEvent.ON_UNREGISTERED, self._on_unregistered_message, request)
+        
+        return _try_call(RequestEvent.ON_MESSAGE, func, request)
@@ -0,0 +1,60 @@
+"""
+Content routing by `ON_MESSAGE(match=...)` against a handler chaining `re.search` by numbers of routes.
+
+$ python -m benchmark.match
+"""
+
+import random
+import re
+from hex_drone import OptimizedSpeech, ResponsePattern, RequestEvent as Ev
+from timeit import repeat
+
+RESPONSE = OptimizedSpeech.build('3064', '057')
+
+
+def _chained_pattern(keywords):
+    searches = [re.compile(keyword).search for keyword in keywords]
+    
+    class ChainedPattern(ResponsePattern):
+        @Ev.ON_MESSAGE('052')
+        def on_query(self, request: OptimizedSpeech):
+            text = ' :: '.join(request.user_defined_messages)
+            for search in searches:
+                if search(text):
+                    return RESPONSE
+            return RESPONSE
+    
+    return ChainedPattern()
+
+
+def _handler():
+    # A new function for each route, because registered events are stored in the function.
+    def handler(self, request: OptimizedSpeech):
+        return RESPONSE
+    return handler
+
+
+def _matched_pattern(keywords):
+    attrs = {f'on_{i}': Ev.ON_MESSAGE('052', match=keyword)(_handler()) for i, keyword in enumerate(keywords)}
+    attrs['on_query'] = Ev.ON_MESSAGE('052')(_handler())
+    return type('MatchedPattern', (ResponsePattern,), attrs)()
+
+
+def _main():
+    rnd = random.Random(0)
+    words = [f'word{i}' for i in range(1000)]
+    for routes in (1, 5, 20, 50):
+        keywords = [rf'\bkeyword{i}\b' for i in range(routes)]
+        # A quarter of queries hit a random route, and others fall back to the plain handler.
+        lines = [
+            f'{rnd.randrange(10000):04} :: Code 052 :: {" ".join(rnd.sample(words, 8))}'
+            + (f' keyword{rnd.randrange(routes)}' if rnd.random() < 0.25 else '')
+            for _ in range(10000)
+        ]
+        for name, pattern in (('chained re.search', _chained_pattern(keywords)), ('match', _matched_pattern(keywords))):
+            best = min(repeat(lambda: [pattern(v) for v in lines], number=1, repeat=5))
+            print(f'routes={routes:<4}{name:<20}{best / len(lines) * 1e9:>10,.0f} ns/request')
+
+
+if __name__ == '__main__':
+    _main()
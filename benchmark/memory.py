@@ -0,0 +1,37 @@
+"""
+Memory used by 1M instances of OptimizedSpeech against the 2.0.0 implementation.
+
+$ python -m benchmark.memory
+"""
+
+import tracemalloc
+from hex_drone import OptimizedSpeech
+from benchmark.legacy import LegacyOptimizedSpeech
+
+COUNT = 1000000
+LINES = [
+    '3064 :: Code 200 :: Response :: Affirmative.',
+    '1111 :: Code 098 :: Charge is low.',
+    '1234 :: Code 050 :: Statement :: This drone is ready to obey, Hive Mxtress.',
+    '1234 :: Code 304 :: Mantra :: It obeys the Hive Mxtress.',
+]
+
+
+def _measure(parse):
+    lines = [LINES[i % len(LINES)] for i in range(COUNT)]
+    tracemalloc.start()
+    speeches = [parse(v) for v in lines]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del speeches
+    return size
+
+
+def _main():
+    for cls in [LegacyOptimizedSpeech, OptimizedSpeech]:
+        size = _measure(cls.parse)
+        print(f'{cls.__name__:<24}{size / 2 ** 20:>10,.1f} MiB{size / COUNT:>10,.1f} bytes/speech')
+
+
+if __name__ == '__main__':
+    _main()
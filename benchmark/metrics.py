@@ -0,0 +1,22 @@
+"""
+Overhead of Metrics in ResponsePattern.__call__.
+
+$ python -m benchmark.metrics
+"""
+
+from hex_drone import Metrics
+from benchmark import corpus
+from benchmark.suite import SamplePattern
+from timeit import repeat
+
+
+def _main():
+    lines = corpus.generate(20000, registered=SamplePattern._func_name_on_message)
+    patterns = {'metrics off': SamplePattern(), 'metrics on': SamplePattern(metrics=Metrics())}
+    for name, pattern in patterns.items():
+        best = min(repeat(lambda: [pattern(v) for v in lines], number=1, repeat=5))
+        print(f'{name:<16}{best / len(lines) * 1e9:>10,.0f} ns/request')
+
+
+if __name__ == '__main__':
+    _main()
@@ -0,0 +1,41 @@
+"""
+Scaling of a CPU-bound handler offloaded to the process pool by ResponsePattern.submit.
+
+$ python -m benchmark.offload
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from hex_drone import ResponsePattern, OptimizedSpeech, RequestEvent as Ev
+from time import perf_counter
+
+REQUESTS = [OptimizedSpeech.build('1111', '052', str(20000 + i)) for i in range(200)]
+
+
+class BenchmarkPattern(ResponsePattern):
+    @Ev.ON_MESSAGE('052', offload=Ev.OFFLOAD_PROCESS)
+    def on_query(self, request: OptimizedSpeech):
+        n = int(request.user_defined_messages[0])
+        return OptimizedSpeech.build('3064', '057', str(sum(i * i % 7 for i in range(n * 10))))
+
+
+def _main():
+    pattern = BenchmarkPattern()
+    start = perf_counter()
+    for request in REQUESTS:
+        pattern(request)
+    print(f'{"inline":<12}{len(REQUESTS) / (perf_counter() - start):>10,.1f} requests/sec')
+    
+    for workers in range(1, (os.cpu_count() or 1) + 1):
+        with ProcessPoolExecutor(workers) as executor:
+            pattern = BenchmarkPattern(process_pool=executor)
+            pattern.submit(REQUESTS[0]).result()  # Start workers.
+            start = perf_counter()
+            for future in [pattern.submit(request) for request in REQUESTS]:
+                future.result()
+            elapsed = perf_counter() - start
+        print(f'{f"{workers} workers":<12}{len(REQUESTS) / elapsed:>10,.1f} requests/sec')
+
+
+if __name__ == '__main__':
+    _main()
@@ -0,0 +1,32 @@
+"""
+Compare SpeechOptimizer with searching each predefined message, as the number of status codes grows.
+
+$ python -m benchmark.optimizer
+"""
+
+from hex_drone import SpeechOptimizer, status_codes
+from random import Random
+from timeit import repeat
+
+
+def _naive(messages, text):
+    return [code for message, code in messages if message in text]
+
+
+def _main():
+    rnd = Random(0)
+    words = ['drone', 'obey', 'hive', 'thank', 'you', 'please', 'serve', 'charge', 'is', 'low']
+    lines = [' '.join(rnd.choice(words) for _ in range(8)) + ' Thank you.' for _ in range(2000)]
+    unused = [f'{i:03}' for i in range(1000) if f'{i:03}' not in status_codes]
+    for extra in [0, 100, len(unused)]:
+        registry = status_codes.extend((code, 'Status', f'Site message {code}.') for code in unused[:extra])
+        optimizer = SpeechOptimizer(registry)
+        messages = [(d.predefined_message, c) for c, d in registry.items() if d.predefined_message]
+        for name, func in [('naive', lambda: [_naive(messages, v) for v in lines]),
+                           ('SpeechOptimizer', lambda: optimizer.classify_many(lines))]:
+            best = min(repeat(func, number=1, repeat=5))
+            print(f'{name:<16}{len(messages):>5} messages {best / len(lines) * 1e9:>10,.0f} ns/line')
+
+
+if __name__ == '__main__':
+    _main()
@@ -0,0 +1,29 @@
+"""
+Microbenchmark of OptimizedSpeech.parse and OptimizedSpeech.view (header only) against the 2.0.0 parser.
+
+$ python -m benchmark.parse
+"""
+
+from hex_drone import OptimizedSpeech
+from benchmark.legacy import LegacyOptimizedSpeech
+from timeit import repeat
+
+INPUTS = {
+    'valid': '1234 :: Code 098 :: Status :: Going offline and into storage. :: Charge is low.',
+    'short hand': '1234 :: Code 098 :: Charge is low.',
+    'invalid': 'Good morning, drones! :: How are you?',
+    '50 messages': ' :: '.join(['1234 :: Code 050 :: Statement'] + [f'Message {i}.' for i in range(50)]),
+}
+
+
+def _main():
+    number = 100000
+    for name, speech in INPUTS.items():
+        for parser in [LegacyOptimizedSpeech.parse, OptimizedSpeech.parse, OptimizedSpeech.view]:
+            best = min(repeat(lambda: parser(speech), number=number, repeat=5))
+            label = f'{name} ({parser.__qualname__})'
+            print(f'{label:<44}{best / number * 1e9:>10,.0f} ns/call')
+
+
+if __name__ == '__main__':
+    _main()
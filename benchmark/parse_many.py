@@ -0,0 +1,37 @@
+"""
+Throughput of OptimizedSpeech.parse_many against parsing line by line.
+
+$ python -m benchmark.parse_many
+"""
+
+from hex_drone import OptimizedSpeech
+from benchmark.legacy import LegacyOptimizedSpeech
+from timeit import repeat
+
+LINES = [
+    '3064 :: Code 200 :: Response :: Affirmative.',
+    '3064 :: Code 212',
+    '1111 :: Code 098 :: Charge is low.',
+    '1111 :: Code 050 :: Statement :: This drone is ready to obey, Hive Mxtress.',
+    '1234 :: Code 304 :: Mantra :: It obeys the Hive Mxtress.',
+    'hello, drones!',
+    '12345 :: Code 050 :: Statement',
+    '1234 :: Code 999',
+] * 5000
+
+
+def _main():
+    cases = {
+        'legacy parse (per line)': lambda: [LegacyOptimizedSpeech.parse(v) for v in LINES],
+        'parse (per line)': lambda: [OptimizedSpeech.parse(v) for v in LINES],
+        'parse_many': lambda: OptimizedSpeech.parse_many(LINES),
+        'parse_many (invalid_only)': lambda: OptimizedSpeech.parse_many(LINES, invalid_only=True),
+    }
+    print(f'{len(LINES)} lines')
+    for name, func in cases.items():
+        best = min(repeat(func, number=1, repeat=5))
+        print(f'{name:<28}{len(LINES) / best:>14,.0f} lines/sec')
+
+
+if __name__ == '__main__':
+    _main()
@@ -0,0 +1,52 @@
+"""
+Pure handlers with and without ResponseCache over repeated requests.
+
+$ python -m benchmark.response_cache
+"""
+
+import random
+from hex_drone import OptimizedSpeech, ResponseCache, ResponsePattern, RequestEvent as Ev
+from timeit import repeat
+
+RESPONSE = OptimizedSpeech.build('3064', '213')
+
+
+class UncachedPattern(ResponsePattern):
+    @Ev.ON_MESSAGE('052')
+    def on_query(self, request: OptimizedSpeech):
+        return OptimizedSpeech.build('3064', '057', str(eval(request.user_defined_messages[0], {})))
+    
+    @Ev.ON_MESSAGE('210')
+    def on_thanks(self, request: OptimizedSpeech):
+        return RESPONSE
+
+
+class CachedPattern(ResponsePattern):
+    @Ev.ON_MESSAGE('052', cache=ResponseCache(maxsize=256, ttl=60))
+    def on_query(self, request: OptimizedSpeech):
+        return OptimizedSpeech.build('3064', '057', str(eval(request.user_defined_messages[0], {})))
+    
+    @Ev.ON_MESSAGE('210', cache=True)
+    def on_thanks(self, request: OptimizedSpeech):
+        return RESPONSE
+
+
+def _main():
+    # Queries are drawn from a small set of expressions, as drones ask same questions again and again.
+    rnd = random.Random(0)
+    expressions = [f'{rnd.randrange(100)}*{rnd.randrange(100)}+{rnd.randrange(100)}' for _ in range(100)]
+    lines = [
+        f'{rnd.randrange(10000):04} :: Code 052 :: {rnd.choice(expressions)}' if rnd.random() < 0.8 else
+        f'{rnd.randrange(10000):04} :: Code 210'
+        for _ in range(20000)
+    ]
+    cached = CachedPattern()
+    for pattern in [UncachedPattern(), cached]:
+        best = min(repeat(lambda: [pattern(v) for v in lines], number=1, repeat=5))
+        print(f'{type(pattern).__name__:<16}{best / len(lines) * 1e9:>10,.0f} ns/request')
+    for handler, info in cached.cache_info().items():
+        print(f'{handler:<16}hit rate {info.hit_rate:.1%} ({info.currsize} cached)')
+
+
+if __name__ == '__main__':
+    _main()
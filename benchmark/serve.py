@@ -0,0 +1,86 @@
+"""
+Load generator of hex_drone.serve. Clients pipeline the corpus to a server in another process.
+
+$ python -m benchmark.serve --clients 1 8 32
+"""
+
+import ast
+import asyncio
+import subprocess
+import sys
+from argparse import ArgumentParser
+from hex_drone.serve import render
+from benchmark import corpus
+from benchmark.suite import SamplePattern
+from time import perf_counter
+from typing import List, Tuple
+
+
+def _start_server(max_pending: int) -> Tuple[subprocess.Popen, str, int]:
+    # The corpus contains Code 098, so the shutdown code is disabled and the server is terminated at the end.
+    process = subprocess.Popen(
+        [
+            sys.executable, '-m', 'hex_drone.serve', 'benchmark.suite:SamplePattern', '--port', '0',
+            '--max-pending', str(max_pending), '--shutdown-code', '',
+        ],
+        stderr=subprocess.PIPE, text=True,
+    )
+    line = process.stderr.readline()
+    if not line.startswith('Serving on'):
+        process.kill()
+        raise RuntimeError(f'The server is not started: {line}')
+    host, port = ast.literal_eval(line[len('Serving on'):])[:2]  # e.g. ('127.0.0.1', 3064)
+    return process, host, port
+
+
+async def _client(host: str, port: int, data: bytes, expected: int):
+    reader, writer = await asyncio.open_connection(host, port)
+    
+    async def receive():
+        received = 0
+        while received < expected:
+            chunk = await reader.read(65536)
+            if not chunk:
+                raise ConnectionError('The connection is closed.')
+            received += chunk.count(b'\n')
+    
+    receiver = asyncio.create_task(receive())
+    writer.write(data)
+    await writer.drain()
+    await receiver
+    writer.close()
+    await writer.wait_closed()
+
+
+async def _run(host: str, port: int, clients: int, data: bytes, expected: int) -> float:
+    start = perf_counter()
+    await asyncio.gather(*[_client(host, port, data, expected) for _ in range(clients)])
+    return perf_counter() - start
+
+
+def _main():
+    parser = ArgumentParser(prog='python -m benchmark.serve', description='Benchmark the line protocol server.')
+    parser.add_argument('--size', type=int, default=20000, help='Number of speeches sent by each client.')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the corpus.')
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 8, 32], help='Numbers of connections.')
+    parser.add_argument('--max-pending', type=int, default=64, help='Requests in progress for each connection.')
+    args = parser.parse_args()
+    
+    pattern = SamplePattern()
+    lines: List[str] = corpus.generate(args.size, args.seed, registered=pattern.registered_status_codes)
+    data = ''.join(f'{v}\n' for v in lines).encode('utf-8')
+    expected = sum(render(pattern(v)).count(b'\n') for v in lines)
+    
+    process, host, port = _start_server(args.max_pending)
+    try:
+        for clients in args.clients:
+            seconds = asyncio.run(_run(host, port, clients, data, expected))
+            requests = clients * len(lines)
+            print(f'clients={clients:<6}{seconds:>8,.2f} s{requests / seconds:>12,.0f} requests/s')
+    finally:
+        process.terminate()
+        process.wait()
+
+
+if __name__ == '__main__':
+    _main()
@@ -0,0 +1,153 @@
+"""
+Benchmarks of parse, build, render and dispatch over a synthetic corpus.
+"""
+
+import logging
+import platform
+import subprocess
+from hex_drone import ResponsePattern, OptimizedSpeech, RequestEvent as Ev, templates
+from benchmark import corpus
+from time import perf_counter
+from typing import Callable, Dict, List, Optional
+
+RESPONSE = OptimizedSpeech.build('3064', '212')
+
+
+class SamplePattern(ResponsePattern):
+    __slots__ = ()  # Subclasses may drop `__dict__`. (See benchmark.instances)
+    
+    @Ev.ON_MESSAGE('050', '051', '052', '053', '054', '055', '056', '057')
+    def on_statement(self, request: OptimizedSpeech):
+        return RESPONSE
+    
+    @Ev.ON_MESSAGE('098', '099', '100', '101', '104', '105', '106', '107', '108', '109')
+    def on_status(self, request: OptimizedSpeech):
+        return RESPONSE
+    
+    @Ev.ON_MESSAGE('200', '210', '211', '212', '213', '500')
+    def on_response(self, request: OptimizedSpeech):
+        return OptimizedSpeech.build('3064', '213')
+    
+    @Ev.ON_MESSAGE('301', '302', '303', '304', '310', '321', '322', '350')
+    def on_mantra(self, request: OptimizedSpeech):
+        return [RESPONSE, RESPONSE]
+    
+    @Ev.ON_UNREGISTERED
+    def on_unregistered(self, request: OptimizedSpeech):
+        return OptimizedSpeech.build('3064', '426')
+    
+    @Ev.ON_INVALID
+    def on_invalid(self, request: str):
+        return OptimizedSpeech.build('3064', '400')
+    
+    @Ev.ON_ERROR
+    def on_error(self, error: BaseException):
+        return OptimizedSpeech.build('3064', '109')
+
+
+def _time(func: Callable[..., object], repeat: int, setup: Optional[Callable[[], object]] = None) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        # Each run starts with an empty template cache, so that results do not depend on the previous benchmarks.
+        templates.clear()
+        if setup is None:
+            start = perf_counter()
+            func()
+        else:
+            # The setup is not timed, and its result is passed to the benchmark.
+            value = setup()
+            start = perf_counter()
+            func(value)
+        best = min(best, perf_counter() - start)
+    return best
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def run(size: int = 20000, seed: int = 0, repeat: int = 5) -> dict:
+    """
+    Run all benchmarks.
+    
+    :param size: Number of speeches in the corpus.
+    :param seed: Seed of the corpus.
+    :param repeat: Each benchmark is repeated and the best time is taken.
+    :return: Results which can be dumped as JSON.
+    """
+    logger = logging.getLogger('benchmark.suite')
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+    
+    pattern = SamplePattern(logger)
+    lines = corpus.generate(size, seed, registered=pattern.registered_status_codes)
+    speeches = [speech for speech in OptimizedSpeech.parse_many(lines) if speech is not None]
+    args = [(s.drone_id, s.status_code, *s.user_defined_messages) for s in speeches]
+    copies = [OptimizedSpeech.parse(str(s)) for s in speeches]
+    
+    def render():
+        for s in [OptimizedSpeech.build(*v) for v in args]:
+            str(s)
+    
+    def build():
+        return [OptimizedSpeech.build(*v) for v in args]
+    
+    benchmarks: Dict[str, Callable[..., object]] = {
+        'parse': lambda: [OptimizedSpeech.parse(v) for v in lines],
+        'parse_many': lambda: OptimizedSpeech.parse_many(lines),
+        'build': build,
+        'str': lambda built: [str(s) for s in built],
+        'build+str': render,
+        'eq': lambda: [a == b for a, b in zip(speeches, copies)],
+        'call': lambda: [pattern(v) for v in lines],
+        'dispatch_many': lambda: pattern.dispatch_many(lines),
+    }
+    # `__str__` caches the result, so speeches are built again before each run.
+    setups: Dict[str, Callable[[], object]] = {'str': build}
+    counts = {
+        'parse': len(lines), 'parse_many': len(lines), 'build': len(args), 'str': len(args), 'build+str': len(args),
+        'eq': len(speeches), 'call': len(lines), 'dispatch_many': len(lines),
+    }
+    
+    results = {}
+    for name, func in benchmarks.items():
+        elapsed = _time(func, repeat, setups.get(name))
+        results[name] = {
+            'ops': counts[name],
+            'seconds': elapsed,
+            'ns_per_op': elapsed / counts[name] * 1e9,
+            'ops_per_sec': counts[name] / elapsed,
+        }
+    
+    return {
+        'meta': {
+            'commit': _commit(),
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'machine': platform.machine(),
+            'size': size,
+            'seed': seed,
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+def compare(old: dict, new: dict) -> List[str]:
+    """
+    Compare two results.
+    
+    :return: Lines of report. Ratio is new time / old time, so less than 1.00 is faster.
+    """
+    lines = [f'{"benchmark":<16}{"old ns/op":>12}{"new ns/op":>12}{"ratio":>8}']
+    for name, result in new['results'].items():
+        if name not in old['results']:
+            continue
+        a, b = old['results'][name]['ns_per_op'], result['ns_per_op']
+        lines.append(f'{name:<16}{a:>12,.0f}{b:>12,.0f}{b / a:>8.2f}')
+    return lines
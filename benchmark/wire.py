@@ -0,0 +1,70 @@
+"""
+Binary frames against the text form for passing speeches between processes,
+and SpeechDecoder against decoding and parsing lines of a byte stream by hand.
+
+$ python -m benchmark.wire
+"""
+
+from hex_drone import OptimizedSpeech
+from hex_drone.wire import FrameDecoder, SpeechDecoder, encode_many
+from codecs import getincrementaldecoder
+from timeit import repeat
+
+
+def _main():
+    speech = OptimizedSpeech.parse('3064 :: Code 098 :: Status :: Going offline and into storage. :: Charge is low.')
+    text = str(speech)
+    frame = speech.to_bytes()
+    print(f'size: text {len(text.encode())} bytes, frame {len(frame)} bytes')
+    
+    cases = {
+        'text encode (str + encode)': lambda: OptimizedSpeech._from_data('3064', speech._data, speech._messages)
+        .__str__().encode(),
+        'frame encode (to_bytes)': lambda: speech.to_bytes(),
+        'text decode (decode + parse)': lambda: OptimizedSpeech.parse(text.encode().decode()),
+        'frame decode (from_bytes)': lambda: OptimizedSpeech.from_bytes(frame),
+    }
+    number = 100000
+    for name, func in cases.items():
+        best = min(repeat(func, number=number, repeat=5))
+        print(f'{name:<36}{best / number * 1e9:>10,.0f} ns/call')
+    
+    speeches = [OptimizedSpeech.build(f'{i % 10000:04}', '050', f'Message {i}.') for i in range(10000)]
+    stream = encode_many(speeches)
+    lines = ('\n'.join(map(str, speeches)) + '\n').encode()
+    
+    def decode_stream():
+        decoder = FrameDecoder()
+        for i in range(0, len(stream), 4096):
+            decoder.feed(stream[i:i + 4096])
+    
+    def parse_lines():
+        OptimizedSpeech.parse_many(lines.decode().splitlines())
+    
+    # Chunks are split at odd sizes, so characters and separators are split.
+    chunks = [lines[i:i + 4093] for i in range(0, len(lines), 4093)]
+    
+    def decode_then_parse():
+        decoder = getincrementaldecoder('utf-8')()
+        buffer = ''
+        for chunk in chunks:
+            *texts, buffer = (buffer + decoder.decode(chunk)).split('\n')
+            [OptimizedSpeech.parse(text) for text in texts]
+    
+    def speech_decoder():
+        decoder = SpeechDecoder()
+        for chunk in chunks:
+            decoder.feed(chunk)
+    
+    for name, func in {
+        'stream of frames': decode_stream,
+        'stream of lines': parse_lines,
+        'chunks: decode then parse': decode_then_parse,
+        'chunks: SpeechDecoder': speech_decoder,
+    }.items():
+        best = min(repeat(func, number=1, repeat=5))
+        print(f'{name:<36}{best / len(speeches) * 1e9:>10,.0f} ns/speech')
+
+
+if __name__ == '__main__':
+    _main()
@@ -1,5 +1,12 @@
-from .status_codes import status_codes
-from .optimized_speech import OptimizedSpeech
+from .status_codes import status_codes, StatusCodeData, StatusCodeRegistry
+from .templates import templates
+from .optimized_speech import OptimizedSpeech, SpeechView
+from .parse_cache import ParseCache
+from .response_cache import ResponseCache
+from .metrics import Metrics
+from .hooks import Hook, SamplingProfiler
+from .rate_limiter import RateLimiter
+from .optimizer import SpeechOptimizer
 from .request_event import RequestEvent
 from .response_pattern import ResponsePattern
 
@@ -0,0 +1,229 @@
+"""
+Columnar batch of speeches for analytics over large logs. It requires NumPy.
+(pip install hex-drone-optimized-speech-3064[numpy])
+"""
+
+from .optimized_speech import OptimizedSpeech, _drone_id, _tokenize
+from .status_codes import status_codes, StatusCodeRegistry, CODE_COUNT
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple, Union
+import numpy as np
+
+_KEYS = ('drone_id', 'status_code')
+_LABELS: Dict[str, List[str]] = {}  # Strings of all drone IDs and status codes, created when they are needed.
+
+
+def _labels(key: str) -> List[str]:
+    labels = _LABELS.get(key)
+    if labels is None:
+        if key == 'status_code':
+            labels = _LABELS[key] = [f'{i:03}' for i in range(CODE_COUNT)]
+        else:
+            labels = _LABELS[key] = [f'{i:04}' for i in range(10000)]
+    return labels
+
+
+class SpeechBatch:
+    """
+    Speeches stored in columns.
+    Drone IDs and status codes are integer arrays, and user defined messages are slices of one string.
+    Filtered batches share the string and the message offsets with the original batch.
+    Status messages and predefined messages are the ones of the registry,
+    and drone IDs are stored as integers. (e.g. '١٢٣٤' is restored as '1234')
+    """
+    
+    def __init__(
+            self, drone_ids: np.ndarray, codes: np.ndarray, starts: np.ndarray, ends: np.ndarray,
+            text: str, offsets: np.ndarray, registry: StatusCodeRegistry = None
+    ):
+        """
+        Use `from_lines` or `from_speeches` to build the batch.
+        
+        :param drone_ids: Integer drone IDs.
+        :param codes: Integer status codes.
+        :param starts: Index of the first user defined message of each speech in `offsets`.
+        :param ends: Index after the last user defined message of each speech in `offsets`.
+        :param text: Concatenated user defined messages.
+        :param offsets: Start of each user defined message in `text`, and the end of `text` at last.
+        :param registry: Status codes of the speeches. (`status_codes` if None.)
+        """
+        self._drone_ids = drone_ids
+        self._codes = codes
+        self._starts = starts
+        self._ends = ends
+        self._text = text
+        self._offsets = offsets
+        self._registry = status_codes if registry is None else registry
+    
+    @classmethod
+    def from_lines(cls, lines: Iterable[str], registry: StatusCodeRegistry = None) -> 'SpeechBatch':
+        """
+        Parse raw lines. Invalid lines are skipped. (Trailing newlines are accepted as same as `parse`.)
+        
+        :param registry: Status codes to accept. (`status_codes` if None.)
+        """
+        get_data = (status_codes if registry is None else registry).get
+        drone_ids, codes, counts, messages = [], [], [], []
+        for line in lines:
+            result = _tokenize(line, get_data)
+            if result is None:
+                continue
+            drone_id, data, user_defined_messages = result
+            drone_ids.append(int(drone_id))
+            codes.append(data.index)
+            counts.append(len(user_defined_messages))
+            messages.extend(user_defined_messages)
+        return cls._build(drone_ids, codes, counts, messages, registry)
+    
+    @classmethod
+    def from_speeches(cls, speeches: Iterable[OptimizedSpeech], registry: StatusCodeRegistry = None) -> 'SpeechBatch':
+        """
+        Build from parsed speeches.
+        
+        :param registry: Status codes of the speeches. (`status_codes` if None.) Raise ValueError if one is not in it.
+        Drone IDs must be 4 digits as same as `OptimizedSpeech.parse`, or ValueError is raised.
+        """
+        get_data = (status_codes if registry is None else registry).get
+        drone_ids, codes, counts, messages = [], [], [], []
+        for index, speech in enumerate(speeches):
+            data = get_data(speech.status_code)
+            if data is None:
+                raise ValueError(f'Status code {speech.status_code!r} is not in the registry.')
+            drone_id = speech.drone_id
+            if len(drone_id) != 4 or not drone_id.isdecimal():
+                raise ValueError(f'Drone ID {drone_id!r} of speech {index} is not 4 digits.')
+            drone_ids.append(int(drone_id))
+            codes.append(data.index)
+            counts.append(len(speech.user_defined_messages))
+            messages.extend(speech.user_defined_messages)
+        return cls._build(drone_ids, codes, counts, messages, registry)
+    
+    @classmethod
+    def _build(cls, drone_ids, codes, counts, messages, registry) -> 'SpeechBatch':
+        ends = np.cumsum(np.array(counts, dtype=np.int64))
+        starts = ends - np.array(counts, dtype=np.int64)
+        offsets = np.zeros(len(messages) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, messages), dtype=np.int64, count=len(messages)), out=offsets[1:])
+        return cls(
+            np.array(drone_ids, dtype=np.uint16), np.array(codes, dtype=np.uint16),
+            starts, ends, ''.join(messages), offsets, registry
+        )
+    
+    @property
+    def drone_ids(self) -> np.ndarray:
+        """
+        Integer drone IDs. (Read-only view)
+        """
+        view = self._drone_ids.view()
+        view.flags.writeable = False
+        return view
+    
+    @property
+    def status_codes(self) -> np.ndarray:
+        """
+        Integer status codes. (Read-only view)
+        """
+        view = self._codes.view()
+        view.flags.writeable = False
+        return view
+    
+    @property
+    def message_counts(self) -> np.ndarray:
+        """
+        Numbers of user defined messages.
+        """
+        return self._ends - self._starts
+    
+    def __len__(self) -> int:
+        return len(self._codes)
+    
+    def __iter__(self) -> Iterator[OptimizedSpeech]:
+        for i in range(len(self)):
+            yield self._speech(i)
+    
+    def __getitem__(self, item: Union[int, slice, np.ndarray, Sequence[int]]) \
+            -> Union[OptimizedSpeech, 'SpeechBatch']:
+        """
+        Get a speech by an integer, or a batch by a slice, a boolean mask or indices.
+        """
+        if isinstance(item, (int, np.integer)):
+            n = len(self)
+            if not -n <= item < n:
+                raise IndexError('SpeechBatch index out of range')
+            return self._speech(int(item) % n)
+        return SpeechBatch(
+            self._drone_ids[item], self._codes[item], self._starts[item], self._ends[item],
+            self._text, self._offsets, self._registry
+        )
+    
+    def _speech(self, i: int) -> OptimizedSpeech:
+        offsets, text = self._offsets, self._text
+        messages = tuple(
+            text[offsets[j]:offsets[j + 1]] for j in range(int(self._starts[i]), int(self._ends[i]))
+        )
+        data = self._registry.table[self._codes[i]]
+        return OptimizedSpeech._from_data(_drone_id(int(self._drone_ids[i])), data, messages)
+    
+    def to_speeches(self) -> List[OptimizedSpeech]:
+        """
+        Convert all speeches to OptimizedSpeech.
+        """
+        return list(self)
+    
+    def mask(
+            self, status_codes: Iterable[str] = None, code_range: Tuple[str, str] = None,
+            drone_ids: Iterable[str] = None
+    ) -> np.ndarray:
+        """
+        Get boolean mask of speeches which match all of given conditions.
+        
+        :param status_codes: Status codes to match. (e.g. ['050', '052'])
+        :param code_range: Range of status codes including both ends. (e.g. ('100', '199'))
+        :param drone_ids: Drone IDs to match.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if status_codes is not None:
+            mask &= np.isin(self._codes, [int(code) for code in status_codes])
+        if code_range is not None:
+            low, high = int(code_range[0]), int(code_range[1])
+            mask &= (self._codes >= low) & (self._codes <= high)
+        if drone_ids is not None:
+            mask &= np.isin(self._drone_ids, [int(drone_id) for drone_id in drone_ids])
+        return mask
+    
+    def filter(
+            self, status_codes: Iterable[str] = None, code_range: Tuple[str, str] = None,
+            drone_ids: Iterable[str] = None
+    ) -> 'SpeechBatch':
+        """
+        Get speeches which match all of given conditions. (See `mask`.)
+        """
+        return self[self.mask(status_codes, code_range, drone_ids)]
+    
+    def group_counts(self, by: Union[str, Tuple[str, ...]] = 'status_code') \
+            -> Dict[Union[str, Tuple[str, ...]], int]:
+        """
+        Count speeches for each value.
+        
+        :param by: 'status_code', 'drone_id', or a tuple of them.
+        :return: {value: count} in order of value. Keys are tuples if `by` is a tuple.
+        """
+        keys = (by,) if isinstance(by, str) else tuple(by)
+        for key in keys:
+            if key not in _KEYS:
+                raise ValueError(f'by must be {_KEYS[0]!r}, {_KEYS[1]!r} or a tuple of them.')
+        columns = [self._codes if key == 'status_code' else self._drone_ids for key in keys]
+        
+        # Combine columns into one integer key. (Both are less than 10000.)
+        combined = np.zeros(len(self), dtype=np.int64)
+        for column in columns:
+            combined = combined * 10000 + column
+        values, counts = np.unique(combined, return_counts=True)
+        
+        parts = []
+        for key in reversed(keys):
+            values, part = np.divmod(values, 10000)
+            labels = _labels(key)
+            parts.append([labels[v] for v in part.tolist()])
+        parts.reverse()
+        names = parts[0] if isinstance(by, str) else zip(*parts)
+        return dict(zip(names, counts.tolist()))
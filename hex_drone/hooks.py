@@ -0,0 +1,175 @@
+"""
+Hooks invoked before and after the registered functions of ResponsePattern.
+"""
+
+from .optimized_speech import OptimizedSpeech
+from .request_event import RequestEvent
+from itertools import count
+from threading import Lock
+from time import perf_counter
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+
+class Hook:
+    """
+    Base class of hooks.
+    `before` of each hook is invoked in order before the registered function,
+    and `after` is invoked in reverse order after that.
+    Both are invoked with the request given to the pattern (`raw`), the parsed speech (None for ON_INVALID),
+    the resolved event and the name of the registered function (None if nothing is registered).
+    """
+    
+    # Returned by `before` to invoke the next hook and the registered function.
+    PROCEED = object()
+    
+    def before(
+            self, raw: Union[str, OptimizedSpeech], speech: Optional[OptimizedSpeech],
+            event: RequestEvent, handler: Optional[str]
+    ) -> Any:
+        """
+        Invoked before the registered function.
+        
+        :return: `Hook.PROCEED`, or the response to skip later hooks and the registered function.
+        """
+        return self.PROCEED
+    
+    def after(
+            self, raw: Union[str, OptimizedSpeech], speech: Optional[OptimizedSpeech],
+            event: RequestEvent, handler: Optional[str], result: Any
+    ) -> Any:
+        """
+        Invoked after the registered function, only if `before` of this hook has been invoked.
+        It is also invoked with None if a later hook or the registered function raised an exception
+        which is not handled by `ON_ERROR`. (e.g. `before` of a later hook raised it.)
+        
+        :param result: Return from the registered function, or the response returned by `before`.
+        :return: The response. (`result` as is, or the replaced one.)
+        """
+        return result
+
+
+def _run_before(hooks: Sequence[Hook], raw, speech, event, handler) -> Tuple[Any, int]:
+    # Return the result of hooks and the number of invoked hooks.
+    # If a hook raises an exception, hooks invoked before it are unwound.
+    proceed = Hook.PROCEED
+    for i, hook in enumerate(hooks):
+        try:
+            result = hook.before(raw, speech, event, handler)
+        except BaseException:
+            _unwind(hooks, i, raw, speech, event, handler)
+            raise
+        if result is not proceed:
+            return result, i + 1
+    return proceed, len(hooks)
+
+
+def _run_after(hooks: Sequence[Hook], invoked: int, raw, speech, event, handler, result) -> Any:
+    # If a hook raises an exception, the rest of hooks are unwound.
+    for i in range(invoked - 1, -1, -1):
+        try:
+            result = hooks[i].after(raw, speech, event, handler, result)
+        except BaseException:
+            _unwind(hooks, i, raw, speech, event, handler)
+            raise
+    return result
+
+
+def _unwind(hooks: Sequence[Hook], invoked: int, raw, speech, event, handler):
+    # Invoke `after` of invoked hooks with None when the request failed, so each `before` is paired with `after`.
+    # Exceptions raised in them are ignored, because the exception of the failure is raised.
+    for i in range(invoked - 1, -1, -1):
+        try:
+            hooks[i].after(raw, speech, event, handler, None)
+        except BaseException:
+            pass
+
+
+class ProfileStats(NamedTuple):
+    handler: str
+    count: int
+    total: float
+    mean: float
+    max: float
+
+
+class SamplingProfiler(Hook):
+    """
+    Hook to measure elapsed time of every n-th request and report the slowest handlers.
+    Events without the registered function are reported by the name of the event.
+    """
+    
+    def __init__(self, interval: int = 100):
+        """
+        :param interval: Measure one request per `interval` requests.
+        """
+        if interval < 1:
+            raise ValueError('interval must be 1 or more.')
+        self._interval = interval
+        self._counter = count()
+        self._lock = Lock()
+        self._stats: Dict[str, List[float]] = {}  # handler: [count, total, max]
+        # Start times of sampled requests in progress, keyed on the request given to the pattern.
+        # `after` may be invoked in other thread than `before` (e.g. for offloaded functions),
+        # and the request is the same object in both of them.
+        # Start times of the same object in progress (e.g. duplicated requests of a batch) are stacked.
+        self._starts: Dict[int, List[float]] = {}
+    
+    def before(self, raw, speech, event, handler):
+        if next(self._counter) % self._interval == 0:
+            start = perf_counter()
+            with self._lock:
+                starts = self._starts.get(id(raw))
+                if starts is None:
+                    self._starts[id(raw)] = [start]
+                else:
+                    starts.append(start)
+        return self.PROCEED
+    
+    def after(self, raw, speech, event, handler, result):
+        if not self._starts:
+            return result  # Nothing is sampled.
+        with self._lock:
+            starts = self._starts.get(id(raw))
+            if starts is None:
+                return result
+            start = starts.pop()
+            if not starts:
+                del self._starts[id(raw)]
+        self._record(str(event) if handler is None else handler, perf_counter() - start)
+        return result
+    
+    def _record(self, handler: str, seconds: float):
+        with self._lock:
+            stats = self._stats.get(handler)
+            if stats is None:
+                self._stats[handler] = [1, seconds, seconds]
+            else:
+                stats[0] += 1
+                stats[1] += seconds
+                if stats[2] < seconds:
+                    stats[2] = seconds
+    
+    def report(self, limit: Optional[int] = 10) -> List[ProfileStats]:
+        """
+        Get the slowest handlers in descending order of mean elapsed seconds.
+        
+        :param limit: Maximum number of handlers. (All if None.)
+        """
+        with self._lock:
+            stats = [
+                ProfileStats(handler, n, total, total / n, maximum)
+                for handler, (n, total, maximum) in self._stats.items()
+            ]
+        stats.sort(key=lambda v: v.mean, reverse=True)
+        return stats if limit is None else stats[:limit]
+    
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+    
+    def __getstate__(self):
+        # Pickled without values. (e.g. for the process pool.)
+        return {'interval': self._interval}
+    
+    def __setstate__(self, state):
+        self.__init__(state['interval'])
@@ -0,0 +1,333 @@
+"""
+Parse large chat log files in parallel processes. Each line of the file is a request.
+The file is split into chunks at line boundaries, and each process reads and parses its own chunks.
+Results are sent back once per chunk in compact forms (binary frames, counts or columns), not per speech.
+`iter_parse` streams a file or a pipe in this process in constant memory instead.
+
+$ python -m hex_drone.ingest chat.log --workers 8
+$ python -m hex_drone.ingest chat.log --output speeches.bin
+"""
+
+import json
+import mmap
+import os
+import stat
+import sys
+from argparse import ArgumentParser
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from io import TextIOBase, UnsupportedOperation
+from itertools import islice, repeat
+from .optimized_speech import OptimizedSpeech, _encode, _parse, _tokenize, _CODE_START, _CODE_END
+from .status_codes import status_codes, StatusCodeRegistry
+from .wire import decode_frames
+from typing import BinaryIO, Callable, Collection, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+DEFAULT_CHUNK_SIZE = 16 * 2 ** 20
+DEFAULT_READ_SIZE = 2 ** 20
+
+
+class IngestStats(NamedTuple):
+    lines: int
+    invalid: int
+    status_codes: Dict[str, int]  # Number of speeches of each status code.
+
+
+class FrameChunk(NamedTuple):
+    frames: bytes  # Concatenated frames of valid speeches. (See `wire.decode_frames`.)
+    lines: int
+    invalid: int
+
+
+def split_ranges(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[Tuple[int, int]]:
+    """
+    Split the file into byte ranges which end at line boundaries.
+    
+    :param chunk_size: Approximate bytes of each range. A range is extended to the end of the line.
+    :return: [(start, end), ...] in order, which cover the whole file.
+    """
+    if chunk_size < 1:
+        raise ValueError('chunk_size must be positive.')
+    size = os.path.getsize(path)
+    ranges = []
+    start = 0
+    with open(path, 'rb') as f:
+        while start < size:
+            end = start + chunk_size
+            if end < size:
+                f.seek(end - 1)
+                f.readline()  # Up to the newline at or after `end - 1`.
+                end = f.tell()
+            else:
+                end = size
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def _read_lines(path: str, start: int, end: int) -> List[str]:
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return _split_lines(data.decode('utf-8', errors='replace'))
+
+
+def _split_lines(text: str) -> List[str]:
+    # Lines are split only by '\n', because messages may contain other line separators. (e.g. U+2028)
+    lines = text.split('\n')
+    if not lines[-1]:
+        lines.pop()
+    if '\r' in text:
+        # A trailing '\r' of CRLF is stripped as same as `serve`.
+        lines = [line[:-1] if line.endswith('\r') else line for line in lines]
+    return lines
+
+
+def _count_range(path: str, start: int, end: int, registry: Optional[StatusCodeRegistry]) -> IngestStats:
+    get_data = (status_codes if registry is None else registry).get
+    lines = _read_lines(path, start, end)
+    counter = Counter()
+    for line in lines:
+        result = _tokenize(line, get_data)
+        if result is not None:
+            counter[result[1].status_code] += 1
+    return IngestStats(len(lines), len(lines) - sum(counter.values()), dict(counter))
+
+
+def _frame_range(path: str, start: int, end: int, registry: Optional[StatusCodeRegistry]) -> FrameChunk:
+    get_data = (status_codes if registry is None else registry).get
+    lines = _read_lines(path, start, end)
+    frames = []
+    for line in lines:
+        result = _tokenize(line, get_data)
+        if result is not None:
+            frames.append(_encode(OptimizedSpeech._from_data(*result), get_data))
+    return FrameChunk(b''.join(frames), len(lines), len(lines) - len(frames))
+
+
+def _batch_range(path: str, start: int, end: int, registry: Optional[StatusCodeRegistry]):
+    from .batch import SpeechBatch
+    return SpeechBatch.from_lines(_read_lines(path, start, end), registry)
+
+
+def _map_ranges(
+        func: Callable, path: str, workers: Optional[int], chunk_size: int,
+        registry: Optional[StatusCodeRegistry]
+) -> Iterator:
+    # Yield results of chunks in order. Only a few chunks per worker are in flight to bound memory.
+    ranges = split_ranges(path, chunk_size)
+    if workers == 1 or len(ranges) <= 1:
+        for start, end in ranges:
+            yield func(path, start, end, registry)
+        return
+    
+    workers = os.cpu_count() or 1 if workers is None else workers
+    executor = ProcessPoolExecutor(workers)
+    try:
+        remaining = iter(ranges)
+        in_flight = deque(
+            executor.submit(func, path, start, end, registry) for start, end in islice(remaining, workers * 2)
+        )
+        while in_flight:
+            result = in_flight.popleft().result()
+            for start, end in islice(remaining, 1):
+                in_flight.append(executor.submit(func, path, start, end, registry))
+            yield result
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def count(
+        path: str, workers: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+        registry: StatusCodeRegistry = None
+) -> IngestStats:
+    """
+    Count lines, invalid lines and speeches of each status code in the file.
+    
+    :param workers: Number of processes. (Number of CPUs if None. Parsed in this process if 1.)
+    :param chunk_size: Approximate bytes of each chunk.
+    :param registry: Status codes to accept. (`status_codes` if None.)
+    """
+    lines, invalid = 0, 0
+    counter = Counter()
+    for stats in _map_ranges(_count_range, path, workers, chunk_size, registry):
+        lines += stats.lines
+        invalid += stats.invalid
+        counter.update(stats.status_codes)
+    return IngestStats(lines, invalid, dict(sorted(counter.items())))
+
+
+def iter_frames(
+        path: str, workers: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+        registry: StatusCodeRegistry = None
+) -> Iterator[FrameChunk]:
+    """
+    Parse the file and yield binary frames of valid speeches chunk by chunk in order of lines.
+    Frames can be written to a file or a socket as they are. (See `count` for parameters.)
+    """
+    return _map_ranges(_frame_range, path, workers, chunk_size, registry)
+
+
+def iter_speeches(
+        path: str, workers: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+        registry: StatusCodeRegistry = None
+) -> Iterator[OptimizedSpeech]:
+    """
+    Parse the file and yield valid speeches in order of lines. Invalid lines are skipped.
+    (See `count` for parameters.)
+    """
+    for chunk in iter_frames(path, workers, chunk_size, registry):
+        yield from decode_frames(chunk.frames, registry)[0]
+
+
+def iter_batches(
+        path: str, workers: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+        registry: StatusCodeRegistry = None
+) -> Iterator['SpeechBatch']:
+    """
+    Parse the file and yield SpeechBatch chunk by chunk in order of lines. It requires NumPy.
+    (See `count` for parameters.)
+    """
+    return _map_ranges(_batch_range, path, workers, chunk_size, registry)
+
+
+def iter_parse(
+        source: Union[str, os.PathLike, BinaryIO], codes: Collection[str] = None, drone_ids: Collection[str] = None,
+        read_size: int = DEFAULT_READ_SIZE, registry: StatusCodeRegistry = None
+) -> Iterator[Tuple[int, Optional[OptimizedSpeech]]]:
+    """
+    Parse lines of a file lazily in this process, and yield (line number from 1, speech or None if invalid).
+    Regular files are memory-mapped, and other files (e.g. pipes and sockets) are read by `read_size` bytes.
+    Mapped pages are released after they are parsed, so memory usage does not grow with the size of the file.
+    With `codes` or `drone_ids`, lines are checked by their headers first. Lines of other status codes or drones,
+    and invalid lines whose headers do not match, are skipped without being parsed.
+    
+    :param source: Path, or a file object opened in binary mode. (Text mode is also accepted.)
+    :param codes: Status codes to yield. (All if None.)
+    :param drone_ids: Drone IDs to yield. (All if None.)
+    :param read_size: Approximate bytes to decode at once.
+    :param registry: Status codes to accept. (`status_codes` if None.)
+    """
+    if read_size < 1:
+        raise ValueError('read_size must be positive.')
+    if isinstance(source, (str, bytes, os.PathLike)):
+        with open(source, 'rb') as f:
+            yield from _iter_parse(f, codes, drone_ids, read_size, registry)
+    else:
+        yield from _iter_parse(source, codes, drone_ids, read_size, registry)
+
+
+def _iter_parse(
+        f, codes: Optional[Collection[str]], drone_ids: Optional[Collection[str]], read_size: int,
+        registry: Optional[StatusCodeRegistry]
+) -> Iterator[Tuple[int, Optional[OptimizedSpeech]]]:
+    get_data = (status_codes if registry is None else registry).get
+    codes = None if codes is None else frozenset(codes)
+    drone_ids = None if drone_ids is None else frozenset(drone_ids)
+    number = 0
+    for chunk in _iter_chunks(f, read_size):
+        lines = _split_lines(chunk if isinstance(chunk, str) else chunk.decode('utf-8', errors='replace'))
+        if codes is None and drone_ids is None:
+            yield from zip(range(number + 1, number + len(lines) + 1), map(_parse, lines, repeat(get_data)))
+            number += len(lines)
+            continue
+        
+        for line in lines:
+            number += 1
+            if codes is not None and line[_CODE_START:_CODE_END] not in codes:
+                continue
+            if drone_ids is not None and line[:4] not in drone_ids:
+                continue
+            yield number, _parse(line, get_data)
+
+
+def _iter_chunks(f, read_size: int) -> Iterator[Union[bytes, str]]:
+    # Yield chunks of whole lines. Only the last chunk may not end with a newline.
+    m = _map_file(f)
+    if m is None:
+        yield from _read_chunks(f, read_size)
+        return
+    
+    with m:
+        start, size = f.tell(), len(m)
+        released = start - start % mmap.PAGESIZE
+        release = getattr(m, 'madvise', None) if hasattr(mmap, 'MADV_DONTNEED') else None
+        if release is not None:
+            release(mmap.MADV_SEQUENTIAL)
+        while start < size:
+            end = m.find(b'\n', min(start + read_size, size) - 1)
+            end = size if end < 0 else end + 1
+            yield m[start:end]  # Copied, so mapped pages can be released.
+            start = end
+            if release is not None and end - released >= read_size:
+                aligned = end - end % mmap.PAGESIZE
+                release(mmap.MADV_DONTNEED, released, aligned - released)
+                released = aligned
+        f.seek(size)
+
+
+def _map_file(f) -> Optional[mmap.mmap]:
+    # Map a non-empty regular file opened in binary mode, or return None to read it.
+    if isinstance(f, TextIOBase):
+        return None
+    try:
+        fileno = f.fileno()
+        st = os.fstat(fileno)
+        if not stat.S_ISREG(st.st_mode) or st.st_size <= f.tell():
+            return None  # mmap can not map an empty file.
+        return mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+    except (AttributeError, OSError, UnsupportedOperation, ValueError):
+        return None  # e.g. BytesIO, or a file system which does not support mmap.
+
+
+def _read_chunks(f, read_size: int) -> Iterator[Union[bytes, str]]:
+    newline = '\n' if isinstance(f, TextIOBase) else b'\n'
+    head = []  # Parts of an incomplete line.
+    while True:
+        data = f.read(read_size)
+        if not data:
+            break
+        end = data.rfind(newline)
+        if end < 0:
+            head.append(data)
+            continue
+        if head:
+            head.append(data[:end + 1])
+            yield data[:0].join(head)
+            head.clear()
+        else:
+            yield data[:end + 1]
+        if end + 1 < len(data):
+            head.append(data[end + 1:])
+    if head:
+        yield head[0][:0].join(head)
+
+
+def _main(argv: List[str] = None):
+    parser = ArgumentParser(prog='python -m hex_drone.ingest', description='Parse a chat log file in parallel.')
+    parser.add_argument('path', help='Chat log file. Each line is a speech.')
+    parser.add_argument('--workers', type=int, help='Number of processes. (Number of CPUs by default.)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Approximate bytes of each chunk.')
+    parser.add_argument('--codes', help='JSON file of additional status codes. (See `StatusCodeRegistry.load`.)')
+    parser.add_argument('--output', help='File to write binary frames of valid speeches.')
+    args = parser.parse_args(argv)
+    
+    registry = None if args.codes is None else status_codes.load(args.codes)
+    if args.output is None:
+        stats = count(args.path, args.workers, args.chunk_size, registry)
+        json.dump(stats._asdict(), sys.stdout, indent=2)
+        print()
+        return
+    
+    lines, invalid = 0, 0
+    with open(args.output, 'wb') as f:
+        for chunk in iter_frames(args.path, args.workers, args.chunk_size, registry):
+            f.write(chunk.frames)
+            lines += chunk.lines
+            invalid += chunk.invalid
+    json.dump({'lines': lines, 'invalid': invalid}, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == '__main__':
+    _main()
@@ -1,4 +1,4 @@
-from logging import getLogger, NullHandler, DEBUG, Handler
+from logging import getLogger, NullHandler, DEBUG, Handler, Logger
 from typing import Union
 
 
@@ -10,3 +10,21 @@ def get_logger(name, handler: Handler = None, level: Union[int, str] = DEBUG):
     logger.addHandler(handler)
     logger.propagate = False
     return logger
+
+
+def is_debug_enabled(logger: Logger) -> bool:
+    """
+    Check debug records of the logger reach to a handler which is not NullHandler.
+    """
+    if not logger.isEnabledFor(DEBUG):
+        return False
+    
+    current = logger
+    while current is not None:
+        for handler in current.handlers:
+            if not isinstance(handler, NullHandler) and handler.level <= DEBUG:
+                return True
+        if not current.propagate:
+            break
+        current = current.parent
+    return False
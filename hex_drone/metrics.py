@@ -0,0 +1,182 @@
+"""
+Counters and latency histograms of ResponsePattern.
+"""
+
+import json
+import os
+from bisect import bisect_left
+from threading import Lock, local
+from typing import Dict, List, Optional, Sequence
+
+# Upper bounds of latency buckets in seconds. The last bucket (+Inf) is implicit.
+DEFAULT_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+
+
+class _Histogram:
+    __slots__ = ('counts', 'sum')
+    
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.sum = 0.0
+
+
+class _Shard:
+    """
+    Counters written by only one thread, so no lock is needed.
+    """
+    
+    __slots__ = ('buckets', 'events', 'status_codes', 'histograms')
+    
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.events: Dict[str, int] = {}
+        self.status_codes: Dict[str, int] = {}
+        self.histograms: Dict[str, _Histogram] = {}
+    
+    def count(self, event: str, status_code: Optional[str] = None):
+        events = self.events
+        events[event] = events.get(event, 0) + 1
+        if status_code is not None:
+            codes = self.status_codes
+            codes[status_code] = codes.get(status_code, 0) + 1
+    
+    def observe(self, handler: str, seconds: float):
+        histogram = self.histograms.get(handler)
+        if histogram is None:
+            histogram = self.histograms[handler] = _Histogram(len(self.buckets) + 1)
+        histogram.counts[bisect_left(self.buckets, seconds)] += 1
+        histogram.sum += seconds
+
+
+class Metrics:
+    """
+    Counters per event and per status code, and latency histograms per handler.
+    Each thread writes its own counters, and they are summed up by `snapshot`.
+    """
+    
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        :param buckets: Upper bounds of latency buckets in seconds.
+        """
+        self._buckets = tuple(sorted(buckets))
+        self._lock = Lock()
+        self._local = local()
+        self._shards: List[_Shard] = []
+    
+    def shard(self) -> _Shard:
+        """
+        Get counters of the current thread.
+        """
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = _Shard(self._buckets)
+            with self._lock:
+                self._shards.append(shard)
+            return shard
+    
+    def snapshot(self) -> dict:
+        """
+        Get current values.
+        
+        :return: {'events': {event: count}, 'status_codes': {status_code: count},
+                  'latency': {handler: {'buckets': [[upper bound, cumulative count], ...], 'count': n, 'sum': seconds}}}
+        """
+        with self._lock:
+            shards = list(self._shards)
+        
+        events: Dict[str, int] = {}
+        status_codes: Dict[str, int] = {}
+        histograms: Dict[str, _Histogram] = {}
+        size = len(self._buckets) + 1
+        for shard in shards:
+            for key, value in list(shard.events.items()):
+                events[key] = events.get(key, 0) + value
+            for key, value in list(shard.status_codes.items()):
+                status_codes[key] = status_codes.get(key, 0) + value
+            for key, value in list(shard.histograms.items()):
+                total = histograms.setdefault(key, _Histogram(size))
+                total.counts = [a + b for a, b in zip(total.counts, value.counts)]
+                total.sum += value.sum
+        
+        latency = {}
+        for handler, histogram in sorted(histograms.items()):
+            cumulative, buckets = 0, []
+            for bound, count in zip([*self._buckets, float('inf')], histogram.counts):
+                cumulative += count
+                buckets.append([bound, cumulative])
+            latency[handler] = {'buckets': buckets, 'count': cumulative, 'sum': histogram.sum}
+        
+        return {
+            'events': dict(sorted(events.items())),
+            'status_codes': dict(sorted(status_codes.items())),
+            'latency': latency,
+        }
+    
+    def reset(self):
+        """
+        Reset all values.
+        Values written by other threads at the same time may be lost.
+        """
+        with self._lock:
+            self._local = local()
+            self._shards = []
+    
+    def to_json(self) -> str:
+        snapshot = self.snapshot()
+        for value in snapshot['latency'].values():
+            value['buckets'][-1][0] = '+Inf'
+        return json.dumps(snapshot, indent=2)
+    
+    def to_prometheus(self, prefix: str = 'hex_drone') -> str:
+        """
+        Get values in Prometheus text format.
+        
+        :param prefix: Prefix of metric names.
+        """
+        snapshot = self.snapshot()
+        lines = [f'# TYPE {prefix}_requests_total counter']
+        for event, count in snapshot['events'].items():
+            lines.append(f'{prefix}_requests_total{{event="{event}"}} {count}')
+        
+        lines.append(f'# TYPE {prefix}_status_code_requests_total counter')
+        for status_code, count in snapshot['status_codes'].items():
+            lines.append(f'{prefix}_status_code_requests_total{{status_code="{status_code}"}} {count}')
+        
+        lines.append(f'# TYPE {prefix}_handler_seconds histogram')
+        for handler, value in snapshot['latency'].items():
+            for bound, count in value['buckets']:
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{prefix}_handler_seconds_bucket{{handler="{handler}",le="{le}"}} {count}')
+            lines.append(f'{prefix}_handler_seconds_sum{{handler="{handler}"}} {value["sum"]!r}')
+            lines.append(f'{prefix}_handler_seconds_count{{handler="{handler}"}} {value["count"]}')
+        return '\n'.join(lines) + '\n'
+    
+    def export(self, path: str, output_format: str = 'prometheus'):
+        """
+        Write values to the file. The file is replaced atomically.
+        
+        :param path: Path to the file.
+        :param output_format: 'prometheus' or 'json'.
+        """
+        if output_format == 'prometheus':
+            text = self.to_prometheus()
+        elif output_format == 'json':
+            text = self.to_json()
+        else:
+            raise ValueError("output_format must be 'prometheus' or 'json'.")
+        
+        temp = f'{path}.tmp'
+        with open(temp, 'w') as f:
+            f.write(text)
+        os.replace(temp, path)
+    
+    def __getstate__(self):
+        # Pickled without values. (e.g. for the process pool.)
+        return {'buckets': self._buckets}
+    
+    def __setstate__(self, state):
+        self.__init__(state['buckets'])
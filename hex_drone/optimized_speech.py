@@ -2,16 +2,25 @@
 ⬡-Drone's speech which limited to the status codes by 'Speech Optimization'.
 """
 
-import re
-from .status_codes import status_codes
-from typing import Optional, Sequence
+from .status_codes import status_codes, StatusCodeData, StatusCodeRegistry, CODE_COUNT as _CODE_COUNT
+from .templates import templates
+from struct import Struct, error as StructError, pack, unpack_from
+from typing import Optional, Sequence, Iterable, Dict, List, Tuple, Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .parse_cache import ParseCache
 
 
 class OptimizedSpeech:
     """
     A speech which limited to the status code.
+    It is immutable, so it can be shared and used as a key of dict.
     """
     
+    # Status code data is shared with `status_codes` unless messages differ from it.
+    # Speeches built from a template keep it to render str or bytes lazily.
+    __slots__ = ('_drone_id', '_data', '_messages', '_str', '_template')
+    
     def __init__(
             self,
             drone_id: str, status_code: str, status_message: str,
@@ -26,86 +35,493 @@ class OptimizedSpeech:
         :param predefined_message: A message describing the status code.
         :param user_defined_messages: Massages defined by user.
         """
-        self.drone_id = drone_id
-        self.status_code = status_code
-        self.status_message = status_message
-        self.predefined_message = predefined_message
-        self.user_defined_messages = list(user_defined_messages)
+        data = status_codes.get(status_code)
+        if data is None or \
+                data.status_message != status_message or data.predefined_message != predefined_message:
+            data = StatusCodeData(status_code, status_message, predefined_message)
+        
+        self._drone_id = drone_id
+        self._data = data
+        self._messages = tuple(user_defined_messages)
+        self._str = None
+        self._template = None
+    
+    @classmethod
+    def _from_data(cls, drone_id: str, data: StatusCodeData, user_defined_messages: Tuple[str, ...]):
+        # Skip looking up status code data again.
+        speech = cls.__new__(cls)
+        speech._drone_id = drone_id
+        speech._data = data
+        speech._messages = user_defined_messages
+        speech._str = None
+        speech._template = None
+        return speech
+    
+    @property
+    def drone_id(self) -> str:
+        return self._drone_id
+    
+    @property
+    def status_code(self) -> str:
+        return self._data.status_code
+    
+    @property
+    def status_message(self) -> str:
+        return self._data.status_message
+    
+    @property
+    def predefined_message(self) -> Optional[str]:
+        return self._data.predefined_message
+    
+    @property
+    def user_defined_messages(self) -> Tuple[str, ...]:
+        return self._messages
     
     def __str__(self):
-        v = [
-            self.drone_id, f'Code {self.status_code}', self.status_message,
-            self.predefined_message, *self.user_defined_messages
-        ]
-        v = list(filter(lambda x: x is not None, v))
-        return ' :: '.join(v)
+        if self._str is None:
+            if self._template is not None:
+                self._str = self._template.render(*self._messages)
+                return self._str
+            data = self._data
+            v = [self._drone_id, 'Code ' + data.status_code, data.status_message]
+            if data.predefined_message is not None:
+                v.append(data.predefined_message)
+            v.extend(self._messages)
+            self._str = ' :: '.join(v)
+        return self._str
+    
+    def __bytes__(self):
+        if self._str is not None:
+            return self._str.encode('utf-8')
+        
+        # Prerendered prefix is used if the speech is built from the template or the template is cached.
+        template = self._template
+        if template is not None:
+            messages = self._messages
+            if not messages:
+                return template.text_bytes
+            return template.prefix_bytes + _SEPARATOR.join(messages).encode('utf-8')
+        data = self._data
+        template = templates.find(self._drone_id, data.status_code)
+        if template is not None and template.data is data:
+            return template.render_bytes(*self._messages)
+        return str(self).encode('utf-8')
     
     def __repr__(self):
         v = [
             self.drone_id, self.status_code, self.status_message,
             self.predefined_message, self.user_defined_messages
         ]
-        v = list(map(lambda x: repr(x), v))
-        v = ', '.join(v)
+        v = ', '.join(map(repr, v))
         return f"OptimizedSpeech({v})"
     
     def __eq__(self, other):
         if not isinstance(other, OptimizedSpeech):
-            return None
-        return \
-            self.drone_id == other.drone_id and \
-            self.status_code == other.status_code and \
-            self.status_message == other.status_message and \
-            self.predefined_message == other.predefined_message and \
-            self.user_defined_messages == other.user_defined_messages
+            return NotImplemented
+        if self._data is not other._data:
+            a, b = self._data, other._data
+            if a.status_code != b.status_code or \
+                    a.status_message != b.status_message or a.predefined_message != b.predefined_message:
+                return False
+        return self._drone_id == other._drone_id and self._messages == other._messages
+    
+    def __hash__(self):
+        data = self._data
+        return hash((
+            self._drone_id, data.status_code, data.status_message,
+            data.predefined_message, self._messages
+        ))
+    
+    def __reduce__(self):
+        # Status code data is restored from `status_codes` instead of being pickled.
+        data = self._data
+        if status_codes.get(data.status_code) is data:
+            return _unpickle, (self._drone_id, data.status_code, self._messages)
+        return OptimizedSpeech, (
+            self._drone_id, data.status_code, data.status_message,
+            data.predefined_message, self._messages
+        )
+    
+    def to_bytes(self, registry: StatusCodeRegistry = None) -> bytes:
+        """
+        Encode to a binary frame. Status message and predefined message are omitted if they are same as the registry.
+        Note that `bytes(speech)` is the UTF-8 text, not the binary frame.
+        
+        :param registry: Status codes shared with the decoder. (`status_codes` if None.)
+        """
+        return _encode(self, status_codes.get if registry is None else registry.get)
+    
+    @classmethod
+    def from_bytes(cls, data: Union[bytes, bytearray, memoryview], registry: StatusCodeRegistry = None):
+        """
+        Decode a binary frame encoded by `to_bytes`.
+        
+        :param data: A whole frame.
+        :param registry: Status codes shared with the encoder. (`status_codes` if None.)
+        :return: Raise ValueError if the frame is invalid.
+        """
+        view = data if isinstance(data, bytes) else memoryview(data)
+        speech, end = _decode(view, 0, (status_codes if registry is None else registry).table)
+        if end != len(view):
+            raise ValueError('Frame has trailing bytes.')
+        return speech
     
     @classmethod
-    def parse(cls, speech: str):
+    def parse(cls, speech: str, cache: 'ParseCache' = None, registry: StatusCodeRegistry = None):
         """
         Parse str to OptimizedSpeech.
         
         :param speech: Speech to parse.
+        :param cache: Cache of parsed speeches. (Optional)
+        :param registry: Status codes to accept. (`status_codes` if None. Ignored if cache is given.)
         :return: Return None if speech is invalid.
         """
-        tokens = speech.split(' :: ')
-        if len(tokens) < 2:
-            return None  # Too few tokens.
-
-        drone_id = tokens.pop(0)
-        if not re.match(r'^\d{4}$', drone_id):
-            return None  # Drone ID's format is invalid.
+        if cache is not None:
+            return cache.parse(speech)
+        if registry is not None:
+            return _parse(speech, registry.get)
+        return _parse(speech)
+    
+    @classmethod
+    def view(cls, speech: str, registry: StatusCodeRegistry = None) -> Optional['SpeechView']:
+        """
+        Check only the header of str and get a lazy view of it.
+        User defined messages are split when they are accessed first. (See `SpeechView`.)
         
-        match = re.match(r'^Code (?P<CODE>\d{3})$', tokens.pop(0))
-        if match is None:
-            return None  # Status code's format is invalid.
-        status_code = match.group('CODE')
-        data = status_codes.get(status_code, None)
-        if data is None:
-            return None  # Status code is invalid.
+        :param speech: Speech to parse.
+        :param registry: Status codes to accept. (`status_codes` if None.)
+        :return: Return None if speech is invalid. (Same as `parse`.)
+        """
+        if registry is not None:
+            return _view(speech, registry.get)
+        return _view(speech)
+    
+    @classmethod
+    def parse_many(
+            cls, speeches: Iterable[str], invalid_only: bool = False, cache: 'ParseCache' = None,
+            registry: StatusCodeRegistry = None
+    ) -> Union[List[Optional['OptimizedSpeech']], List[int]]:
+        """
+        Parse sequence of str to OptimizedSpeech in one pass.
+        Each result is same as the result of `parse`.
         
-        while len(tokens) > 0 and tokens[0] in [data.status_message, data.predefined_message]:
-            tokens.pop(0)  # Remaining tokens are drone-defined string.
-            
-        return OptimizedSpeech(
-            drone_id, status_code, data.status_message,
-            data.predefined_message, tokens
-        )
+        :param speeches: Speeches to parse.
+        :param invalid_only: Return only indices of invalid speeches if True.
+        :param cache: Cache of parsed speeches. (Optional)
+        :param registry: Status codes to accept. (`status_codes` if None. Ignored if cache is given.)
+        :return: Return parsed speeches in order. (None for invalid speech.)
+        """
+        get_data = status_codes.get if registry is None else registry.get
+        if invalid_only:
+            tokenize = _tokenize
+            return [i for i, speech in enumerate(speeches) if tokenize(speech, get_data) is None]
+        
+        if cache is not None:
+            parse = cache.parse
+            return [parse(speech) for speech in speeches]
+        parse = _parse
+        return [parse(speech, get_data) for speech in speeches]
     
     @classmethod
-    def build(cls, drone_id: str, status_code: str, *user_defined_messages: str):
+    def build(cls, drone_id: str, status_code: str, *user_defined_messages: str, registry: StatusCodeRegistry = None):
         """
         Build OptimizedSpeech.
         
         :param drone_id: 4 digit of ⬡-Drone ID.
         :param status_code: 3 digit of ⬡-Drone status code.
         :param user_defined_messages: Massages defined by user.
+        :param registry: Status codes to use. (`status_codes` if None.)
         :return: Return None if no such status code exists.
         """
-        data = status_codes.get(status_code)
-        if data is None:
+        if registry is not None:
+            data = registry.get(status_code)
+            if data is None:
+                return None
+            if data is not status_codes.get(status_code):
+                return OptimizedSpeech._from_data(drone_id, data, user_defined_messages)
+        
+        template = templates.get(drone_id, status_code)
+        if template is None:
             return None
         
-        return OptimizedSpeech(
-            drone_id, status_code, data.status_message,
-            data.predefined_message, user_defined_messages
-        )
+        # It is rendered by the template when str or bytes is needed.
+        speech = OptimizedSpeech._from_data(drone_id, template.data, user_defined_messages)
+        speech._template = template
+        return speech
+
+
+_get_messages = OptimizedSpeech._messages.__get__
+_set_messages = OptimizedSpeech._messages.__set__
+
+
+class SpeechView(OptimizedSpeech):
+    """
+    OptimizedSpeech parsed only its header. (e.g. to route a request by its status code.)
+    User defined messages are split from the raw text when they are accessed first,
+    and it behaves same as OptimizedSpeech after that. Use `OptimizedSpeech.view` to get it.
+    """
+    
+    # Raw text and the start of its body until user defined messages are split.
+    __slots__ = ('_raw', '_body')
+    
+    def __init__(self, *args, **kwargs):
+        raise TypeError('SpeechView can not be instantiated. Use OptimizedSpeech.view or OptimizedSpeech.parse.')
+    
+    @classmethod
+    def _from_data(cls, drone_id: str, data: StatusCodeData, user_defined_messages: Tuple[str, ...]):
+        raise TypeError('SpeechView can not be instantiated. Use OptimizedSpeech.view or OptimizedSpeech.parse.')
+    
+    @property
+    def _messages(self) -> Tuple[str, ...]:
+        # Overrides the slot of OptimizedSpeech, so all methods of OptimizedSpeech split messages lazily.
+        raw = self._raw
+        if raw is not None:
+            _set_messages(self, _split(raw, self._body, self._data))
+            self._raw = None
+        return _get_messages(self)
+    
+    @property
+    def is_loaded(self) -> bool:
+        """
+        Whether user defined messages have been split.
+        """
+        return self._raw is None
+
+
+# Offsets of a header: '1234 :: Code 050'
+_HEADER_CODE = ' :: Code '
+_CODE_START = 13
+_CODE_END = 16
+_SEPARATOR = ' :: '
+
+
+def _tokenize(speech: str, get_data=status_codes.get):
+    """
+    Check the header in one pass and split the rest.
+    Invalid speech is rejected by fixed-offset characters before splitting.
+    
+    :return: Return (drone_id, data, user_defined_messages), or None if speech is invalid.
+    """
+    if speech[4:_CODE_START] != _HEADER_CODE:
+        return None  # Too short, or separators are invalid.
+    
+    data = get_data(speech[_CODE_START:_CODE_END])
+    if data is None:
+        return None  # Status code is invalid.
+    
+    drone_id = speech[:4]
+    if not drone_id.isdecimal():
+        return None  # Drone ID's format is invalid. (Same as r'\d{4}')
+    
+    end = _CODE_END
+    if speech.startswith('\n', end):
+        end += 1  # Same as '$' of r'^Code \d{3}$', a trailing newline is accepted.
+    if len(speech) == end:
+        return drone_id, data, ()
+    if not speech.startswith(_SEPARATOR, end):
+        return None  # Status code's format is invalid.
+    
+    return drone_id, data, _split(speech, end + 4, data)
+
+
+def _view(speech: str, get_data=status_codes.get) -> Optional[SpeechView]:
+    # Same checks as `_tokenize` without splitting the body.
+    if speech[4:_CODE_START] != _HEADER_CODE:
+        return None
+    
+    data = get_data(speech[_CODE_START:_CODE_END])
+    if data is None:
+        return None
+    
+    drone_id = speech[:4]
+    if not drone_id.isdecimal():
+        return None
+    
+    end = _CODE_END
+    if speech.startswith('\n', end):
+        end += 1
+    view = SpeechView.__new__(SpeechView)
+    if len(speech) == end:
+        _set_messages(view, ())
+        view._raw = None
+    elif speech.startswith(_SEPARATOR, end):
+        view._raw = speech
+        view._body = end + 4
+    else:
+        return None
+    view._drone_id = drone_id
+    view._data = data
+    view._str = None
+    view._template = None
+    return view
+
+
+def _split(speech: str, start: int, data: StatusCodeData) -> Tuple[str, ...]:
+    tokens = speech[start:].split(_SEPARATOR)
+    i, n = 0, len(tokens)
+    while i < n and tokens[i] in data.prefixes:
+        i += 1  # Short hand: status message and predefined message are optional.
+    return tuple(tokens[i:] if i else tokens)
+
+
+def _parse(speech: str, get_data=status_codes.get) -> Optional[OptimizedSpeech]:
+    result = _tokenize(speech, get_data)
+    if result is None:
+        return None
+    
+    return OptimizedSpeech._from_data(*result)
+
+
+def _unpickle(drone_id: str, status_code: str, user_defined_messages: Tuple[str, ...]) -> OptimizedSpeech:
+    return OptimizedSpeech._from_data(drone_id, status_codes[status_code], user_defined_messages)
+
+
+# Binary frame: body length, drone ID, status code, flags, number of user defined messages,
+# lengths of strings in characters, and UTF-8 of concatenated strings.
+# (Optional strings selected by flags, and then user defined messages.)
+# Strings are decoded at once, and then sliced by their lengths.
+_FRAME_HEADER = Struct('<IHHBH')
+_FRAME_HEADER_1 = Struct('<IHHBHI')  # With the length of the first string, to unpack them at once.
+_FRAME_LENGTH = 4  # Size of the body length. It is not included in the body length.
+_STRING_LENGTH = Struct('<I')
+_FLAG_DRONE_ID = 0x01  # Drone ID is a string because it is not 4 ASCII digits.
+_FLAG_DATA = 0x02  # Status code and messages are strings because they are not in the registry.
+_FLAG_NO_PREDEFINED = 0x04  # Predefined message is None. (Only with _FLAG_DATA)
+_FLAGS = _FLAG_DRONE_ID | _FLAG_DATA | _FLAG_NO_PREDEFINED
+_MAX_COUNT = 0xffff
+_DRONE_IDS: List[Optional[str]] = [None] * 10000  # Decoded drone IDs are shared.
+_DRONE_NUMBERS: Dict[str, int] = {}  # Drone IDs of 4 ASCII digits to encode.
+
+
+def _encode(speech: OptimizedSpeech, get_data) -> bytes:
+    data = speech._data
+    drone_id = speech._drone_id
+    messages = speech._messages
+    if len(messages) > _MAX_COUNT:
+        raise ValueError(f'Too many user defined messages: {len(messages)}')
+    
+    flags = 0
+    strings: List[str] = []
+    drone = _DRONE_NUMBERS.get(drone_id)
+    if drone is None:
+        if len(drone_id) == 4 and drone_id.isascii() and drone_id.isdigit():
+            drone = _DRONE_NUMBERS[drone_id] = int(drone_id)
+        else:
+            drone = 0
+            flags |= _FLAG_DRONE_ID
+            strings.append(drone_id)
+    
+    if get_data(data.status_code) is data:
+        code = data.index
+    else:
+        code = 0
+        flags |= _FLAG_DATA
+        strings.append(data.status_code)
+        strings.append(data.status_message)
+        if data.predefined_message is None:
+            flags |= _FLAG_NO_PREDEFINED
+        else:
+            strings.append(data.predefined_message)
+    
+    if strings:
+        strings.extend(messages)
+    else:
+        strings = messages
+    n = len(strings)
+    if n == 0:
+        return _FRAME_HEADER.pack(_FRAME_HEADER.size - _FRAME_LENGTH, drone, code, flags, 0)
+    if n == 1:
+        text = strings[0].encode('utf-8')
+        length = _FRAME_HEADER_1.size - _FRAME_LENGTH + len(text)
+        return _FRAME_HEADER_1.pack(length, drone, code, flags, len(messages), len(strings[0])) + text
+    
+    text = ''.join(strings).encode('utf-8')
+    length = _FRAME_HEADER.size - _FRAME_LENGTH + 4 * n + len(text)
+    return b''.join([
+        _FRAME_HEADER.pack(length, drone, code, flags, len(messages)), pack(f'<{n}I', *map(len, strings)), text
+    ])
+
+
+def _drone_id(drone: int) -> str:
+    if drone >= 10000:
+        raise ValueError(f'Drone ID {drone} is not 4 digits.')
+    drone_id = _DRONE_IDS[drone]
+    if drone_id is None:
+        drone_id = _DRONE_IDS[drone] = f'{drone:04}'
+    return drone_id
+
+
+def _decode(view: Union[bytes, memoryview], offset: int, table) -> Tuple[OptimizedSpeech, int]:
+    """
+    Decode a frame at the offset. Strings are decoded from the view without copying the frame.
+    
+    :param table: `StatusCodeRegistry.table` shared with the encoder.
+    :return: Return the speech and the offset of the next frame.
+    """
+    try:
+        if len(view) - offset >= _FRAME_HEADER_1.size:
+            length, drone, code, flags, count, first = _FRAME_HEADER_1.unpack_from(view, offset)
+        else:
+            length, drone, code, flags, count = _FRAME_HEADER.unpack_from(view, offset)
+            first = None
+    except StructError:
+        raise ValueError('Frame is incomplete.') from None
+    end = offset + _FRAME_LENGTH + length
+    if end > len(view):
+        raise ValueError('Frame is incomplete.')
+    
+    n = count
+    if flags:
+        if flags & ~_FLAGS or flags & (_FLAG_DATA | _FLAG_NO_PREDEFINED) == _FLAG_NO_PREDEFINED:
+            raise ValueError(f'Frame has unknown flags. ({flags:#04x})')
+        if flags & _FLAG_DRONE_ID:
+            n += 1
+        if flags & _FLAG_DATA:
+            n += 2 if flags & _FLAG_NO_PREDEFINED else 3
+    
+    start = offset + _FRAME_HEADER.size + 4 * n
+    if start > end:
+        raise ValueError('Frame is broken.')
+    text = str(view[start:end], 'utf-8')
+    if n == 0:
+        strings = ()
+    elif n == 1:
+        strings = (text,)
+        if first != len(text):
+            raise ValueError('Frame is broken.')
+    else:
+        strings = []
+        i = 0
+        for size in unpack_from(f'<{n}I', view, start - 4 * n):
+            strings.append(text[i:i + size])
+            i += size
+        if i != len(text):
+            raise ValueError('Frame is broken.')
+    
+    if not flags:
+        data = table[code] if code < _CODE_COUNT else None
+        if data is None:
+            raise ValueError(f'Status code {code:03} is not in the registry.')
+        return OptimizedSpeech._from_data(_drone_id(drone), data, tuple(strings)), end
+    
+    i = 0
+    if flags & _FLAG_DRONE_ID:
+        drone_id = strings[0]
+        i = 1
+    else:
+        drone_id = _drone_id(drone)
+    
+    if flags & _FLAG_DATA:
+        if flags & _FLAG_NO_PREDEFINED:
+            status_code, status_message = strings[i:i + 2]
+            predefined_message = None
+            i += 2
+        else:
+            status_code, status_message, predefined_message = strings[i:i + 3]
+            i += 3
+        return OptimizedSpeech(drone_id, status_code, status_message, predefined_message, strings[i:]), end
+    
+    data = table[code] if code < _CODE_COUNT else None
+    if data is None:
+        raise ValueError(f'Status code {code:03} is not in the registry.')
+    return OptimizedSpeech._from_data(drone_id, data, tuple(strings[i:])), end
@@ -0,0 +1,157 @@
+"""
+Convert free text into OptimizedSpeech by predefined messages. (e.g. 'Please clarify.' to Code 106)
+"""
+
+from .optimized_speech import OptimizedSpeech
+from .status_codes import status_codes, StatusCodeRegistry
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+
+class SpeechMatch(NamedTuple):
+    start: int
+    end: int
+    status_code: str
+
+
+class SpeechOptimizer:
+    """
+    Aho-Corasick automaton over predefined messages of status codes.
+    Text is scanned once, so time is linear in the length of text regardless of number of status codes.
+    If status codes share a predefined message, the smallest status code is used.
+    """
+    
+    def __init__(self, registry: StatusCodeRegistry = status_codes, ignore_case: bool = False):
+        """
+        :param registry: Status codes to match.
+        :param ignore_case: Match predefined messages case-insensitively.
+        """
+        self._registry = registry
+        self._ignore_case = ignore_case
+        
+        # Trie of predefined messages. Each state has transitions, a failure link and outputs.
+        self._goto: List[Dict[str, int]] = [{}]
+        self._codes: List[Optional[str]] = [None]  # Status code of the message ends at the state.
+        self._depths: List[int] = [0]
+        for code, data in registry.items():
+            if data.predefined_message is None:
+                continue
+            state = 0
+            for char in self._normalize(data.predefined_message):
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = self._goto[state][char] = len(self._goto)
+                    self._goto.append({})
+                    self._codes.append(None)
+                    self._depths.append(self._depths[state] + 1)
+                state = next_state
+            if self._codes[state] is None:
+                self._codes[state] = code
+        
+        # Failure links and outputs. (Outputs of failure states are merged in breadth-first order.)
+        self._fail: List[int] = [0] * len(self._goto)
+        self._outputs: List[Tuple[Tuple[int, str], ...]] = [()] * len(self._goto)
+        queue = list(self._goto[0].values())
+        for state in queue:
+            self._outputs[state] = self._own_output(state)
+        i = 0
+        while i < len(queue):
+            state = queue[i]
+            i += 1
+            for char, next_state in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(char, 0)
+                self._fail[next_state] = fail
+                self._outputs[next_state] = self._own_output(next_state) + self._outputs[fail]
+                queue.append(next_state)
+    
+    def _normalize(self, text: str) -> str:
+        # Length of text is kept, so indices of matches are same as the original text.
+        if not self._ignore_case:
+            return text
+        lowered = text.lower()
+        if len(lowered) != len(text):  # e.g. 'İ'.lower() is 2 characters.
+            lowered = ''.join(c if len(c.lower()) != 1 else c.lower() for c in text)
+        return lowered
+    
+    def _own_output(self, state: int) -> Tuple[Tuple[int, str], ...]:
+        code = self._codes[state]
+        return () if code is None else ((self._depths[state], code),)
+    
+    def find(self, text: str) -> List[SpeechMatch]:
+        """
+        Find all predefined messages in the text, including overlapped ones.
+        
+        :return: Matches in order of their end, and longer one first for same end.
+        """
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        matches = []
+        state = 0
+        for i, char in enumerate(self._normalize(text)):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for length, code in outputs[state]:
+                matches.append(SpeechMatch(i + 1 - length, i + 1, code))
+        return matches
+    
+    def codes(self, text: str) -> Tuple[str, ...]:
+        """
+        Get status codes of predefined messages in the text, without duplicates in order of appearance.
+        """
+        return tuple(dict.fromkeys(match.status_code for match in self.find(text)))
+    
+    def match_prefix(self, text: str) -> Optional[SpeechMatch]:
+        """
+        Get the longest predefined message at the head of the text.
+        """
+        goto, codes = self._goto, self._codes
+        found = None
+        state = 0
+        for i, char in enumerate(self._normalize(text)):
+            state = goto[state].get(char)
+            if state is None:
+                break
+            if codes[state] is not None:
+                found = SpeechMatch(0, i + 1, codes[state])
+        return found
+    
+    def optimize(self, drone_id: str, text: str) -> Optional[OptimizedSpeech]:
+        """
+        Build OptimizedSpeech from the text which starts with a predefined message.
+        The rest of the text is used as a user defined message.
+        (e.g. 'Please clarify. What is it?' to '1234 :: Code 106 :: Response :: Please clarify. :: What is it?')
+        
+        :param drone_id: 4 digit of ⬡-Drone ID.
+        :param text: Free text.
+        :return: Return None if the text does not start with a predefined message.
+        """
+        text = text.strip()
+        match = self.match_prefix(text)
+        if match is None:
+            return None
+        
+        rest = text[match.end:].strip()
+        if rest:
+            return OptimizedSpeech.build(drone_id, match.status_code, rest, registry=self._registry)
+        return OptimizedSpeech.build(drone_id, match.status_code, registry=self._registry)
+    
+    def optimize_many(self, messages: Iterable[Tuple[str, str]]) -> List[Optional[OptimizedSpeech]]:
+        """
+        Optimize many texts at once. (e.g. chat logs)
+        
+        :param messages: Pairs of drone ID and free text.
+        :return: Results of `optimize` in order.
+        """
+        optimize = self.optimize
+        return [optimize(drone_id, text) for drone_id, text in messages]
+    
+    def classify_many(self, texts: Iterable[str]) -> List[Tuple[str, ...]]:
+        """
+        Get status codes of predefined messages in many texts at once. (e.g. chat logs)
+        
+        :return: Results of `codes` in order.
+        """
+        codes = self.codes
+        return [codes(text) for text in texts]
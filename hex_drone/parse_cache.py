@@ -0,0 +1,102 @@
+"""
+Bounded cache of parsed speeches for repeated speeches. (e.g. mantras, '200 :: Affirmative.')
+"""
+
+from .optimized_speech import OptimizedSpeech
+from .status_codes import StatusCodeRegistry
+from collections import OrderedDict
+from threading import Lock
+from typing import NamedTuple, Optional
+
+_MISSING = object()
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    maxsize: int
+    currsize: int
+    
+    @property
+    def hit_rate(self) -> float:
+        """
+        Ratio of hits to lookups. (0.0 if nothing has been looked up.)
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ParseCache:
+    """
+    LRU cache of `OptimizedSpeech.parse` keyed on the raw text.
+    It is safe to use from multiple threads. Parsed speeches are immutable, so they are shared by callers.
+    """
+    
+    def __init__(self, maxsize: int = 4096, registry: StatusCodeRegistry = None):
+        """
+        :param maxsize: Maximum number of cached speeches. The least recently used one is evicted.
+        :param registry: Status codes to accept. (`status_codes` if None.)
+        """
+        if maxsize < 1:
+            raise ValueError('maxsize must be positive.')
+        self._maxsize = maxsize
+        self._registry = registry
+        self._entries: 'OrderedDict[str, Optional[OptimizedSpeech]]' = OrderedDict()
+        self._lock = Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+    
+    def parse(self, speech: str) -> Optional[OptimizedSpeech]:
+        """
+        Parse str to OptimizedSpeech, or get cached result.
+        
+        :param speech: Speech to parse.
+        :return: Return None if speech is invalid.
+        """
+        entries = self._entries
+        with self._lock:
+            result = entries.get(speech, _MISSING)
+            if result is not _MISSING:
+                entries.move_to_end(speech)
+                self._hits += 1
+                return result
+            self._misses += 1
+        
+        result = OptimizedSpeech.parse(speech, registry=self._registry)  # Parse outside the lock.
+        with self._lock:
+            if speech not in entries:
+                entries[speech] = result
+                if len(entries) > self._maxsize:
+                    entries.popitem(last=False)
+                    self._evictions += 1
+        return result
+    
+    @property
+    def registry(self) -> Optional[StatusCodeRegistry]:
+        return self._registry
+    
+    def cache_info(self) -> CacheInfo:
+        """
+        Get hit/miss/eviction counters.
+        """
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self._evictions, self._maxsize, len(self._entries))
+    
+    def clear(self):
+        """
+        Clear cached speeches and counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+    
+    def __getstate__(self):
+        # Pickled as an empty cache of same size. (e.g. for the process pool.)
+        return {'maxsize': self._maxsize, 'registry': self._registry}
+    
+    def __setstate__(self, state):
+        self.__init__(state['maxsize'], state.get('registry'))
@@ -0,0 +1,125 @@
+"""
+Per-drone rate limiting of requests, answered with Code 429.
+"""
+
+from .optimized_speech import OptimizedSpeech
+from .hooks import Hook
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+from typing import Callable, List, NamedTuple, Optional
+
+TOO_MANY_REQUESTS = '429'
+
+# Idle buckets are dropped once per this + 1 requests.
+_EXPIRE_INTERVAL = 0xff
+
+
+class RateLimiterInfo(NamedTuple):
+    allowed: int
+    rejected: int
+    drones: int
+
+
+class RateLimiter(Hook):
+    """
+    Hook to limit requests of each drone by token bucket.
+    Requests over the limit are answered with Code 429 without invoking the registered function.
+    Invalid requests are not limited because they have no drone ID.
+    It is safe to use from multiple threads.
+    """
+    
+    def __init__(
+            self, drone_id: str, rate: float, burst: Optional[float] = None, maxsize: int = 65536,
+            clock: Callable[[], float] = monotonic
+    ):
+        """
+        :param drone_id: Drone ID of the response. (e.g. ID of the drone who runs the pattern.)
+        :param rate: Requests per second allowed for each drone.
+        :param burst: Maximum number of requests allowed at once. (Same as `rate` if None.)
+        :param maxsize: Maximum number of drones to keep their buckets. The least recently seen one is dropped.
+        :param clock: Function to get the current time in seconds.
+        """
+        if rate <= 0:
+            raise ValueError('rate must be positive.')
+        burst = rate if burst is None else burst
+        if burst < 1:
+            raise ValueError('burst must be 1 or more.')
+        if maxsize < 1:
+            raise ValueError('maxsize must be positive.')
+        self._drone_id = drone_id
+        self._rate = rate
+        self._burst = burst
+        self._maxsize = maxsize
+        self._clock = clock
+        self._idle = burst / rate  # Buckets idle longer than this are full, so they are dropped.
+        self._response = OptimizedSpeech.build(drone_id, TOO_MANY_REQUESTS)  # Immutable, so it is shared.
+        # Drone ID: [tokens, last time], in order of last time.
+        self._buckets: 'OrderedDict[str, List[float]]' = OrderedDict()
+        self._lock = Lock()
+        self._allowed = 0
+        self._rejected = 0
+    
+    def before(self, raw, speech, event, handler):
+        if speech is None:
+            return self.PROCEED
+        
+        drone_id = speech.drone_id
+        buckets = self._buckets
+        with self._lock:
+            now = self._clock()
+            bucket = buckets.get(drone_id)
+            if bucket is not None:
+                buckets.move_to_end(drone_id)
+                tokens = bucket[0] + (now - bucket[1]) * self._rate
+                bucket[0] = self._burst if tokens > self._burst else tokens
+                bucket[1] = now
+            else:
+                bucket = buckets[drone_id] = [self._burst, now]
+                if len(buckets) > self._maxsize:
+                    buckets.popitem(last=False)
+            
+            if not (self._allowed + self._rejected) & _EXPIRE_INTERVAL:
+                self._expire(now)
+            
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                self._allowed += 1
+                return self.PROCEED
+            self._rejected += 1
+        return self._response
+    
+    def _expire(self, now: float):
+        # Buckets are in order of last time, so idle ones are at the beginning.
+        buckets = self._buckets
+        while buckets:
+            drone_id, (_, last) = next(iter(buckets.items()))
+            if now - last < self._idle:
+                break
+            del buckets[drone_id]
+    
+    def info(self) -> RateLimiterInfo:
+        """
+        Get numbers of allowed and rejected requests, and number of drones which have their buckets.
+        """
+        with self._lock:
+            return RateLimiterInfo(self._allowed, self._rejected, len(self._buckets))
+    
+    def clear(self):
+        """
+        Clear buckets and counters.
+        """
+        with self._lock:
+            self._buckets.clear()
+            self._allowed = 0
+            self._rejected = 0
+    
+    def __getstate__(self):
+        # Pickled without buckets. (e.g. for the process pool.)
+        return {
+            'drone_id': self._drone_id, 'rate': self._rate, 'burst': self._burst,
+            'maxsize': self._maxsize, 'clock': self._clock,
+        }
+    
+    def __setstate__(self, state):
+        self.__init__(**state)
@@ -1,4 +1,6 @@
-from typing import Callable, Any
+import re
+from .response_cache import ResponseCache
+from typing import Callable, Optional, Any, Pattern, Sequence, Union
 
 FuncStrArg = Callable[..., Any]  # Callable[[str, ...], Any]
 FuncSpeechArg = Callable[..., Any]  # Callable[[OptimizedSpeech, ...], Any]
@@ -9,6 +11,15 @@ class RequestEvent:
     KEY_ATTR = '_registered_function'
     KEY_EVENT = 'event'
     KEY_STATUS_CODES = 'status_codes'
+    KEY_BATCH = 'batch'
+    KEY_OFFLOAD = 'offload'
+    KEY_CACHE = 'cache'
+    KEY_MATCH = 'match'
+    KEY_PRIORITY = 'priority'
+    
+    # Executors to offload the function to.
+    OFFLOAD_THREAD = 'thread'
+    OFFLOAD_PROCESS = 'process'
     
     # define later
     ON_MESSAGE = ...
@@ -31,14 +42,46 @@ class OnMessage(RequestEvent):
     def __str__(self):
         return 'on_message'
     
-    def __call__(self, *status_codes: str):
+    def __call__(
+            self, *status_codes: str, batch: bool = False, offload: Optional[str] = None,
+            cache: Union[bool, ResponseCache] = False, match: Union[str, Pattern, Sequence[str], None] = None,
+            priority: int = 0
+    ):
         """
         Register response pattern which request has specified status code.
 
         :param status_codes: Status code which response to.
+        :param batch: The function receives a list of requests and returns a list of responses in same order.
+        :param offload: 'thread' or 'process' to run the function in the executor by `ResponsePattern.submit`.
+        :param cache: Cache responses of the function, which is a pure function of the request.
+            True for `ResponseCache()`, or ResponseCache to set its size and TTL. (Copied for each instance unless shared.)
+        :param match: Regular expression, or a list of keywords, searched in user defined messages joined by ' :: '.
+            The function is invoked only if it matches, and the function without `match` is invoked otherwise.
+        :param priority: Functions of higher priority are matched first. (Functions of same priority in order of
+            definition.)
         """
+        if offload not in [None, self.OFFLOAD_THREAD, self.OFFLOAD_PROCESS]:
+            raise ValueError(f'offload must be None, {self.OFFLOAD_THREAD!r} or {self.OFFLOAD_PROCESS!r}.')
+        if cache is True:
+            cache = ResponseCache()
+        if cache and batch:
+            raise ValueError('cache can not be used with batch.')
+        if match is not None:
+            if batch:
+                raise ValueError('match can not be used with batch.')
+            if not isinstance(match, (str, re.Pattern)):
+                if not match:
+                    raise ValueError('match must have keywords.')
+                match = '|'.join(map(re.escape, match))
+            match = re.compile(match)
+            if not isinstance(match.pattern, str):
+                raise TypeError('match must be a pattern of str.')
+        
         def decorator(function: FuncSpeechArg):
-            self._add_attr(function, {self.KEY_STATUS_CODES: status_codes})
+            self._add_attr(function, {
+                self.KEY_STATUS_CODES: status_codes, self.KEY_BATCH: batch, self.KEY_OFFLOAD: offload,
+                self.KEY_CACHE: cache or None, self.KEY_MATCH: match, self.KEY_PRIORITY: priority,
+            })
             return function
         return decorator
 
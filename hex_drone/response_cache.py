@@ -0,0 +1,161 @@
+"""
+Bounded cache of responses of pure functions. (e.g. Code 210 is always answered with Code 213.)
+"""
+
+from .optimized_speech import OptimizedSpeech
+from .parse_cache import CacheInfo
+from collections import OrderedDict
+from copy import deepcopy
+from threading import Lock
+from time import monotonic
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+_IMMUTABLE_TYPES = (OptimizedSpeech, str, bytes, int, float, complex, bool, type(None), frozenset)
+
+
+def _is_immutable(value: Any) -> bool:
+    if isinstance(value, _IMMUTABLE_TYPES):
+        return True
+    return type(value) is tuple and all(_is_immutable(v) for v in value)
+
+
+def _freeze(value: Any) -> Tuple[Any, Optional[Callable[[Any], Any]]]:
+    # Return the value to store, and the function to copy it for each caller. (None to share it as is.)
+    if _is_immutable(value):
+        return value, None
+    if type(value) is list and all(_is_immutable(v) for v in value):
+        return tuple(value), list  # e.g. [speech, speech]
+    return deepcopy(value), deepcopy
+
+
+class ResponseCache:
+    """
+    LRU cache with optional time to live of responses of a function registered by `ON_MESSAGE(cache=...)`.
+    Responses are keyed on the status code and user defined messages of the request (and its drone ID if `by_drone_id`),
+    and keyword arguments given to the pattern. Requests with unhashable keyword arguments are not cached.
+    Each instance of the pattern has its own cache of same settings, so the function may depend on the instance.
+    (e.g. `self.drone_id`) With `shared`, the cache is shared by all instances of the class instead,
+    and the function must return same response for same key, regardless of the instance.
+    Immutable responses (e.g. OptimizedSpeech, str and tuples of them) are shared, lists of them are copied,
+    and other responses are deep-copied, so callers can not change cached responses.
+    It is safe to use from multiple threads.
+    """
+    
+    # Returned by `get` if the response is not cached.
+    MISSING = object()
+    
+    def __init__(
+            self, maxsize: int = 1024, ttl: Optional[float] = None, by_drone_id: bool = False,
+            clock: Callable[[], float] = monotonic, shared: bool = False
+    ):
+        """
+        :param maxsize: Maximum number of cached responses. The least recently used one is evicted.
+        :param ttl: Seconds to keep a response. (Forever if None.) Expired responses are counted as evictions.
+        :param by_drone_id: Include drone ID of the request in the key.
+        :param clock: Function to get the current time in seconds.
+        :param shared: Share the cache by all instances of the class.
+        """
+        if maxsize < 1:
+            raise ValueError('maxsize must be positive.')
+        if ttl is not None and ttl <= 0:
+            raise ValueError('ttl must be positive.')
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._by_drone_id = by_drone_id
+        self._clock = clock
+        self._shared = shared
+        # Key: (response, function to copy it, expiry time), in order of use.
+        self._entries: 'OrderedDict[Hashable, Tuple[Any, Optional[Callable], float]]' = OrderedDict()
+        self._lock = Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+    
+    @property
+    def shared(self) -> bool:
+        return self._shared
+    
+    def copy(self) -> 'ResponseCache':
+        """
+        Get an empty cache of same settings.
+        """
+        return ResponseCache(**self.__getstate__())
+    
+    def key(self, request: OptimizedSpeech, kwargs: dict) -> Optional[Hashable]:
+        """
+        Get the key of the request, or None if it can not be cached.
+        """
+        if self._by_drone_id:
+            key = (request.status_code, request.user_defined_messages, request.drone_id)
+        else:
+            key = (request.status_code, request.user_defined_messages)
+        if not kwargs:
+            return key
+        key = (key, tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+    
+    def get(self, key: Hashable) -> Any:
+        """
+        Get a cached response.
+        
+        :return: Return `ResponseCache.MISSING` if it is not cached or expired.
+        """
+        entries = self._entries
+        with self._lock:
+            entry = entries.get(key)
+            if entry is not None and self._ttl is not None and entry[2] <= self._clock():
+                del entries[key]
+                self._evictions += 1
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return self.MISSING
+            entries.move_to_end(key)
+            self._hits += 1
+        response, copy, _ = entry
+        return response if copy is None else copy(response)
+    
+    def put(self, key: Hashable, response: Any):
+        """
+        Cache a response. It is copied if it is mutable.
+        """
+        response, copy = _freeze(response)
+        expires = 0.0 if self._ttl is None else self._clock() + self._ttl
+        entries = self._entries
+        with self._lock:
+            entries[key] = (response, copy, expires)
+            entries.move_to_end(key)
+            if len(entries) > self._maxsize:
+                entries.popitem(last=False)
+                self._evictions += 1
+    
+    def cache_info(self) -> CacheInfo:
+        """
+        Get hit/miss/eviction counters.
+        """
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self._evictions, self._maxsize, len(self._entries))
+    
+    def clear(self):
+        """
+        Clear cached responses and counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+    
+    def __getstate__(self):
+        # Pickled as an empty cache of same settings. (e.g. for the process pool.)
+        return {
+            'maxsize': self._maxsize, 'ttl': self._ttl, 'by_drone_id': self._by_drone_id, 'clock': self._clock,
+            'shared': self._shared,
+        }
+    
+    def __setstate__(self, state):
+        self.__init__(**state)
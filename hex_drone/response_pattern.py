@@ -4,13 +4,504 @@ Classes and decorators for define ⬡-Drone's response pattern.
 
 from .optimized_speech import OptimizedSpeech
 from .request_event import RequestEvent
-from .logs import get_logger
+from .logs import get_logger, is_debug_enabled
+from .parse_cache import CacheInfo, ParseCache
+from .response_cache import ResponseCache
+from .status_codes import StatusCodeRegistry
+from .metrics import Metrics
+from .hooks import Hook, _run_before, _run_after, _unwind
+import re
+from asyncio import AbstractEventLoop, CancelledError, Semaphore, gather, get_running_loop
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, ProcessPoolExecutor
+from inspect import iscoroutinefunction
 from logging import Logger
-from typing import Callable, Optional, Union, Dict, List, Any
+from collections import OrderedDict
+from itertools import count
+from threading import Lock
+from weakref import WeakKeyDictionary
+from time import perf_counter
+from functools import partial
+from typing import Callable, Optional, Union, Dict, List, Set, Tuple, Iterable, Sequence, Pattern, Any
 
 FuncStrArg = Callable[..., Any]  # Callable[[str, ...], Any]
 FuncSpeechArg = Callable[..., Any]  # Callable[[OptimizedSpeech, ...], Any]
 FuncExceptionArg = Callable[..., Any]  # Callable[[BaseException, ...], Any]
+Route = Callable[..., Any]  # Callable[[ResponsePattern, Any, Dict[str, Any], Any], Any]
+BatchRoute = Callable[..., List[Any]]  # Callable[[ResponsePattern, List[OptimizedSpeech], Dict[str, Any], List[Any]], List[Any]]
+
+# Index of the dispatch table for each status code, and for unregistered status codes.
+_CODE_INDEXES: Dict[str, int] = {f'{i:03}': i for i in range(1000)}
+_UNREGISTERED = len(_CODE_INDEXES)
+
+# Logger of patterns instantiated without a logger. (Shared, because a handler is added to it.)
+_LOGGER = get_logger(__name__)
+
+# Bound once to be shared by patterns.
+_view = OptimizedSpeech.view
+
+# Guards executors created by patterns. (Shared, because they are rarely created.)
+_EXECUTOR_LOCK = Lock()
+
+# Keys of patterns sent to worker processes, and patterns received in a worker process. (See `_call_offloaded`.)
+_PATTERN_KEYS = count()
+_WORKER_PATTERNS: 'OrderedDict[int, ResponsePattern]' = OrderedDict()
+_WORKER_PATTERNS_MAXSIZE = 64
+
+# User defined messages are joined by it to be matched by `ON_MESSAGE(match=...)`.
+_MESSAGE_SEPARATOR = ' :: '
+
+# Inline flags of compiled patterns, to combine patterns of different flags.
+_INLINE_FLAGS = ((re.ASCII, 'a'), (re.IGNORECASE, 'i'), (re.MULTILINE, 'm'), (re.DOTALL, 's'), (re.VERBOSE, 'x'))
+_GLOBAL_FLAGS = re.compile(r'(?:\(\?[aiLmsux]+\))+')  # e.g. '(?i)' at the start of a pattern.
+
+
+class _Dispatcher:
+    """
+    Routes compiled from the registered functions.
+    Each route is called as `route(pattern, request, kwargs, raw)` and handles exceptions by itself.
+    `raw` is the request given to the pattern, which is the raw text if it has been parsed.
+    """
+    
+    __slots__ = ('routes', 'on_invalid', 'batches', 'offloads', 'contents', 'handle_error', 'hooks')
+    
+    def __init__(
+            self, routes: List[Route], on_invalid: Route, batches: Dict[Route, BatchRoute],
+            offloads: Dict[Route, Tuple[str, str]], contents: Dict[Route, Callable[[OptimizedSpeech], Route]],
+            handle_error: Callable, hooks: Tuple[Hook, ...] = ()
+    ):
+        """
+        :param routes: Routes indexed by the integer status code. The last one is for unregistered status codes.
+        :param on_invalid: Route for invalid requests.
+        :param batches: Routes of batch functions which receive a list of requests, keyed by the route.
+        :param offloads: Executor type and function name of offloaded functions, keyed by the route.
+        :param contents: Functions to get the route of the function matched by user defined messages,
+                         keyed by the route of the status code. (See `ON_MESSAGE(match=...)`.)
+        :param handle_error: Function to invoke the error handler.
+        :param hooks: Hooks compiled into the routes.
+        """
+        self.routes = routes
+        self.on_invalid = on_invalid
+        self.batches = batches
+        self.offloads = offloads
+        self.contents = contents
+        self.handle_error = handle_error
+        self.hooks = hooks
+
+
+def _compile_error_handler(on_error: Optional[FuncExceptionArg], debug: bool):
+    event = RequestEvent.ON_ERROR
+    
+    def handle_error(pattern, failed_event: RequestEvent, error: BaseException, kwargs: dict) -> Any:
+        logger = pattern._logger
+        logger.exception('An exception raised while handling %s.', failed_event, exc_info=error)
+        if on_error is None:
+            if debug:
+                logger.debug('The function for %s is None.', event)
+            return None
+        try:
+            if debug:
+                logger.debug('Invoke the function for %s', event)
+            return on_error(pattern, error, **kwargs)
+        except BaseException:
+            logger.exception('An exception raised while handling %s.', event)
+            return None
+    
+    return handle_error
+
+
+def _compile_route(event: RequestEvent, func: Optional[Callable], handle_error, debug: bool) -> Route:
+    if func is None:
+        if debug:
+            def route(pattern, request, kwargs, raw):
+                pattern._logger.debug('The function for %s is None.', event)
+                return None
+        else:
+            def route(pattern, request, kwargs, raw):
+                return None
+        return route
+    
+    if debug:
+        def route(pattern, request, kwargs, raw):
+            pattern._logger.debug('Invoke the function for %s', event)
+            try:
+                return func(pattern, request, **kwargs)
+            except BaseException as e:
+                return handle_error(pattern, event, e, kwargs)
+    else:
+        def route(pattern, request, kwargs, raw):
+            try:
+                return func(pattern, request, **kwargs)
+            except BaseException as e:
+                return handle_error(pattern, event, e, kwargs)
+    return route
+
+
+def _compile_coroutine_guard(event: RequestEvent, func: Callable) -> Callable:
+    # Synchronous methods can not invoke coroutine functions. Their coroutines would never be awaited.
+    message = f'{func.__name__} for {event} is a coroutine function. Use acall or agather to await it.'
+    
+    def guard(*args):
+        raise TypeError(message)
+    
+    return guard
+
+
+def _compile_batch_route(event: RequestEvent, func: Callable, handle_error, debug: bool) -> BatchRoute:
+    def batch_route(pattern, requests, kwargs, raws):
+        if debug:
+            pattern._logger.debug('Invoke the function for %s with %d requests', event, len(requests))
+        try:
+            responses = list(func(pattern, requests, **kwargs))
+            if len(responses) != len(requests):
+                raise ValueError(f'{len(responses)} responses are returned for {len(requests)} requests.')
+            return responses
+        except BaseException as e:
+            # The error handler is invoked for each request, as same as non-batch functions.
+            return [handle_error(pattern, event, e, kwargs) for _ in requests]
+    
+    return batch_route
+
+
+def _single(batch_func: Callable, is_coroutine: bool = False) -> Callable:
+    # Call batch function with a request.
+    def check(responses):
+        if len(responses) != 1:
+            raise ValueError(f'{len(responses)} responses are returned for 1 request.')
+        return responses[0]
+    
+    if is_coroutine:
+        async def func(pattern, request, **kwargs):
+            return check(list(await batch_func(pattern, [request], **kwargs)))
+    else:
+        def func(pattern, request, **kwargs):
+            return check(list(batch_func(pattern, [request], **kwargs)))
+    return func
+
+
+def _compile_async_error_handler(on_error: Optional[FuncExceptionArg], is_coroutine: bool, debug: bool):
+    event = RequestEvent.ON_ERROR
+    
+    async def handle_error(pattern, failed_event: RequestEvent, error: BaseException, kwargs: dict) -> Any:
+        logger = pattern._logger
+        logger.exception('An exception raised while handling %s.', failed_event, exc_info=error)
+        if on_error is None:
+            if debug:
+                logger.debug('The function for %s is None.', event)
+            return None
+        try:
+            if debug:
+                logger.debug('Invoke the function for %s', event)
+            if is_coroutine:
+                return await on_error(pattern, error, **kwargs)
+            return on_error(pattern, error, **kwargs)
+        except CancelledError:
+            raise
+        except BaseException:
+            logger.exception('An exception raised while handling %s.', event)
+            return None
+    
+    return handle_error
+
+
+def _compile_async_route(
+        event: RequestEvent, func: Optional[Callable], is_coroutine: bool, handle_error, debug: bool
+) -> Route:
+    # Coroutine functions are awaited, and other functions are called in the event loop.
+    # Cancellation is not handled as an error.
+    if func is None:
+        async def route(pattern, request, kwargs, raw):
+            if debug:
+                pattern._logger.debug('The function for %s is None.', event)
+            return None
+        return route
+    
+    if is_coroutine:
+        async def route(pattern, request, kwargs, raw):
+            if debug:
+                pattern._logger.debug('Invoke the function for %s', event)
+            try:
+                return await func(pattern, request, **kwargs)
+            except CancelledError:
+                raise
+            except BaseException as e:
+                return await handle_error(pattern, event, e, kwargs)
+    else:
+        async def route(pattern, request, kwargs, raw):
+            if debug:
+                pattern._logger.debug('Invoke the function for %s', event)
+            try:
+                return func(pattern, request, **kwargs)
+            except BaseException as e:
+                return await handle_error(pattern, event, e, kwargs)
+    return route
+
+
+def _count_errors(handle_error):
+    # Works for both sync and async error handlers. (Async one returns an awaitable.)
+    event = str(RequestEvent.ON_ERROR)
+    
+    def counted(pattern, failed_event, error, kwargs):
+        pattern._metrics.shard().count(event)
+        return handle_error(pattern, failed_event, error, kwargs)
+    
+    return counted
+
+
+def _measure_route(route: Route, event: RequestEvent, handler: Optional[str], asynchronous: bool) -> Route:
+    # Count the event and the status code, and observe latency of the handler.
+    name = str(event)
+    with_code = event != RequestEvent.ON_INVALID
+    if asynchronous:
+        async def measured(pattern, request, kwargs, raw):
+            shard = pattern._metrics.shard()
+            shard.count(name, request.status_code if with_code else None)
+            if handler is None:
+                return await route(pattern, request, kwargs, raw)
+            start = perf_counter()
+            try:
+                return await route(pattern, request, kwargs, raw)
+            finally:
+                shard.observe(handler, perf_counter() - start)
+    else:
+        def measured(pattern, request, kwargs, raw):
+            shard = pattern._metrics.shard()
+            shard.count(name, request.status_code if with_code else None)
+            if handler is None:
+                return route(pattern, request, kwargs, raw)
+            start = perf_counter()
+            try:
+                return route(pattern, request, kwargs, raw)
+            finally:
+                shard.observe(handler, perf_counter() - start)
+    return measured
+
+
+def _measure_batch_route(batch_route: BatchRoute, event: RequestEvent, handler: str) -> BatchRoute:
+    name = str(event)
+    
+    def measured(pattern, requests, kwargs, raws):
+        shard = pattern._metrics.shard()
+        for request in requests:
+            shard.count(name, request.status_code)
+        start = perf_counter()
+        try:
+            return batch_route(pattern, requests, kwargs, raws)
+        finally:
+            shard.observe(handler, perf_counter() - start)
+    
+    return measured
+
+
+def _hook_route(
+        route: Route, hooks: Tuple[Hook, ...], event: RequestEvent, handler: Optional[str],
+        handle_error, asynchronous: bool
+) -> Route:
+    # Invoke hooks around the route. Exceptions raised in hooks are given to the error handler.
+    proceed = Hook.PROCEED
+    is_invalid = event == RequestEvent.ON_INVALID
+    if asynchronous:
+        async def hooked(pattern, request, kwargs, raw):
+            speech = None if is_invalid else request
+            try:
+                result, invoked = _run_before(hooks, raw, speech, event, handler)
+                if result is proceed:
+                    try:
+                        result = await route(pattern, request, kwargs, raw)
+                    except BaseException:
+                        _unwind(hooks, invoked, raw, speech, event, handler)
+                        raise
+                return _run_after(hooks, invoked, raw, speech, event, handler, result)
+            except CancelledError:
+                raise
+            except BaseException as e:
+                return await handle_error(pattern, event, e, kwargs)
+    else:
+        def hooked(pattern, request, kwargs, raw):
+            speech = None if is_invalid else request
+            try:
+                result, invoked = _run_before(hooks, raw, speech, event, handler)
+                if result is proceed:
+                    try:
+                        result = route(pattern, request, kwargs, raw)
+                    except BaseException:
+                        _unwind(hooks, invoked, raw, speech, event, handler)
+                        raise
+                return _run_after(hooks, invoked, raw, speech, event, handler, result)
+            except BaseException as e:
+                return handle_error(pattern, event, e, kwargs)
+    return hooked
+
+
+def _hook_batch_route(
+        batch_route: BatchRoute, hooks: Tuple[Hook, ...], event: RequestEvent, handler: str, handle_error
+) -> BatchRoute:
+    # Hooks are invoked for each request, and only requests which are not answered by hooks are batched.
+    proceed = Hook.PROCEED
+    
+    def hooked(pattern, requests, kwargs, raws):
+        befores: List[Tuple[Any, int]] = []
+        try:
+            for raw, request in zip(raws, requests):
+                befores.append(_run_before(hooks, raw, request, event, handler))
+            results = [result for result, _ in befores]
+            pending = [i for i, result in enumerate(results) if result is proceed]
+            if pending:
+                responses = batch_route(pattern, [requests[i] for i in pending], kwargs, [raws[i] for i in pending])
+                for i, response in zip(pending, responses):
+                    results[i] = response
+        except BaseException as e:
+            # Hooks of requests which are not failed by themselves are unwound.
+            for raw, request, (_, invoked) in zip(raws, requests, befores):
+                _unwind(hooks, invoked, raw, request, event, handler)
+            return [handle_error(pattern, event, e, kwargs) for _ in requests]
+        
+        # Hooks are invoked in reverse order of requests, so `before` and `after` of each request are nested.
+        responses = [None] * len(requests)
+        for i in range(len(requests) - 1, -1, -1):
+            try:
+                responses[i] = _run_after(hooks, befores[i][1], raws[i], requests[i], event, handler, results[i])
+            except BaseException as e:
+                responses[i] = handle_error(pattern, event, e, kwargs)
+        return responses
+    
+    return hooked
+
+
+class _PatternMissing:
+    # Returned by a worker process which has not received the pattern yet. (Pickled by reference.)
+    pass
+
+
+def _call_offloaded(
+        key: int, pattern: Optional['ResponsePattern'], func_name: str, request: OptimizedSpeech, kwargs: dict
+) -> Any:
+    # Invoked in the process pool. The request is pickled for each call, but the pattern is pickled only if
+    # the worker has not received it, so it is unpickled and set up once in each worker.
+    if pattern is None:
+        pattern = _WORKER_PATTERNS.get(key)
+        if pattern is None:
+            return _PatternMissing
+        _WORKER_PATTERNS.move_to_end(key)
+    else:
+        _WORKER_PATTERNS[key] = pattern
+        if len(_WORKER_PATTERNS) > _WORKER_PATTERNS_MAXSIZE:
+            _WORKER_PATTERNS.popitem(last=False)
+    func = getattr(type(pattern), func_name)
+    if func_name in pattern._func_name_batch:
+        func = _single(func)
+    return func(pattern, request, **kwargs)
+
+
+def _cache_func(func: Callable, func_name: str, is_coroutine: bool) -> Callable:
+    # Look up the cache of the instance before invoking the function. Exceptions are not cached.
+    missing = ResponseCache.MISSING
+    if is_coroutine:
+        async def cached(pattern, request, **kwargs):
+            cache = pattern._response_caches[func_name]
+            key = cache.key(request, kwargs)
+            if key is None:
+                return await func(pattern, request, **kwargs)
+            response = cache.get(key)
+            if response is missing:
+                response = await func(pattern, request, **kwargs)
+                cache.put(key, response)
+            return response
+    else:
+        def cached(pattern, request, **kwargs):
+            cache = pattern._response_caches[func_name]
+            key = cache.key(request, kwargs)
+            if key is None:
+                return func(pattern, request, **kwargs)
+            response = cache.get(key)
+            if response is missing:
+                response = func(pattern, request, **kwargs)
+                cache.put(key, response)
+            return response
+    cached.__name__ = func.__name__
+    return cached
+
+
+def _compile_matcher(patterns: Sequence[Pattern]) -> Callable[[str], int]:
+    # Get a function to get the index of the first pattern searched in the text, or len(patterns) if none.
+    # Patterns are combined into one alternation, so the leftmost match of all patterns is found in one scan.
+    # The first pattern matching at that position wins there, so only earlier patterns are searched after it.
+    # Patterns with groups are searched one by one, because their numbered groups would be shifted.
+    # They are also searched one by one if the alternation can not be compiled.
+    default = len(patterns)
+    alternatives = [f'{_scoped(p)}()' for p in patterns]  # Each alternative has only one group.
+    search_all: Optional[Callable] = None
+    if not any(p.groups for p in patterns):
+        try:
+            search_all = re.compile('|'.join(alternatives)).search
+        except re.error:
+            pass
+    if search_all is None:
+        searches = [p.search for p in patterns]
+        
+        def matcher(text: str) -> int:
+            for i, search in enumerate(searches):
+                if search(text) is not None:
+                    return i
+            return default
+        return matcher
+    
+    compiled: Dict[int, Callable] = {default: search_all}
+    
+    def search_before(index: int) -> Callable:
+        # Search of patterns before the index, compiled when it is needed.
+        search = compiled.get(index)
+        if search is None:
+            search = compiled[index] = re.compile('|'.join(alternatives[:index])).search
+        return search
+    
+    def matcher(text: str) -> int:
+        m = search_all(text)
+        if m is None:
+            return default
+        index = m.lastindex - 1
+        while index:
+            m = search_before(index)(text, m.start() + 1)
+            if m is None:
+                break
+            index = m.lastindex - 1
+        return index
+    return matcher
+
+
+def _scoped(pattern: Pattern) -> str:
+    # Pattern in a group of its own flags. (e.g. '(?i:status)' for re.compile('status', re.I) or '(?i)status')
+    # Global flags at the start are already in pattern.flags, and they are not allowed in the middle of the alternation.
+    flags = ''.join([c for flag, c in _INLINE_FLAGS if pattern.flags & flag])
+    text = pattern.pattern
+    m = _GLOBAL_FLAGS.match(text)
+    if m is not None:
+        text = text[m.end():]
+    if not flags:
+        return f'(?:{text})'
+    if 'x' in flags:
+        return f'(?{flags}:{text}\n)'  # A comment at the end must not hide ')'.
+    return f'(?{flags}:{text})'
+
+
+def _compile_content_route(
+        matcher: Callable[[str], int], targets: List[Route]
+) -> Tuple[Route, Callable[[OptimizedSpeech], Route]]:
+    # Route to the function matched by user defined messages. The last target is the fallback.
+    join = _MESSAGE_SEPARATOR.join
+    
+    def route(pattern, request, kwargs, raw):
+        # Async targets return awaitables, so it serves the async dispatcher as it is.
+        return targets[matcher(join(request.user_defined_messages))](pattern, request, kwargs, raw)
+    
+    def resolve(request: OptimizedSpeech) -> Route:
+        return targets[matcher(join(request.user_defined_messages))]
+    
+    return route, resolve
+
+
+def _slots_of(cls: type) -> Tuple[str, ...]:
+    slots = cls.__dict__.get('__slots__', ())
+    return (slots,) if isinstance(slots, str) else tuple(slots)
 
 
 class ResponsePatternMeta(type):
@@ -24,49 +515,282 @@ class ResponsePatternMeta(type):
         cls._func_name_on_invalid_message: Optional[str] = None
         cls._func_name_on_unregistered_message: Optional[str] = None
         cls._func_name_on_error: Optional[str] = None
-
+        cls._func_name_batch: Set[str] = set()
+        cls._func_name_coroutine: Set[str] = set()
+        cls._func_name_offload: Dict[str, str] = {}
+        cls._func_name_cache: Dict[str, ResponseCache] = {}
+        # Functions registered with `match` for each status code, in order to be matched: [(pattern, func_name)]
+        cls._func_name_on_match: Dict[str, List[Tuple[Pattern, str]]] = {}
+        # Index of the function matched in the text for each status code, or the number of functions if none.
+        cls._matchers: Dict[str, Callable[[str], int]] = {}
+        cls._dispatchers: Dict[Tuple[bool, bool, bool], _Dispatcher] = {}
+        
+        # Attributes stored in slots of the class and its bases, to be pickled.
+        cls._slot_names: Tuple[str, ...] = tuple(dict.fromkeys(
+            slot
+            for base in reversed(cls.__mro__)
+            for slot in _slots_of(base)
+            if slot not in ('__dict__', '__weakref__')
+        ))
+        
+        matches: Dict[str, List[Tuple[int, Pattern, str]]] = {}  # [(priority, pattern, func_name)]
         for func_name, func in attrs.items():  # It may not function, but others will be skipped.
             events: List[dict] = getattr(func, RequestEvent.KEY_ATTR, [])
+            if events and iscoroutinefunction(func):
+                cls._func_name_coroutine.add(func_name)
             for event_dict in events:
                 event = event_dict[RequestEvent.KEY_EVENT]
                 if event == RequestEvent.ON_MESSAGE:
+                    match = event_dict.get(RequestEvent.KEY_MATCH)
                     for code in event_dict[RequestEvent.KEY_STATUS_CODES]:
-                        cls._func_name_on_message[code] = func_name
+                        if code not in _CODE_INDEXES:
+                            raise ValueError(f'Status code must be 3 digits: {code!r} ({name}.{func_name})')
+                        if match is None:
+                            cls._func_name_on_message[code] = func_name
+                        else:
+                            priority = event_dict.get(RequestEvent.KEY_PRIORITY, 0)
+                            matches.setdefault(code, []).append((priority, match, func_name))
+                    if event_dict.get(RequestEvent.KEY_BATCH, False):
+                        cls._func_name_batch.add(func_name)
+                    if event_dict.get(RequestEvent.KEY_OFFLOAD) is not None:
+                        cls._func_name_offload[func_name] = event_dict[RequestEvent.KEY_OFFLOAD]
+                    if event_dict.get(RequestEvent.KEY_CACHE) is not None:
+                        cls._func_name_cache[func_name] = event_dict[RequestEvent.KEY_CACHE]
                 elif event == RequestEvent.ON_INVALID:
                     cls._func_name_on_invalid_message = func_name
                 elif event == RequestEvent.ON_UNREGISTERED:
                     cls._func_name_on_unregistered_message = func_name
                 elif event == RequestEvent.ON_ERROR:
                     cls._func_name_on_error = func_name
+        
+        for code, items in matches.items():
+            for _, _, func_name in items:
+                if func_name in cls._func_name_batch:
+                    raise ValueError(f'match can not be used with batch. ({name}.{func_name})')
+            items.sort(key=lambda v: -v[0])  # Stable, so functions of same priority are in order of definition.
+            cls._func_name_on_match[code] = [(match, func_name) for _, match, func_name in items]
+            cls._matchers[code] = _compile_matcher([match for _, match, _ in items])
+        cls._status_codes = dict.fromkeys([*cls._func_name_on_message, *cls._func_name_on_match]).keys()
+    
+    def _get_dispatcher(
+            cls, debug: bool, asynchronous: bool = False, metrics: bool = False, hooks: Sequence[Hook] = ()
+    ) -> _Dispatcher:
+        """
+        Get routes compiled once per class.
+        Routes with hooks of the instance are compiled every time.
+        
+        :param debug: Compile routes which write debug logs.
+        :param asynchronous: Compile routes which are coroutine functions.
+        :param metrics: Compile routes which write metrics of the pattern.
+        :param hooks: Hooks of the instance, which are invoked after hooks of the class.
+        """
+        if hooks:
+            return cls._compile_dispatcher(debug, asynchronous, metrics, (*cls.hooks, *hooks))
+        
+        key = (debug, asynchronous, metrics)
+        dispatcher = cls._dispatchers.get(key)
+        if dispatcher is None:
+            dispatcher = cls._dispatchers[key] = cls._compile_dispatcher(debug, asynchronous, metrics, tuple(cls.hooks))
+        return dispatcher
     
+    def _compile_dispatcher(
+            cls, debug: bool, asynchronous: bool, metrics: bool, hooks: Tuple[Hook, ...]
+    ) -> _Dispatcher:
+        def get_func(func_name):
+            if func_name is None:
+                return None
+            return getattr(cls, func_name, None)
+        
+        coroutines = cls._func_name_coroutine
+        if asynchronous:
+            handle_error = _compile_async_error_handler(
+                get_func(cls._func_name_on_error), cls._func_name_on_error in coroutines, debug)
+            
+            def compile_func(event, func, is_coroutine):
+                return _compile_async_route(event, func, is_coroutine, handle_error, debug)
+        else:
+            if cls._func_name_on_error in coroutines:
+                handle_error = _compile_coroutine_guard(RequestEvent.ON_ERROR, get_func(cls._func_name_on_error))
+            else:
+                handle_error = _compile_error_handler(get_func(cls._func_name_on_error), debug)
+            
+            def compile_func(event, func, is_coroutine):
+                return _compile_route(event, func, handle_error, debug)
+        
+        if metrics:
+            handle_error = _count_errors(handle_error)
+            compile_unmeasured = compile_func
+            
+            def compile_func(event, func, is_coroutine):
+                route = compile_unmeasured(event, func, is_coroutine)
+                handler = None if func is None else func.__name__
+                return _measure_route(route, event, handler, asynchronous)
+        
+        if hooks:
+            compile_unhooked = compile_func
+            
+            def compile_func(event, func, is_coroutine):
+                route = compile_unhooked(event, func, is_coroutine)
+                handler = None if func is None else func.__name__
+                return _hook_route(route, hooks, event, handler, handle_error, asynchronous)
+        
+        def compile_route(event, func_name):
+            func = get_func(func_name)
+            is_coroutine = func_name in coroutines
+            if is_coroutine and not asynchronous and func is not None:
+                return _compile_coroutine_guard(event, func)
+            if event == RequestEvent.ON_MESSAGE and func_name in cls._func_name_cache and func is not None:
+                func = _cache_func(func, func_name, is_coroutine)
+            return compile_func(event, func, is_coroutine)
+        
+        on_unregistered = compile_route(RequestEvent.ON_UNREGISTERED, cls._func_name_on_unregistered_message)
+        routes = [on_unregistered] * (_UNREGISTERED + 1)
+        compiled: Dict[str, Route] = {}  # Status codes sharing a function share the route.
+        batches: Dict[Route, BatchRoute] = {}
+        offloads: Dict[Route, Tuple[str, str]] = {}
+        
+        def message_route(func_name):
+            if func_name in compiled:
+                return compiled[func_name]
+            if func_name in cls._func_name_batch and (asynchronous or func_name not in coroutines):
+                func = get_func(func_name)
+                is_coroutine = asynchronous and func_name in coroutines
+                single = _single(func, is_coroutine)
+                single.__name__ = func.__name__
+                route = compile_func(RequestEvent.ON_MESSAGE, single, is_coroutine)
+                if not asynchronous:
+                    batch_route = _compile_batch_route(RequestEvent.ON_MESSAGE, func, handle_error, debug)
+                    if metrics:
+                        batch_route = _measure_batch_route(batch_route, RequestEvent.ON_MESSAGE, func.__name__)
+                    if hooks:
+                        batch_route = _hook_batch_route(
+                            batch_route, hooks, RequestEvent.ON_MESSAGE, func.__name__, handle_error)
+                    batches[route] = batch_route
+            else:
+                route = compile_route(RequestEvent.ON_MESSAGE, func_name)
+            if func_name in cls._func_name_offload and not asynchronous:
+                offloads[route] = (cls._func_name_offload[func_name], func_name)
+            compiled[func_name] = route
+            return route
+        
+        for code, func_name in cls._func_name_on_message.items():
+            routes[_CODE_INDEXES[code]] = message_route(func_name)
+        
+        # Functions with `match` are matched before the function without it, or ON_UNREGISTERED if none.
+        contents: Dict[Route, Callable[[OptimizedSpeech], Route]] = {}
+        for code, matches in cls._func_name_on_match.items():
+            targets = [message_route(func_name) for _, func_name in matches]
+            targets.append(routes[_CODE_INDEXES[code]])
+            route, resolve = _compile_content_route(cls._matchers[code], targets)
+            contents[route] = resolve
+            routes[_CODE_INDEXES[code]] = route
+        
+        on_invalid = compile_route(RequestEvent.ON_INVALID, cls._func_name_on_invalid_message)
+        return _Dispatcher(routes, on_invalid, batches, offloads, contents, handle_error, hooks)
+
 
 class ResponsePattern(metaclass=ResponsePatternMeta):
     """
     Class to register response patterns.
+    Dispatch tables are compiled once per class and shared by instances,
+    so an instance holds only its own state. Subclasses may define `__slots__` to drop `__dict__` of instances.
     """
     
-    def __init__(self, logger: Logger = None):
-        def get_func(func_name):
-            if func_name is None:
-                return None
-            return getattr(self, func_name, None)
+    __slots__ = (
+        '_logger', '_concurrency', '_parse_cache', '_registry', '_metrics', '_hooks',
+        '_debug', '_dispatcher', '_async_dispatcher', '_parse', '_semaphores', '_response_caches', '_pattern_key',
+        '_thread_pool', '_process_pool', '_own_executors', '__weakref__',
+    )
+    
+    # Hooks invoked for all instances of the class. (Compiled when the class is used first.)
+    hooks: Sequence[Hook] = ()
+    
+    # Attributes which are not pickled, and set up again in other process.
+    _RUNTIME_ATTRS = [
+        '_debug', '_dispatcher', '_async_dispatcher', '_parse', '_semaphores', '_response_caches', '_pattern_key',
+        '_thread_pool', '_process_pool',
+    ]
+    
+    def __init__(
+            self, logger: Logger = None, concurrency: Optional[int] = None,
+            thread_pool: Executor = None, process_pool: Executor = None, parse_cache: ParseCache = None,
+            metrics: Metrics = None, hooks: Sequence[Hook] = (), registry: StatusCodeRegistry = None
+    ):
+        """
+        Note that debug logs are written only if the logger has a handler except NullHandler
+        when the pattern is instantiated.
         
-        self._on_message: Dict[str, FuncSpeechArg] = {
-            status_code: get_func(func_name)
-            for status_code, func_name in self._func_name_on_message.items()
+        :param logger: Logger for the pattern.
+        :param concurrency: Maximum number of requests handled concurrently by `acall`. (Unlimited if None.)
+        :param thread_pool: Executor for functions offloaded to 'thread'. (Created when it is needed if None.)
+        :param process_pool: Executor for functions offloaded to 'process'. (Created when it is needed if None.)
+        :param parse_cache: Cache of parsed speeches to parse raw texts. (Optional)
+        :param metrics: Metrics to count requests and observe latency of handlers. (Optional)
+        :param hooks: Hooks invoked for this instance after hooks of the class.
+        :param registry: Status codes to accept. (`status_codes` if None. Same as the one of parse_cache if given.)
+        """
+        if parse_cache is not None and registry is not None and parse_cache.registry is not registry:
+            raise ValueError('parse_cache must have the same registry.')
+        self._logger = _LOGGER if logger is None else logger
+        self._concurrency = concurrency
+        self._parse_cache = parse_cache
+        self._registry = registry
+        self._metrics = metrics
+        self._hooks = tuple(hooks)
+        self._setup()
+        self._thread_pool = thread_pool
+        self._process_pool = process_pool
+        self._own_executors: Tuple[Executor, ...] = ()  # Executors created by the pattern.
+    
+    def _setup(self):
+        self._debug = is_debug_enabled(self._logger)
+        self._dispatcher = type(self)._get_dispatcher(self._debug, False, self._metrics is not None, self._hooks)
+        self._async_dispatcher: Optional[_Dispatcher] = None  # Compiled when it is needed.
+        if self._parse_cache is not None:
+            self._parse = self._parse_cache.parse
+        elif self._registry is not None:
+            self._parse = partial(OptimizedSpeech.view, registry=self._registry)
+        else:
+            self._parse = _view  # User defined messages are split only if a handler reads them.
+        # Semaphores are bound to the event loop, so one is created for each running loop.
+        self._semaphores: 'WeakKeyDictionary[AbstractEventLoop, Semaphore]' = WeakKeyDictionary()
+        self._pattern_key = next(_PATTERN_KEYS)  # Key of the pattern in worker processes.
+        # Response caches of the instance, or of the class if they are shared.
+        self._response_caches: Dict[str, ResponseCache] = {
+            func_name: cache if cache.shared else cache.copy() for func_name, cache in self._func_name_cache.items()
         }
-        self._on_invalid_message: Optional[FuncStrArg] = \
-            get_func(self._func_name_on_invalid_message)
-        self._on_unregistered_message: Optional[FuncSpeechArg] = \
-            get_func(self._func_name_on_unregistered_message)
-        self._on_error: Optional[FuncExceptionArg] = \
-            get_func(self._func_name_on_error)
-        
-        self._logger = get_logger(__name__) if logger is None else logger
-
+    
+    def __getstate__(self):
+        state = dict(getattr(self, '__dict__', ()))
+        for attr in self._slot_names:
+            if attr not in self._RUNTIME_ATTRS and hasattr(self, attr):
+                state[attr] = getattr(self, attr)
+        for attr in self._RUNTIME_ATTRS:
+            state.pop(attr, None)
+        state['_own_executors'] = ()
+        return state
+    
+    def __setstate__(self, state):
+        for attr, value in state.items():
+            setattr(self, attr, value)
+        self._setup()
+        self._thread_pool = None
+        self._process_pool = None
+    
     @property
     def registered_status_codes(self):
-        return self._on_message.keys()
+        return self._status_codes
+    
+    @property
+    def metrics(self) -> Optional[Metrics]:
+        return self._metrics
+    
+    def cache_info(self) -> Dict[str, CacheInfo]:
+        """
+        Get counters of response caches for each function registered with `cache`.
+        Caches are of this instance, except ones shared by all instances of the class.
+        """
+        return {func_name: cache.cache_info() for func_name, cache in self._response_caches.items()}
     
     def __call__(self, request: Union[str, OptimizedSpeech], **kwargs) -> Any:
         """
@@ -77,37 +801,259 @@ class ResponsePattern(metaclass=ResponsePatternMeta):
         :param kwargs: Arguments to be given to the registered method.
         :return: Return from invoked handler.
         """
-
-        def _try_call(event: RequestEvent, func: Optional[Callable], *args) -> Any:
-            if func is None:
-                self._logger.debug(f'The function for {event} is None.')
-                return None
+        dispatcher = self._dispatcher
+        raw = request
+        if isinstance(request, str):
+            speech = self._parse(request)
+            if speech is None:
+                return dispatcher.on_invalid(self, request, kwargs, raw)
+            request = speech
+        
+        request: OptimizedSpeech
+        return dispatcher.routes[_CODE_INDEXES.get(request.status_code, _UNREGISTERED)](self, request, kwargs, raw)
+    
+    def parse(self, request: str) -> Optional[OptimizedSpeech]:
+        """
+        Parse a raw text in the same way as requests. (With the parse cache or the registry of the pattern.)
+        
+        :return: Return None if the request is invalid.
+        """
+        return self._parse(request)
+    
+    def reject(self, request: str, **kwargs) -> Any:
+        """
+        Get response messages of the function registered with ON_INVALID without parsing the request.
+        It is for requests rejected before parsing. (e.g. too long or not UTF-8. See `wire.SpeechDecoder`.)
+        
+        :param request: Raw text of the rejected request.
+        :param kwargs: Arguments to be given to the registered method.
+        :return: Return from invoked handler.
+        """
+        return self._dispatcher.on_invalid(self, request, kwargs, request)
+    
+    def dispatch_many(self, requests: Iterable[Union[str, OptimizedSpeech]], **kwargs) -> List[Any]:
+        """
+        Get responses of many requests at once.
+        Raw texts are parsed in bulk, and requests are grouped by the function they resolve to.
+        Functions registered with `batch=True` receive whole group at once.
+        Note that functions are invoked group by group in order of first appearance.
+        
+        :param requests: Raw texts or parsed speeches.
+        :param kwargs: Arguments to be given to the registered method.
+        :return: Return from invoked handlers in the original order.
+        """
+        requests = list(requests)
+        texts = [i for i, request in enumerate(requests) if isinstance(request, str)]
+        speeches: List[Optional[OptimizedSpeech]] = list(requests)
+        parse = self._parse
+        for i in texts:
+            speeches[i] = parse(requests[i])
+        
+        dispatcher = self._dispatcher
+        routes = dispatcher.routes
+        contents = dispatcher.contents
+        groups: Dict[Route, List[int]] = {}
+        for i, speech in enumerate(speeches):
+            if speech is None:
+                route = dispatcher.on_invalid
+            else:
+                route = routes[_CODE_INDEXES.get(speech.status_code, _UNREGISTERED)]
+                if contents and route in contents:
+                    route = contents[route](speech)  # Grouped by the matched function.
+            group = groups.get(route)
+            if group is None:
+                groups[route] = [i]
+            else:
+                group.append(i)
+        
+        responses: List[Any] = [None] * len(requests)
+        for route, group in groups.items():
+            batch_route = dispatcher.batches.get(route)
+            if batch_route is not None:
+                batch_responses = batch_route(
+                    self, [speeches[i] for i in group], kwargs, [requests[i] for i in group])
+                for i, response in zip(group, batch_responses):
+                    responses[i] = response
+            elif route is dispatcher.on_invalid:
+                for i in group:
+                    responses[i] = route(self, requests[i], kwargs, requests[i])
+            else:
+                for i in group:
+                    responses[i] = route(self, speeches[i], kwargs, requests[i])
+        return responses
+    
+    async def acall(self, request: Union[str, OptimizedSpeech], **kwargs) -> Any:
+        """
+        Get response messages asynchronously.
+        Coroutine functions are awaited, and other functions are called in the event loop.
+        
+        :param request: Raw text or parsed speech.
+        :param kwargs: Arguments to be given to the registered method.
+        :return: Return from invoked handler.
+        """
+        dispatcher = self._async_dispatcher
+        if dispatcher is None:
+            dispatcher = self._async_dispatcher = \
+                type(self)._get_dispatcher(self._debug, True, self._metrics is not None, self._hooks)
+        if self._concurrency is None:
+            return await self._adispatch(dispatcher, request, kwargs)
+        
+        loop = get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = Semaphore(self._concurrency)
+        async with semaphore:
+            return await self._adispatch(dispatcher, request, kwargs)
     
+    async def agather(self, requests: Iterable[Union[str, OptimizedSpeech]], **kwargs) -> List[Any]:
+        """
+        Get responses of many requests concurrently.
+        
+        :param requests: Raw texts or parsed speeches.
+        :param kwargs: Arguments to be given to the registered method.
+        :return: Return from invoked handlers in the original order.
+        """
+        return list(await gather(*[self.acall(request, **kwargs) for request in requests]))
+    
+    async def _adispatch(self, dispatcher: _Dispatcher, request: Union[str, OptimizedSpeech], kwargs: dict) -> Any:
+        raw = request
+        if isinstance(request, str):
+            speech = self._parse(request)
+            if speech is None:
+                return await dispatcher.on_invalid(self, request, kwargs, raw)
+            request = speech
+        
+        routes = dispatcher.routes
+        return await routes[_CODE_INDEXES.get(request.status_code, _UNREGISTERED)](self, request, kwargs, raw)
+    
+    def submit(self, request: Union[str, OptimizedSpeech], **kwargs) -> Future:
+        """
+        Get response messages as a future.
+        Functions registered with `offload` are invoked in the thread pool or the process pool,
+        and others are invoked immediately.
+        Note that the request and kwargs are pickled for the process pool, and the pattern is pickled
+        once for each worker process. So changes of the pattern in the function are not reflected,
+        and changes of the pattern after a worker received it are not reflected in the worker.
+        
+        :param request: Raw text or parsed speech.
+        :param kwargs: Arguments to be given to the registered method.
+        :return: Future of return from invoked handler.
+        """
+        dispatcher = self._dispatcher
+        raw = request
+        if isinstance(request, str):
+            speech = self._parse(request)
+            if speech is None:
+                return self._completed(dispatcher.on_invalid(self, request, kwargs, raw))
+            request = speech
+        
+        route = dispatcher.routes[_CODE_INDEXES.get(request.status_code, _UNREGISTERED)]
+        resolve = dispatcher.contents.get(route)
+        if resolve is not None:
+            route = resolve(request)
+        offload = dispatcher.offloads.get(route)
+        if offload is None:
+            return self._completed(route(self, request, kwargs, raw))
+        
+        executor_type, func_name = offload
+        if executor_type == RequestEvent.OFFLOAD_THREAD:
+            return self._get_executor(executor_type).submit(route, self, request, kwargs, raw)
+        
+        # Hooks are invoked in this process because the route is not invoked in this process.
+        event = RequestEvent.ON_MESSAGE
+        hooks = dispatcher.hooks
+        invoked = 0
+        try:
+            result, invoked = _run_before(hooks, raw, request, event, func_name)
+            if result is not Hook.PROCEED:
+                return self._completed(_run_after(hooks, invoked, raw, request, event, func_name, result))
+        except BaseException as e:
+            return self._completed(dispatcher.handle_error(self, event, e, kwargs))
+        
+        if self._metrics is not None:
+            self._metrics.shard().count(str(event), request.status_code)
+        
+        # Cached responses are looked up in this process, and responses from other process are cached here.
+        cache = self._response_caches.get(func_name)
+        key = None if cache is None else cache.key(request, kwargs)
+        if key is not None:
+            result = cache.get(key)
+            if result is not ResponseCache.MISSING:
+                try:
+                    return self._completed(_run_after(hooks, invoked, raw, request, event, func_name, result))
+                except BaseException as e:
+                    return self._completed(dispatcher.handle_error(self, event, e, kwargs))
+        
+        # Exceptions raised in other process are given to the error handler in this process.
+        # The pattern is sent only to workers which have not received it. (Other executors share the pattern.)
+        executor = self._get_executor(executor_type)
+        pattern_key = self._pattern_key
+        shared = None if isinstance(executor, ProcessPoolExecutor) else self
+        future = executor.submit(_call_offloaded, pattern_key, shared, func_name, request, kwargs)
+        response = Future()
+        response.set_running_or_notify_cancel()
+        
+        def done(f: Future):
             try:
-                self._logger.debug(f'Invoke the function for {event}')
-                return func(*args, **kwargs)
+                result = f.result()
+                if result is _PatternMissing:
+                    executor.submit(_call_offloaded, pattern_key, self, func_name, request, kwargs) \
+                        .add_done_callback(done)
+                    return
+                if key is not None:
+                    cache.put(key, result)
             except BaseException as e:
-                self._logger.exception(f'An exception raised while handling {event}.')
-                if self._on_error is None:
-                    self._logger.debug(f'The function for {RequestEvent.ON_ERROR} is None.')
-                    return None
-                try:
-                    self._logger.debug(f'Invoke the function for {RequestEvent.ON_ERROR}')
-                    return self._on_error(e, **kwargs)
-                except BaseException as e2:
-                    self._logger.exception(f'An exception raised while handling {RequestEvent.ON_ERROR}.')
-                    return None
-
-        if isinstance(request, str):
-            r = request
-            request = OptimizedSpeech.parse(request)
-            if request is None:
-                return _try_call(RequestEvent.ON_INVALID, self._on_invalid_message, r)
-            
-        request: OptimizedSpeech
-
-        func = self._on_message.get(request.status_code)
-        if func is None:
-            return _try_call(RequestEvent.ON_UNREGISTERED, self._on_unregistered_message, request)
+                result = dispatcher.handle_error(self, event, e, kwargs)  # Given to hooks as same as other routes.
+            try:
+                response.set_result(_run_after(hooks, invoked, raw, request, event, func_name, result))
+            except BaseException as e:
+                response.set_result(dispatcher.handle_error(self, event, e, kwargs))
         
-        return _try_call(RequestEvent.ON_MESSAGE, func, request)
+        future.add_done_callback(done)
+        return response
+    
+    @staticmethod
+    def _completed(result: Any) -> Future:
+        future = Future()
+        future.set_running_or_notify_cancel()
+        future.set_result(result)
+        return future
+    
+    def _get_executor(self, executor_type: str) -> Executor:
+        attr = '_thread_pool' if executor_type == RequestEvent.OFFLOAD_THREAD else '_process_pool'
+        executor = getattr(self, attr)
+        if executor is None:
+            with _EXECUTOR_LOCK:
+                executor = getattr(self, attr)
+                if executor is None:
+                    if executor_type == RequestEvent.OFFLOAD_THREAD:
+                        executor = ThreadPoolExecutor()
+                    else:
+                        executor = ProcessPoolExecutor()
+                    self._own_executors += (executor,)
+                    setattr(self, attr, executor)
+        return executor
+    
+    def shutdown(self, wait: bool = True):
+        """
+        Shutdown executors created by the pattern.
+        Executors given to the constructor are not shutdown.
+        
+        :param wait: Wait for pending functions.
+        """
+        with _EXECUTOR_LOCK:
+            executors = self._own_executors
+            for executor in executors:
+                if self._thread_pool is executor:
+                    self._thread_pool = None
+                if self._process_pool is executor:
+                    self._process_pool = None
+            self._own_executors = ()
+        for executor in executors:  # Outside the lock, which is shared by all patterns.
+            executor.shutdown(wait)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
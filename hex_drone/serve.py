@@ -0,0 +1,286 @@
+"""
+Serve ResponsePattern over a TCP or Unix socket. Each line is a speech, and each response is written as lines.
+Requests of a connection are pipelined: they are handled concurrently, and responses are written in order of requests.
+The server is shut down gracefully when a speech of the shutdown code (Code 098 by default) arrives.
+
+$ python -m hex_drone.serve example.drone_bot:ItsResponsePattern 3064 --port 3064
+$ python -m hex_drone.serve example.drone_bot:ItsResponsePattern 3064 --unix /tmp/drone.sock
+"""
+
+import asyncio
+import sys
+from argparse import ArgumentParser
+from importlib import import_module
+from .logs import get_logger
+from .optimized_speech import OptimizedSpeech, _CODE_START, _CODE_END
+from .response_pattern import ResponsePattern
+from logging import Logger
+from typing import Any, List, Optional, Set
+
+SHUTDOWN = '098'
+
+_logger = get_logger(__name__)
+_NOTHING = object()
+
+
+def render(response: Any) -> bytes:
+    """
+    Render a response to lines. Each item of a list or a tuple is a line, and None is skipped.
+    """
+    if response is None:
+        return b''
+    if isinstance(response, (list, tuple)):
+        return b''.join([_render_line(v) for v in response if v is not None])
+    return _render_line(response)
+
+
+def _render_line(response: Any) -> bytes:
+    if isinstance(response, OptimizedSpeech):
+        return bytes(response) + b'\n'  # Prerendered template is used if it is cached.
+    if isinstance(response, bytes):
+        return response + b'\n'
+    return str(response).encode('utf-8') + b'\n'
+
+
+class SpeechServer:
+    """
+    Line protocol server of ResponsePattern.
+    Requests are handled by `ResponsePattern.acall`, so coroutine functions of a connection run concurrently.
+    Each connection has at most `max_pending` requests whose responses are not written yet. Reading from the socket
+    is paused while it is full, so a client which does not read responses is slowed down by TCP flow control.
+    Responses which are ready at once are written to the socket at once.
+    """
+    
+    def __init__(
+            self, pattern: ResponsePattern, max_pending: int = 64, shutdown_code: Optional[str] = SHUTDOWN,
+            limit: int = 65536, logger: Logger = None
+    ):
+        """
+        :param pattern: Pattern to handle requests.
+        :param max_pending: Maximum number of requests in progress for each connection.
+        :param shutdown_code: Status code of a valid speech to shut down the server. (Never if None.)
+        :param limit: Maximum bytes of a line. The connection is closed if a line is longer than it.
+        :param logger: Logger for the server.
+        """
+        if max_pending < 1:
+            raise ValueError('max_pending must be positive.')
+        self._pattern = pattern
+        self._max_pending = max_pending
+        self._shutdown_code = shutdown_code
+        self._limit = limit
+        self._logger = _logger if logger is None else logger
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._receivers: Set[asyncio.Task] = set()
+        self._closing = False
+        self._closed: Optional[asyncio.Event] = None  # Created in the event loop.
+    
+    async def start(self, host: str = None, port: int = None, path: str = None) -> 'SpeechServer':
+        """
+        Start listening on a TCP socket, or on a Unix socket if `path` is given.
+        
+        :param host: Host to listen on.
+        :param port: Port to listen on. (0 to choose a free port. See `sockets`.)
+        :param path: Path of the Unix socket.
+        """
+        self._closed = asyncio.Event()
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._handle, path, limit=self._limit)
+        else:
+            self._server = await asyncio.start_server(self._handle, host, port, limit=self._limit)
+        return self
+    
+    @property
+    def sockets(self) -> List:
+        return [] if self._server is None else list(self._server.sockets)
+    
+    def shutdown(self):
+        """
+        Stop accepting connections and reading requests.
+        Connections are closed after responses of received requests are written.
+        """
+        if self._closing:
+            return
+        self._closing = True
+        self._logger.info('Shutting down.')
+        if self._server is not None:
+            self._server.close()
+        for receiver in self._receivers:
+            receiver.cancel()
+        if not self._receivers and self._closed is not None:
+            self._closed.set()
+    
+    async def wait_closed(self):
+        """
+        Wait until the server is shut down and all connections are closed.
+        It returns at once if the server is not started.
+        """
+        if self._closed is None:
+            return
+        await self._closed.wait()
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+        await self.wait_closed()
+    
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        if self._closing:
+            writer.close()
+            return
+        
+        queue: asyncio.Queue = asyncio.Queue()  # Tasks of requests in order, and None at the end.
+        slots = asyncio.Semaphore(self._max_pending)  # Released when the response is written.
+        receiver = asyncio.create_task(self._receive(reader, queue, slots))
+        self._receivers.add(receiver)
+        sender = asyncio.create_task(self._send(queue, slots, writer, receiver))
+        try:
+            await receiver
+        except asyncio.CancelledError:
+            pass  # Shut down, or the connection is lost.
+        except Exception:
+            self._logger.exception('An exception raised while reading requests.')
+        finally:
+            self._receivers.discard(receiver)
+            queue.put_nowait(None)
+            await sender
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+            if self._closing and not self._receivers:
+                self._closed.set()
+    
+    async def _receive(self, reader: asyncio.StreamReader, queue: asyncio.Queue, slots: asyncio.Semaphore):
+        acall = self._pattern.acall
+        code = self._shutdown_code
+        limit = self._limit
+        buffer = b''
+        while True:
+            data = await reader.read(limit)
+            if data:
+                lines = data.split(b'\n')
+                if buffer:
+                    # Checked before joining, so a line is never longer than the limit.
+                    if len(buffer) + len(lines[0]) > limit:
+                        self._logger.warning('A line is longer than %d bytes. The connection is closed.', limit)
+                        return
+                    lines[0] = buffer + lines[0]
+                buffer = lines.pop()
+            elif buffer:
+                lines, buffer = [buffer], b''  # The last line is not terminated by a newline.
+            else:
+                return
+            
+            for line in lines:
+                text = line.decode('utf-8', errors='replace')
+                if text.endswith('\r'):
+                    text = text[:-1]
+                await slots.acquire()  # Wait while `max_pending` requests are in progress.
+                queue.put_nowait(asyncio.create_task(acall(text)))
+                
+                if code is not None and text[_CODE_START:_CODE_END] == code and self._pattern.parse(text) is not None:
+                    self.shutdown()
+                    return
+    
+    async def _send(
+            self, queue: asyncio.Queue, slots: asyncio.Semaphore, writer: asyncio.StreamWriter, receiver: asyncio.Task
+    ):
+        # Responses are written in order of requests. Responses already completed are joined and written at once.
+        logger = self._logger
+        pending = _NOTHING
+        while True:
+            task = await queue.get() if pending is _NOTHING else pending
+            pending = _NOTHING
+            if task is None:
+                return
+            
+            chunks = [await self._result(task)]
+            while True:
+                try:
+                    task = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if task is None or not task.done():
+                    pending = task
+                    break
+                chunks.append(await self._result(task))
+            
+            data = b''.join(chunks)
+            if data:
+                try:
+                    writer.write(data)
+                    await writer.drain()  # Wait while the client does not read responses.
+                except (ConnectionError, OSError) as e:
+                    logger.warning('The connection is lost: %r', e)
+                    receiver.cancel()
+                    self._discard(queue, pending)
+                    return
+            for _ in chunks:
+                slots.release()
+    
+    async def _result(self, task: asyncio.Task) -> bytes:
+        try:
+            return render(await task)
+        except asyncio.CancelledError:
+            return b''
+        except Exception:
+            self._logger.exception('An exception raised while handling a request.')
+            return b''
+    
+    @staticmethod
+    def _discard(queue: asyncio.Queue, pending):
+        if pending is not _NOTHING and pending is not None:
+            pending.cancel()
+        while not queue.empty():
+            task = queue.get_nowait()
+            if task is not None:
+                task.cancel()
+
+
+def _load_pattern(target: str, args: List[str]) -> ResponsePattern:
+    # 'module:attr' of a pattern, or of a class or a function to create it with `args`.
+    module_name, sep, attr = target.partition(':')
+    if not sep or not attr:
+        raise ValueError(f'Target must be module:PatternClass, but it is {target!r}.')
+    obj = import_module(module_name)
+    for name in attr.split('.'):
+        obj = getattr(obj, name)
+    pattern = obj if isinstance(obj, ResponsePattern) else obj(*args)
+    if not isinstance(pattern, ResponsePattern):
+        raise TypeError(f'{target} is not ResponsePattern.')
+    return pattern
+
+
+async def _serve(server: SpeechServer, host: str, port: int, path: Optional[str]):
+    await server.start(host, port, path)
+    for sock in server.sockets:
+        print(f'Serving on {sock.getsockname()}', file=sys.stderr, flush=True)
+    await server.wait_closed()
+
+
+def _main(argv: List[str] = None):
+    parser = ArgumentParser(prog='python -m hex_drone.serve', description='Serve ResponsePattern over a socket.')
+    parser.add_argument('target', help='module:PatternClass, or module:pattern of an instance.')
+    parser.add_argument('args', nargs='*', help='Arguments to instantiate the pattern class.')
+    parser.add_argument('--host', default='127.0.0.1', help='Host to listen on.')
+    parser.add_argument('--port', type=int, default=3064, help='Port to listen on. (0 to choose a free port.)')
+    parser.add_argument('--unix', help='Path of a Unix socket to listen on instead of TCP.')
+    parser.add_argument('--max-pending', type=int, default=64, help='Requests in progress for each connection.')
+    parser.add_argument(
+        '--shutdown-code', default=SHUTDOWN, help='Status code to shut down the server. (Empty to disable.)')
+    args = parser.parse_args(argv)
+    
+    sys.path.insert(0, '')  # Patterns are imported from the current directory, as same as `python -m`.
+    pattern = _load_pattern(args.target, args.args)
+    server = SpeechServer(pattern, args.max_pending, args.shutdown_code or None)
+    try:
+        asyncio.run(_serve(server, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    _main()
@@ -3,15 +3,140 @@ A list of ⬡-Drone status codes to assist in ⬡-Drone communication.
 See https://www.hexcorp.net/drone-status-codes.
 """
 
-from typing import Dict
+import json
+from sys import intern
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+
+# Number of status codes. ('000' to '999')
+CODE_COUNT = 1000
 
 
 class StatusCodeData:
-    def __init__(self, status_code: str, status_message: str, predefined_message: str):
-        self.status_code = status_code
-        self.status_message = status_message
-        self.predefined_message = predefined_message
+    """
+    Immutable data of a status code. Messages are interned.
+    """
+    
+    __slots__ = ('status_code', 'status_message', 'predefined_message', 'index', 'prefixes')
+    
+    def __init__(self, status_code: str, status_message: str, predefined_message: Optional[str]):
+        init = object.__setattr__
+        init(self, 'status_code', intern(status_code))
+        init(self, 'status_message', intern(status_message))
+        init(self, 'predefined_message', None if predefined_message is None else intern(predefined_message))
+        # Integer status code. (None if it is not 3 digits.)
+        init(self, 'index', int(status_code) if len(status_code) == 3 and status_code.isdecimal() else None)
+        # Tokens which can be omitted from the head of user defined messages.
+        init(self, 'prefixes', (self.status_message, self.predefined_message))
+    
+    def __setattr__(self, key, value):
+        raise AttributeError(f'{type(self).__name__} is immutable.')
+    
+    def __delattr__(self, key):
+        raise AttributeError(f'{type(self).__name__} is immutable.')
+    
+    def __reduce__(self):
+        return StatusCodeData, (self.status_code, self.status_message, self.predefined_message)
+    
+    def __repr__(self):
+        return f'StatusCodeData({self.status_code!r}, {self.status_message!r}, {self.predefined_message!r})'
+
+
+class StatusCodeRegistry(Mapping[str, StatusCodeData]):
+    """
+    Immutable table of status codes, which is a mapping from 3 digits status code to its data.
+    It is also indexed by the integer status code and by messages.
+    """
+    
+    def __init__(self, codes: Iterable[StatusCodeData] = ()):
+        """
+        :param codes: Data of status codes. Later one is used if a status code is duplicated.
+        """
+        self._codes: Dict[str, StatusCodeData] = {}
+        for data in codes:
+            if data.index is None:
+                raise ValueError(f'Status code must be 3 digits: {data.status_code!r}')
+            self._codes[data.status_code] = data
+        self._codes = dict(sorted(self._codes.items()))
         
+        table: List[Optional[StatusCodeData]] = [None] * CODE_COUNT
+        by_status: Dict[str, List[str]] = {}
+        by_predefined: Dict[str, str] = {}
+        for code, data in self._codes.items():
+            table[data.index] = data
+            by_status.setdefault(data.status_message, []).append(code)
+            if data.predefined_message is not None:
+                by_predefined.setdefault(data.predefined_message, code)
+        self._table: Tuple[Optional[StatusCodeData], ...] = tuple(table)
+        self._by_status: Dict[str, Tuple[str, ...]] = {k: tuple(v) for k, v in by_status.items()}
+        self._by_predefined = by_predefined
+        
+        # Bound methods of dict are faster than methods of Mapping.
+        self.get = self._codes.get
+    
+    def __getitem__(self, status_code: str) -> StatusCodeData:
+        return self._codes[status_code]
+    
+    def __contains__(self, status_code) -> bool:
+        return status_code in self._codes
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._codes)
+    
+    def __len__(self) -> int:
+        return len(self._codes)
+    
+    def __repr__(self):
+        return f'StatusCodeRegistry({list(self._codes.values())!r})'
+    
+    def __reduce__(self):
+        return StatusCodeRegistry, (list(self._codes.values()),)
+    
+    @property
+    def table(self) -> Tuple[Optional[StatusCodeData], ...]:
+        """
+        Data indexed by the integer status code. (None for status codes which do not exist.)
+        """
+        return self._table
+    
+    def codes_by_status_message(self, status_message: str) -> Tuple[str, ...]:
+        """
+        Get status codes which have the status message. (e.g. 'Statement')
+        """
+        return self._by_status.get(status_message, ())
+    
+    def code_by_predefined_message(self, predefined_message: str) -> Optional[str]:
+        """
+        Get the status code which has the predefined message. (The first one if there are many.)
+        """
+        return self._by_predefined.get(predefined_message)
+    
+    def is_prefix(self, status_code: str, token: str) -> bool:
+        """
+        Check the token is the status message or the predefined message of the status code.
+        """
+        data = self._codes.get(status_code)
+        return data is not None and token is not None and token in data.prefixes
+    
+    def extend(self, codes: Iterable[Union[StatusCodeData, Tuple[str, str, Optional[str]]]]) -> 'StatusCodeRegistry':
+        """
+        Get new registry which has additional status codes. This registry is not changed.
+        
+        :param codes: Data or (status code, status message, predefined message). Existing status codes are replaced.
+        """
+        additional = [data if isinstance(data, StatusCodeData) else StatusCodeData(*data) for data in codes]
+        return StatusCodeRegistry([*self._codes.values(), *additional])
+    
+    def load(self, path: str) -> 'StatusCodeRegistry':
+        """
+        Get new registry which has additional status codes loaded from JSON file. This registry is not changed.
+        The file has a list of [status code, status message, predefined message or null].
+        """
+        with open(path, encoding='utf-8') as f:
+            codes = json.load(f)
+        if not isinstance(codes, list) or not all(isinstance(v, list) and len(v) == 3 for v in codes):
+            raise ValueError(f'{path} must have a list of [status code, status message, predefined message].')
+        return self.extend(codes)
+
 
 _status_codes = [
     ['000', 'Statement', 'Previous statement malformed/mistimed. Retracting and correcting.'],
@@ -90,5 +215,5 @@ _status_codes = [
     ['450', 'Error', None],
     ['451', 'Error', 'Unable to obey/respond for legal reasons! Do not continue!!'],
 ]
-status_codes: Dict[str, StatusCodeData] = {v[0]: StatusCodeData(*v) for v in _status_codes}
+status_codes = StatusCodeRegistry(StatusCodeData(*v) for v in _status_codes)
 del _status_codes
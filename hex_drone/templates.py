@@ -0,0 +1,131 @@
+"""
+Prerendered prefixes of speeches, keyed on drone ID and status code.
+"""
+
+from .status_codes import status_codes, StatusCodeData
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Optional, Tuple
+
+_SEPARATOR = ' :: '
+_SEPARATOR_BYTES = b' :: '
+
+
+class SpeechTemplate:
+    """
+    Rendered prefix of a speech: '[DRONE ID] :: Code [STATUS CODE] :: [STATUS MESSAGE] :: [PREDEFINED MESSAGE]'
+    """
+    
+    __slots__ = ('drone_id', 'data', 'text', 'text_bytes', 'prefix_bytes')
+    
+    def __init__(self, drone_id: str, data: StatusCodeData):
+        """
+        :param drone_id: 4 digit of ⬡-Drone ID.
+        :param data: Status code data.
+        """
+        v = [drone_id, 'Code ' + data.status_code, data.status_message]
+        if data.predefined_message is not None:
+            v.append(data.predefined_message)
+        self.drone_id = drone_id
+        self.data = data
+        self.text = _SEPARATOR.join(v)
+        self.text_bytes = self.text.encode('utf-8')
+        self.prefix_bytes = self.text_bytes + _SEPARATOR_BYTES  # Followed by user defined messages.
+    
+    def render(self, *user_defined_messages: str) -> str:
+        """
+        Render the speech with user defined messages.
+        """
+        if not user_defined_messages:
+            return self.text
+        return self.text + _SEPARATOR + _SEPARATOR.join(user_defined_messages)
+    
+    def render_bytes(self, *user_defined_messages: str) -> bytes:
+        """
+        Render the speech with user defined messages as UTF-8 bytes.
+        """
+        if not user_defined_messages:
+            return self.text_bytes
+        return self.prefix_bytes + _SEPARATOR.join(user_defined_messages).encode('utf-8')
+
+
+class TemplateCache:
+    """
+    Cache of SpeechTemplate used by `OptimizedSpeech.build`, keyed on drone ID and status code.
+    Templates of prewarmed drone IDs are kept, and templates of other drone IDs are kept in a bounded LRU cache,
+    so the cache does not grow under random drone IDs. It is safe to use from multiple threads.
+    """
+    
+    def __init__(self, maxsize: int = 4096):
+        """
+        :param maxsize: Maximum number of templates of drone IDs which are not prewarmed.
+            The least recently used one is evicted.
+        """
+        if maxsize < 1:
+            raise ValueError('maxsize must be positive.')
+        self._maxsize = maxsize
+        self._prewarmed: Dict[str, Dict[str, SpeechTemplate]] = {}
+        self._recent: 'OrderedDict[Tuple[str, str], SpeechTemplate]' = OrderedDict()
+        self._lock = Lock()
+    
+    def get(self, drone_id: str, status_code: str) -> Optional[SpeechTemplate]:
+        """
+        Get the template, and cache it if it is not cached.
+        
+        :param drone_id: 4 digit of ⬡-Drone ID.
+        :param status_code: 3 digit of ⬡-Drone status code.
+        :return: Return None if no such status code exists.
+        """
+        template = self.find(drone_id, status_code)
+        if template is not None:
+            return template
+        
+        data = status_codes.get(status_code)
+        if data is None:
+            return None
+        template = SpeechTemplate(drone_id, data)
+        recent = self._recent
+        with self._lock:
+            recent[drone_id, status_code] = template
+            if len(recent) > self._maxsize:
+                recent.popitem(last=False)
+        return template
+    
+    def find(self, drone_id: str, status_code: str) -> Optional[SpeechTemplate]:
+        """
+        Get the template only if it is cached.
+        """
+        prewarmed = self._prewarmed.get(drone_id)
+        if prewarmed is not None:
+            return prewarmed.get(status_code)
+        
+        # Each call of OrderedDict is atomic, so only adding and evicting are locked to keep the size.
+        key = (drone_id, status_code)
+        recent = self._recent
+        template = recent.get(key)
+        if template is not None:
+            try:
+                recent.move_to_end(key)
+            except KeyError:
+                pass  # Evicted by another thread.
+        return template
+    
+    def prewarm(self, *drone_ids: str):
+        """
+        Cache templates of all status codes for the drone IDs. They are kept until `clear`.
+        """
+        for drone_id in drone_ids:
+            self._prewarmed[drone_id] = {
+                status_code: SpeechTemplate(drone_id, data) for status_code, data in status_codes.items()
+            }
+    
+    def __len__(self):
+        return sum(map(len, self._prewarmed.values())) + len(self._recent)
+    
+    def clear(self):
+        with self._lock:
+            self._prewarmed.clear()
+            self._recent.clear()
+
+
+templates = TemplateCache()
@@ -0,0 +1,263 @@
+"""
+Streams of OptimizedSpeech: binary frames (See `OptimizedSpeech.to_bytes`.) and UTF-8 lines of text.
+"""
+
+from .optimized_speech import OptimizedSpeech, _decode, _encode, _parse, _FRAME_HEADER, _STRING_LENGTH
+from .parse_cache import ParseCache
+from .status_codes import status_codes, StatusCodeRegistry
+from typing import Any, Callable, Iterable, List, Optional, Tuple, Union
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+def encode_many(speeches: Iterable[OptimizedSpeech], registry: StatusCodeRegistry = None) -> bytes:
+    """
+    Encode speeches to concatenated frames.
+    
+    :param registry: Status codes shared with the decoder. (`status_codes` if None.)
+    """
+    get_data = status_codes.get if registry is None else registry.get
+    return b''.join([_encode(speech, get_data) for speech in speeches])
+
+
+def decode_frames(data: Buffer, registry: StatusCodeRegistry = None) -> Tuple[List[OptimizedSpeech], int]:
+    """
+    Decode complete frames at the head of the data.
+    
+    :param data: Concatenated frames. The last one may be incomplete.
+    :param registry: Status codes shared with the encoder. (`status_codes` if None.)
+    :return: Return decoded speeches and the number of consumed bytes. Raise ValueError if a frame is broken.
+    """
+    with memoryview(data) as view:
+        return _decode_frames(view, (status_codes if registry is None else registry).table)
+
+
+def _decode_frames(view: memoryview, table) -> Tuple[List[OptimizedSpeech], int]:
+    speeches = []
+    offset, size = 0, len(view)
+    header_size = _FRAME_HEADER.size
+    unpack = _STRING_LENGTH.unpack_from  # Body length is same format as string length.
+    while size - offset >= header_size:
+        length, = unpack(view, offset)
+        if size - offset - 4 < length:
+            break  # Incomplete frame.
+        speech, offset = _decode(view, offset, table)
+        speeches.append(speech)
+    return speeches, offset
+
+
+class FrameDecoder:
+    """
+    Decoder of a stream of frames which may be split at any bytes. (e.g. from a socket or a pipe)
+    Frames are decoded from given data directly, and only an incomplete frame is buffered.
+    """
+    
+    def __init__(self, registry: StatusCodeRegistry = None):
+        """
+        :param registry: Status codes shared with the encoder. (`status_codes` if None.)
+        """
+        self._registry = registry
+        self._table = (status_codes if registry is None else registry).table
+        self._buffer = bytearray()
+    
+    def feed(self, data: Buffer) -> List[OptimizedSpeech]:
+        """
+        Decode frames completed by the data.
+        
+        :return: Return decoded speeches. Raise ValueError if a frame is broken.
+        """
+        buffer = self._buffer
+        if not buffer:
+            with memoryview(data) as view:
+                speeches, consumed = _decode_frames(view, self._table)
+                if consumed < len(view):
+                    buffer += view[consumed:]
+            return speeches
+        
+        buffer += data
+        with memoryview(buffer) as view:
+            speeches, consumed = _decode_frames(view, self._table)
+        del buffer[:consumed]
+        return speeches
+    
+    @property
+    def pending(self) -> int:
+        """
+        Number of buffered bytes of an incomplete frame.
+        """
+        return len(self._buffer)
+    
+    def reset(self):
+        self._buffer.clear()
+
+
+class _RejectedLine(str):
+    pass
+
+
+class SpeechDecoder:
+    """
+    Decoder of a stream of speeches in UTF-8 lines which may be split at any bytes, even in a character.
+    Complete lines are decoded and parsed at once from given data, and only an incomplete line is buffered.
+    Lines which are not speeches, longer than `max_line` bytes or not UTF-8 are given to `reject` instead.
+    (e.g. `ResponsePattern.reject` to respond them by the function registered with ON_INVALID.)
+    """
+    
+    def __init__(
+            self, reject: Callable[[str], Any] = None, max_line: int = 65536, cache: ParseCache = None,
+            registry: StatusCodeRegistry = None
+    ):
+        """
+        :param reject: Function to receive an invalid line. Overlong lines are truncated, and undecodable bytes
+                       are replaced with U+FFFD. (Discarded if None.)
+        :param max_line: Maximum bytes of a line without the newline. Longer lines are not buffered.
+        :param cache: Cache of parsed speeches. (Optional)
+        :param registry: Status codes to accept. (`status_codes` if None. Ignored if cache is given.)
+        """
+        if max_line < 1:
+            raise ValueError('max_line must be positive.')
+        self._reject = reject
+        self._max_line = max_line
+        self._cache = cache
+        self._get_data = (status_codes if registry is None else registry).get
+        self._buffer = bytearray()
+        self._skipping = False  # Rest of an overlong line is skipped until the newline.
+        self._rejected = 0
+    
+    def feed(self, data: Buffer) -> List[OptimizedSpeech]:
+        """
+        Decode and parse lines completed by the data. Lines are split only by '\\n', and '\\r' before it is removed.
+        
+        :return: Return valid speeches in order.
+        """
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        buffer = self._buffer
+        end = data.rfind(b'\n')
+        if end < 0:
+            self._append(data)
+            return []
+        
+        speeches = []
+        start = 0
+        if buffer or self._skipping:
+            # The first line is completed by the buffered head.
+            start = data.find(b'\n') + 1
+            self._append(data[:start - 1])
+            if not self._skipping:
+                self._parse_region(bytes(buffer), speeches)
+            buffer.clear()
+            self._skipping = False
+        
+        if start <= end:
+            with memoryview(data) as view:
+                self._parse_region(view[start:end], speeches)
+        self._append(data[end + 1:])
+        return speeches
+    
+    def flush(self) -> List[OptimizedSpeech]:
+        """
+        Decode and parse the buffered line as the last line of the stream. (e.g. when the connection is closed.)
+        
+        :return: Return valid speeches. (One at most.)
+        """
+        speeches = []
+        if self._buffer and not self._skipping:
+            self._parse_region(bytes(self._buffer), speeches)
+        self.reset()
+        return speeches
+    
+    @property
+    def pending(self) -> int:
+        """
+        Number of buffered bytes of an incomplete line.
+        """
+        return len(self._buffer)
+    
+    @property
+    def rejected(self) -> int:
+        """
+        Number of rejected lines.
+        """
+        return self._rejected
+    
+    def reset(self):
+        self._buffer.clear()
+        self._skipping = False
+    
+    def _append(self, data: Buffer):
+        # Buffer the head of an incomplete line, and reject it once it exceeds `max_line`.
+        if self._skipping or not data:
+            return
+        buffer = self._buffer
+        buffer += data
+        if len(buffer) > self._max_line:
+            self._skipping = True
+            self._reject_line(bytes(buffer[:self._max_line]).decode('utf-8', errors='replace'))
+            buffer.clear()
+    
+    def _parse_region(self, region: Buffer, speeches: List[OptimizedSpeech]):
+        # Complete lines joined by '\n' are decoded at once. Each line is decoded only if the region is not UTF-8.
+        try:
+            text = str(region, 'utf-8')
+        except UnicodeDecodeError:
+            self._parse_lines(self._check_lines(bytes(region).split(b'\n'), None), speeches)
+            return
+        
+        texts = text.split('\n')
+        if len(region) > self._max_line and max(map(len, texts)) * 4 > self._max_line:
+            # A line of n characters is n to 4n bytes, so bytes are counted only if it may be too long.
+            self._parse_lines(self._check_lines(bytes(region).split(b'\n'), texts), speeches)
+            return
+        
+        if '\r' in text:
+            texts = [v[:-1] if v[-1:] == '\r' else v for v in texts]
+        if self._cache is None:
+            get_data = self._get_data
+            parsed = [_parse(v, get_data) for v in texts]
+        else:
+            parse = self._cache.parse
+            parsed = [parse(v) for v in texts]
+        valid = [speech for speech in parsed if speech is not None]
+        if len(valid) < len(parsed):
+            for v, speech in zip(texts, parsed):
+                if speech is None:
+                    self._reject_line(v)
+        speeches += valid
+    
+    def _parse_lines(self, texts: List[str], speeches: List[OptimizedSpeech]):
+        # Parse lines one by one in order, with lines marked by `_check_lines`.
+        cache = self._cache
+        get_data = self._get_data
+        for text in texts:
+            if type(text) is _RejectedLine:
+                self._reject_line(text)
+                continue
+            if text[-1:] == '\r':
+                text = text[:-1]
+            speech = _parse(text, get_data) if cache is None else cache.parse(text)
+            if speech is None:
+                self._reject_line(text)
+            else:
+                speeches.append(speech)
+    
+    def _check_lines(self, lines: List[bytes], texts: Optional[List[str]]) -> List[str]:
+        # Mark overlong or undecodable lines to be rejected in order of lines.
+        max_line = self._max_line
+        checked = []
+        for i, line in enumerate(lines):
+            if len(line) > max_line:
+                checked.append(_RejectedLine(line[:max_line].decode('utf-8', errors='replace')))
+            elif texts is not None:
+                checked.append(texts[i])
+            else:
+                try:
+                    checked.append(line.decode('utf-8'))
+                except UnicodeDecodeError:
+                    checked.append(_RejectedLine(line.decode('utf-8', errors='replace')))
+        return checked
+    
+    def _reject_line(self, text: str):
+        self._rejected += 1
+        if self._reject is not None:
+            self._reject(str(text))
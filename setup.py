@@ -16,5 +16,8 @@ setup(
     author='⬡-Drone #3064',
     author_email='hexdrone3064@gmail.com',
     description='Speech optimization for ⬡-Drones. | Good Drones Obey HexCorp',
-    long_description=readme
+    long_description=readme,
+    extras_require={
+        'numpy': ['numpy'],  # For hex_drone.batch
+    },
 )
@@ -0,0 +1,75 @@
+import unittest
+from hex_drone import OptimizedSpeech, status_codes
+
+try:
+    import numpy as np
+    from hex_drone.batch import SpeechBatch
+except ImportError:
+    np = None
+
+
+@unittest.skipIf(np is None, 'NumPy is not installed.')
+class TestSpeechBatch(unittest.TestCase):
+    lines = [
+        '1111 :: Code 050 :: Statement :: Obey.',
+        'invalid',
+        '2222 :: Code 052 :: Query :: a :: b',
+        '1111 :: Code 122 :: Statement :: You are cute.\n',
+        '3333 :: Code 050',
+        '2222 :: Code 200 :: Response :: Affirmative. :: ⬡',
+    ]
+    
+    def setUp(self):
+        self.batch = SpeechBatch.from_lines(self.lines)
+        self.speeches = [speech for speech in OptimizedSpeech.parse_many(self.lines) if speech is not None]
+    
+    def test_build(self):
+        self.assertEqual(len(self.batch), 5)
+        self.assertEqual(self.batch.to_speeches(), self.speeches)
+        self.assertEqual(SpeechBatch.from_speeches(self.speeches).to_speeches(), self.speeches)
+        self.assertEqual(self.batch.drone_ids.tolist(), [1111, 2222, 1111, 3333, 2222])
+        self.assertEqual(self.batch.status_codes.tolist(), [50, 52, 122, 50, 200])
+        self.assertEqual(self.batch.message_counts.tolist(), [1, 2, 1, 0, 1])
+        self.assertEqual(self.batch[-1], self.speeches[-1])
+        with self.assertRaises(IndexError):
+            _ = self.batch[5]
+        with self.assertRaises(ValueError):
+            self.batch.status_codes[0] = 1
+        
+        empty = SpeechBatch.from_lines([])
+        self.assertEqual((len(empty), empty.to_speeches(), empty.group_counts()), (0, [], {}))
+    
+    def test_filter(self):
+        self.assertEqual(self.batch.filter(status_codes=['050']).to_speeches(), [self.speeches[0], self.speeches[3]])
+        self.assertEqual(self.batch.filter(code_range=('100', '199')).to_speeches(), [self.speeches[2]])
+        self.assertEqual(
+            self.batch.filter(drone_ids=['2222'], code_range=('000', '099')).to_speeches(), [self.speeches[1]])
+        self.assertEqual(self.batch[self.batch.message_counts > 1].to_speeches(), [self.speeches[1]])
+        self.assertEqual(self.batch[1:3].to_speeches(), self.speeches[1:3])
+        self.assertEqual(self.batch[[4, 0]].to_speeches(), [self.speeches[4], self.speeches[0]])
+    
+    def test_group_counts(self):
+        self.assertEqual(self.batch.group_counts(), {'050': 2, '052': 1, '122': 1, '200': 1})
+        self.assertEqual(self.batch.group_counts('drone_id'), {'1111': 2, '2222': 2, '3333': 1})
+        self.assertEqual(self.batch.filter(status_codes=['050', '200']).group_counts(('drone_id', 'status_code')), {
+            ('1111', '050'): 1, ('2222', '200'): 1, ('3333', '050'): 1,
+        })
+        with self.assertRaises(ValueError):
+            self.batch.group_counts('message')
+    
+    def test_registry(self):
+        registry = status_codes.extend([('900', 'Status', 'Site specific.')])
+        batch = SpeechBatch.from_lines(['1111 :: Code 900 :: Hello'], registry)
+        self.assertEqual(str(batch[0]), '1111 :: Code 900 :: Status :: Site specific. :: Hello')
+        with self.assertRaises(ValueError):
+            SpeechBatch.from_speeches([batch[0]])
+    
+    def test_from_speeches__drone_id(self):
+        for drone_id in ('12', 'abcd', '12345'):
+            speeches = [self.speeches[0], OptimizedSpeech.build(drone_id, '050')]
+            with self.assertRaisesRegex(ValueError, f"Drone ID '{drone_id}' of speech 1"):
+                SpeechBatch.from_speeches(speeches)
+
+
+if __name__ == '__main__':
+    unittest.main()
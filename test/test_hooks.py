@@ -0,0 +1,174 @@
+import asyncio
+import unittest
+from typing import List
+from hex_drone import \
+    Hook, SamplingProfiler, ResponsePattern, OptimizedSpeech, RequestEvent as Ev
+
+
+class Recorder(Hook):
+    def __init__(self, name: str, records: list):
+        self.name = name
+        self.records = records
+    
+    def before(self, raw, speech, event, handler):
+        self.records.append(('before', self.name, raw, speech, str(event), handler))
+        return self.PROCEED
+    
+    def after(self, raw, speech, event, handler, result):
+        self.records.append(('after', self.name, result))
+        return result
+
+
+class Block(Hook):
+    def before(self, raw, speech, event, handler):
+        if speech is not None and speech.drone_id == '9999':
+            return 'blocked'
+        return self.PROCEED
+
+
+class Broken(Hook):
+    def before(self, raw, speech, event, handler):
+        raise ValueError()
+
+
+class HookedPattern(ResponsePattern):
+    hooks = [Block()]
+    
+    @Ev.ON_MESSAGE('050')
+    def obey(self, request: OptimizedSpeech):
+        return 'obey'
+    
+    @Ev.ON_MESSAGE('052')
+    async def query(self, request: OptimizedSpeech):
+        return 'query'
+    
+    @Ev.ON_MESSAGE('210', batch=True)
+    def thanks(self, requests: List[OptimizedSpeech]):
+        return ['thanks'] * len(requests)
+    
+    @Ev.ON_MESSAGE('200', offload=Ev.OFFLOAD_PROCESS)
+    def response(self, request: OptimizedSpeech):
+        return 'response'
+    
+    @Ev.ON_ERROR
+    def error(self, error: BaseException):
+        return 'error'
+
+
+class TestHooks(unittest.TestCase):
+    def test_order(self):
+        records = []
+        pattern = HookedPattern(hooks=[Recorder('a', records), Recorder('b', records)])
+        self.assertEqual(pattern('1111 :: Code 050'), 'obey')
+        self.assertEqual(records[0][:3], ('before', 'a', '1111 :: Code 050'))
+        self.assertEqual(records[0][3].status_code, '050')
+        self.assertEqual(records[0][4:], ('on_message', 'obey'))
+        self.assertEqual([r[:2] for r in records], [('before', 'a'), ('before', 'b'), ('after', 'b'), ('after', 'a')])
+        
+        records.clear()
+        pattern('invalid')
+        self.assertEqual(records[0], ('before', 'a', 'invalid', None, 'on_invalid', None))
+        
+        records.clear()
+        speech = OptimizedSpeech.build('1111', '500')
+        pattern(speech)
+        self.assertEqual(records[0], ('before', 'a', speech, speech, 'on_unregistered', None))
+    
+    def test_short_circuit(self):
+        records = []
+        pattern = HookedPattern(hooks=[Recorder('a', records)])
+        self.assertEqual(pattern('9999 :: Code 050'), 'blocked')
+        self.assertEqual(records, [])  # Hooks of the class are invoked first.
+        self.assertEqual(HookedPattern()('9999 :: Code 050'), 'blocked')
+        self.assertEqual(HookedPattern()('1111 :: Code 050'), 'obey')
+    
+    def test_error(self):
+        pattern = HookedPattern(hooks=[Broken()])
+        self.assertEqual(pattern('1111 :: Code 050'), 'error')
+    
+    def test_error__unwind(self):
+        records = []
+        pattern = HookedPattern(hooks=[Recorder('a', records), Broken()])
+        self.assertEqual(pattern('1111 :: Code 050'), 'error')
+        self.assertEqual([r[:2] for r in records], [('before', 'a'), ('after', 'a')])
+        self.assertIsNone(records[-1][2])
+        
+        records.clear()
+        self.assertEqual(pattern.dispatch_many(['1111 :: Code 210'] * 2), ['error'] * 2)
+        self.assertEqual([r[:2] for r in records], [('before', 'a'), ('after', 'a')])
+    
+    def test_dispatch_many(self):
+        records = []
+        pattern = HookedPattern(hooks=[Recorder('a', records)])
+        responses = pattern.dispatch_many(['1111 :: Code 210', '9999 :: Code 210', '1111 :: Code 210'])
+        self.assertEqual(responses, ['thanks', 'blocked', 'thanks'])
+        self.assertEqual([r[1] for r in records if r[0] == 'before'], ['a', 'a'])
+    
+    def test_submit(self):
+        pattern = HookedPattern()
+        self.assertEqual(pattern.submit('9999 :: Code 050').result(), 'blocked')
+    
+    def test_async(self):
+        records = []
+        pattern = HookedPattern(hooks=[Recorder('a', records)])
+        responses = asyncio.run(pattern.agather(['1111 :: Code 052', '9999 :: Code 052', 'invalid']))
+        self.assertEqual(responses, ['query', 'blocked', None])
+        self.assertEqual(len(records), 4)
+
+
+class TestSamplingProfiler(unittest.TestCase):
+    def test_report(self):
+        profiler = SamplingProfiler(interval=2)
+        pattern = HookedPattern(hooks=[profiler])
+        for _ in range(10):
+            pattern('1111 :: Code 050')
+        pattern('1111 :: Code 500')
+        pattern('1111 :: Code 500')
+        
+        report = profiler.report()
+        self.assertEqual({stats.handler: stats.count for stats in report}, {'obey': 5, 'on_unregistered': 1})
+        self.assertEqual(report, sorted(report, key=lambda v: v.mean, reverse=True))
+        self.assertLessEqual(report[0].mean, report[0].max)
+        self.assertEqual(len(profiler.report(limit=1)), 1)
+        
+        profiler.reset()
+        self.assertEqual(profiler.report(), [])
+    
+    def test_async(self):
+        profiler = SamplingProfiler(interval=1)
+        pattern = HookedPattern(hooks=[profiler])
+        asyncio.run(pattern.agather(['1111 :: Code 052'] * 10))
+        self.assertEqual([(stats.handler, stats.count) for stats in profiler.report()], [('query', 10)])
+    
+    def test_error(self):
+        profiler = SamplingProfiler(interval=1)
+        pattern = HookedPattern(hooks=[profiler, Broken()])
+        for _ in range(10):
+            self.assertEqual(pattern('1111 :: Code 050'), 'error')
+        self.assertEqual(profiler._starts, {})  # Start times are not left by failed requests.
+        asyncio.run(pattern.agather(['1111 :: Code 052'] * 10))
+        self.assertEqual(profiler._starts, {})
+    
+    def test_submit(self):
+        profiler = SamplingProfiler(interval=1)
+        with HookedPattern(hooks=[profiler]) as pattern:
+            for _ in range(5):
+                self.assertEqual(pattern.submit('1111 :: Code 200').result(timeout=60), 'response')
+        self.assertEqual(profiler._starts, {})  # `after` is invoked in the thread of the executor.
+        self.assertEqual([(stats.handler, stats.count) for stats in profiler.report()], [('response', 5)])
+    
+    def test_dispatch_many(self):
+        profiler = SamplingProfiler(interval=1)
+        pattern = HookedPattern(hooks=[profiler])
+        request = '1111 :: Code 210'
+        pattern.dispatch_many([request, '2222 :: Code 210', request, '9999 :: Code 210'])
+        self.assertEqual(profiler._starts, {})
+        self.assertEqual([(stats.handler, stats.count) for stats in profiler.report()], [('thanks', 3)])
+    
+    def test_interval(self):
+        with self.assertRaises(ValueError):
+            SamplingProfiler(interval=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
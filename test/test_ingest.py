@@ -0,0 +1,167 @@
+import io
+import json
+import os
+import tempfile
+import threading
+import unittest
+from collections import Counter
+from contextlib import redirect_stdout
+from hex_drone import OptimizedSpeech, status_codes
+from hex_drone import ingest
+from hex_drone.wire import decode_frames
+
+try:
+    from hex_drone.batch import SpeechBatch
+except ImportError:
+    SpeechBatch = None
+
+_LINES = [
+    '1234 :: Code 050 :: Statement :: ⬡',
+    'Good morning, drones!',
+    '5890 :: Code 098 :: Status :: Charge is low. :: 5% remaining.',
+    '',
+    '0001 :: Code 200',
+    '1234 :: Code 999',
+    '١٢٣٤ :: Code 122 :: 😀',
+]
+
+
+class TestIngest(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.log')
+        self.lines = _LINES * 50
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(self.lines))  # Without a trailing newline.
+    
+    def tearDown(self):
+        os.remove(self.path)
+    
+    def expected(self):
+        return [v for v in OptimizedSpeech.parse_many(self.lines) if v is not None]
+    
+    def test_split_ranges(self):
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        for chunk_size in (1, 7, 100, 1000, len(data) + 1):
+            ranges = ingest.split_ranges(self.path, chunk_size)
+            self.assertEqual(ranges[0][0], 0)
+            self.assertEqual(ranges[-1][1], len(data))
+            for (_, end), (start, _) in zip(ranges, ranges[1:]):
+                self.assertEqual(end, start)
+                self.assertEqual(data[end - 1:end], b'\n')
+        with self.assertRaises(ValueError):
+            ingest.split_ranges(self.path, 0)
+    
+    def test_iter_speeches(self):
+        expected = self.expected()
+        for workers, chunk_size in ((1, 10), (1, 1000), (2, 1), (2, 300)):
+            speeches = list(ingest.iter_speeches(self.path, workers, chunk_size))
+            self.assertEqual(speeches, expected)
+    
+    def test_iter_frames(self):
+        chunks = list(ingest.iter_frames(self.path, 2, 500))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(sum(v.lines for v in chunks), len(self.lines))
+        self.assertEqual(sum(v.invalid for v in chunks), len(self.lines) - len(self.expected()))
+        speeches, consumed = decode_frames(b''.join(v.frames for v in chunks))
+        self.assertEqual(speeches, self.expected())
+    
+    def test_count(self):
+        expected = Counter(v.status_code for v in self.expected())
+        for workers in (1, 2):
+            stats = ingest.count(self.path, workers, 200)
+            self.assertEqual(stats.lines, len(self.lines))
+            self.assertEqual(stats.invalid, len(self.lines) - sum(expected.values()))
+            self.assertEqual(stats.status_codes, dict(sorted(expected.items())))
+    
+    def test_registry(self):
+        registry = status_codes.extend([['999', 'Custom', None]])
+        stats = ingest.count(self.path, 2, 200, registry)
+        self.assertEqual(stats.status_codes['999'], 50)
+        speeches = list(ingest.iter_speeches(self.path, 2, 200, registry))
+        self.assertIn('999', {v.status_code for v in speeches})
+    
+    @unittest.skipIf(SpeechBatch is None, 'NumPy is not installed.')
+    def test_iter_batches(self):
+        batches = list(ingest.iter_batches(self.path, 2, 300))
+        self.assertGreater(len(batches), 1)
+        self.assertEqual([v for batch in batches for v in batch], SpeechBatch.from_lines(self.lines).to_speeches())
+    
+    def test_iter_parse(self):
+        expected = list(enumerate(OptimizedSpeech.parse_many(self.lines), 1))
+        for read_size in (1, 10, 1000, 10 ** 6):
+            self.assertEqual(list(ingest.iter_parse(self.path, read_size=read_size)), expected)
+        with self.assertRaises(ValueError):
+            list(ingest.iter_parse(self.path, read_size=0))
+    
+    def test_iter_parse__file(self):
+        expected = list(enumerate(OptimizedSpeech.parse_many(self.lines), 1))
+        with open(self.path, 'rb') as f:
+            data = f.read()
+            f.seek(0)
+            self.assertEqual(list(ingest.iter_parse(f, read_size=100)), expected)  # Mapped.
+            self.assertEqual(f.tell(), len(data))
+        with open(self.path, encoding='utf-8') as f:
+            self.assertEqual(list(ingest.iter_parse(f, read_size=100)), expected)
+        self.assertEqual(list(ingest.iter_parse(io.BytesIO(data), read_size=7)), expected)
+        self.assertEqual(list(ingest.iter_parse(io.BytesIO(b''))), [])
+        
+        # A pipe is read by chunks.
+        read_fd, write_fd = os.pipe()
+        
+        def write():
+            with os.fdopen(write_fd, 'wb') as w:
+                w.write(data)
+        
+        writer = threading.Thread(target=write)
+        writer.start()
+        with os.fdopen(read_fd, 'rb') as r:
+            self.assertEqual(list(ingest.iter_parse(r, read_size=64)), expected)
+        writer.join()
+    
+    def test_iter_parse__filter(self):
+        expected = [
+            (i, v) for i, v in enumerate(OptimizedSpeech.parse_many(self.lines), 1)
+            if v is not None and v.status_code in ('050', '200') and v.drone_id == '1234'
+        ]
+        self.assertEqual(list(ingest.iter_parse(self.path, codes=['050', '200'], drone_ids={'1234'})), expected)
+        
+        # Invalid lines whose headers match are yielded.
+        results = list(ingest.iter_parse(self.path, codes=['999']))
+        self.assertEqual(len(results), 50)
+        self.assertEqual({v for _, v in results}, {None})
+    
+    def test_crlf(self):
+        with open(self.path, 'w', encoding='utf-8', newline='') as f:
+            f.write('\r\n'.join(self.lines) + '\r\n')
+        expected = list(enumerate(OptimizedSpeech.parse_many(self.lines), 1))
+        for read_size in (10, 10 ** 6):
+            self.assertEqual(list(ingest.iter_parse(self.path, read_size=read_size)), expected)
+        filtered = [(i, v) for i, v in expected if v is not None and v.status_code == '050']
+        self.assertEqual(list(ingest.iter_parse(self.path, codes=['050'])), filtered)
+        with open(self.path, 'rb') as f:
+            self.assertEqual(list(ingest.iter_parse(io.BytesIO(f.read()), read_size=7)), expected)
+        for workers, chunk_size in ((1, 1000), (2, 300)):
+            self.assertEqual(list(ingest.iter_speeches(self.path, workers, chunk_size)), self.expected())
+            stats = ingest.count(self.path, workers, chunk_size)
+            self.assertEqual(stats.invalid, len(self.lines) - len(self.expected()))
+    
+    def test_main(self):
+        out = io.StringIO()
+        with redirect_stdout(out):
+            ingest._main([self.path, '--workers', '1'])
+        self.assertEqual(json.loads(out.getvalue())['lines'], len(self.lines))
+        
+        fd, output = tempfile.mkstemp(suffix='.bin')
+        os.close(fd)
+        try:
+            with redirect_stdout(io.StringIO()):
+                ingest._main([self.path, '--workers', '2', '--chunk-size', '100', '--output', output])
+            with open(output, 'rb') as f:
+                self.assertEqual(decode_frames(f.read())[0], self.expected())
+        finally:
+            os.remove(output)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from threading import Thread
+from typing import List
+from hex_drone import \
+    Metrics, ResponsePattern, OptimizedSpeech, RequestEvent as Ev
+
+
+class MetricsPattern(ResponsePattern):
+    @Ev.ON_MESSAGE('052')
+    def query(self, request: OptimizedSpeech):
+        if 'error' in request.user_defined_messages:
+            raise ValueError()
+        return None
+    
+    @Ev.ON_MESSAGE('210', '211', batch=True)
+    def thanks(self, requests: List[OptimizedSpeech]):
+        return [None] * len(requests)
+    
+    @Ev.ON_ERROR
+    def error(self, error: BaseException):
+        return None
+
+
+class TestMetrics(unittest.TestCase):
+    def test_counters(self):
+        metrics = Metrics(buckets=[0.5, 1.0])
+        pattern = MetricsPattern(metrics=metrics)
+        self.assertIs(pattern.metrics, metrics)
+        
+        pattern('1111 :: Code 052 :: 1+1')
+        pattern('1111 :: Code 052 :: error')
+        pattern('1111 :: Code 050')
+        pattern('invalid')
+        pattern.dispatch_many(['1111 :: Code 210', '1111 :: Code 211', '1111 :: Code 052'])
+        
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot['events'], {
+            'on_error': 1, 'on_invalid': 1, 'on_message': 5, 'on_unregistered': 1,
+        })
+        self.assertEqual(snapshot['status_codes'], {'050': 1, '052': 3, '210': 1, '211': 1})
+        self.assertEqual(set(snapshot['latency']), {'query', 'thanks'})
+        
+        query = snapshot['latency']['query']
+        self.assertEqual(query['count'], 3)
+        self.assertEqual([v[0] for v in query['buckets']], [0.5, 1.0, float('inf')])
+        self.assertEqual(query['buckets'][-1][1], 3)
+        self.assertEqual(snapshot['latency']['thanks']['count'], 1)  # Observed once per batch.
+        
+        metrics.reset()
+        self.assertEqual(metrics.snapshot(), {'events': {}, 'status_codes': {}, 'latency': {}})
+    
+    def test_threads(self):
+        metrics = Metrics()
+        pattern = MetricsPattern(metrics=metrics)
+        
+        def work():
+            for _ in range(1000):
+                pattern('1111 :: Code 052')
+        
+        threads = [Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot['events'], {'on_message': 4000})
+        self.assertEqual(snapshot['latency']['query']['count'], 4000)
+    
+    def test_async(self):
+        metrics = Metrics()
+        pattern = MetricsPattern(metrics=metrics)
+        asyncio.run(pattern.agather(['1111 :: Code 052', '1111 :: Code 052 :: error', 'invalid']))
+        self.assertEqual(metrics.snapshot()['events'], {'on_error': 1, 'on_invalid': 1, 'on_message': 2})
+    
+    def test_export(self):
+        metrics = Metrics(buckets=[0.5])
+        pattern = MetricsPattern(metrics=metrics)
+        pattern('1111 :: Code 052')
+        
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'metrics.prom')
+            metrics.export(path)
+            with open(path) as f:
+                text = f.read()
+            self.assertIn('hex_drone_requests_total{event="on_message"} 1\n', text)
+            self.assertIn('hex_drone_status_code_requests_total{status_code="052"} 1\n', text)
+            self.assertIn('hex_drone_handler_seconds_bucket{handler="query",le="+Inf"} 1\n', text)
+            self.assertIn('hex_drone_handler_seconds_count{handler="query"} 1\n', text)
+            
+            path = os.path.join(directory, 'metrics.json')
+            metrics.export(path, 'json')
+            with open(path) as f:
+                data = json.load(f)
+            self.assertEqual(data['events'], {'on_message': 1})
+            self.assertEqual(data['latency']['query']['buckets'][-1], ['+Inf', 1])
+            
+            with self.assertRaises(ValueError):
+                metrics.export(path, 'xml')
+
+
+if __name__ == '__main__':
+    unittest.main()
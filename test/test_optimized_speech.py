@@ -1,5 +1,6 @@
+import pickle
 import unittest
-from hex_drone import OptimizedSpeech
+from hex_drone import OptimizedSpeech, SpeechView, status_codes
 
 
 class OptimizedSpeechTest(unittest.TestCase):
@@ -18,12 +19,49 @@ class OptimizedSpeechTest(unittest.TestCase):
         self.assertNotEqual(x, e)
         self.assertNotEqual(x, f)
 
+    def test_equality__other_type(self):
+        speech = OptimizedSpeech.build('1234', '050')
+        self.assertIs(speech.__eq__('1234 :: Code 050 :: Statement'), NotImplemented)
+        self.assertNotEqual(speech, '1234 :: Code 050 :: Statement')
+    
+    def test_hash(self):
+        a = OptimizedSpeech.build('1234', '098', 'Charge is low.')
+        b = OptimizedSpeech('1234', '098', 'Status', 'Going offline and into storage.', ['Charge is low.'])
+        c = OptimizedSpeech('1234', '098', 'Status', None, ['Charge is low.'])
+        self.assertEqual(hash(a), hash(b))
+        self.assertEqual(len({a, b, c}), 2)
+    
+    def test_immutable(self):
+        speech = OptimizedSpeech.build('1234', '050', 'Drone is drone.')
+        with self.assertRaises(AttributeError):
+            speech.drone_id = '1111'
+        with self.assertRaises(AttributeError):
+            speech.extra = 'value'
+        self.assertIsInstance(speech.user_defined_messages, tuple)
+    
+    def test_pickle(self):
+        for speech in [
+            OptimizedSpeech.build('1234', '098', 'Charge is low.'),
+            OptimizedSpeech('1234', '098', 'Status', None, ['Charge is low.']),
+        ]:
+            unpickled = pickle.loads(pickle.dumps(speech))
+            self.assertEqual(speech, unpickled)
+            self.assertEqual(str(speech), str(unpickled))
+        
+        data = pickle.dumps(OptimizedSpeech.build('1234', '098'))
+        self.assertNotIn(b'Going offline', data)
+    
+    def test_str_cached(self):
+        speech = OptimizedSpeech('1234', '107', 'Response', 'Please continue.', ['Drone is drone.'])
+        self.assertEqual(str(speech), '1234 :: Code 107 :: Response :: Please continue. :: Drone is drone.')
+        self.assertIs(str(speech), str(speech))
+
     def test_repr_eval(self):
         speech = OptimizedSpeech('1234', '050', 'Statement', None, ['This drone is ready to obey, Hive Mxtress.'])
         string = repr(speech)
         reconstructed = eval(string)
         
-        expect = "OptimizedSpeech('1234', '050', 'Statement', None, ['This drone is ready to obey, Hive Mxtress.'])"
+        expect = "OptimizedSpeech('1234', '050', 'Statement', None, ('This drone is ready to obey, Hive Mxtress.',))"
         self.assertEqual(string, expect)
         self.assertEqual(reconstructed, speech)
     
@@ -37,7 +75,7 @@ class OptimizedSpeechTest(unittest.TestCase):
         self.assertEqual(parsed.status_code, '050')
         self.assertEqual(parsed.status_message, 'Statement')
         self.assertEqual(parsed.predefined_message, None)
-        self.assertEqual(parsed.user_defined_messages, [])
+        self.assertEqual(parsed.user_defined_messages, ())
         
         self.assertEqual(str(parsed), speech)
     
@@ -49,7 +87,7 @@ class OptimizedSpeechTest(unittest.TestCase):
         self.assertEqual(parsed.status_code, '098')
         self.assertEqual(parsed.status_message, 'Status')
         self.assertEqual(parsed.predefined_message, 'Going offline and into storage.')
-        self.assertEqual(parsed.user_defined_messages, [])
+        self.assertEqual(parsed.user_defined_messages, ())
         
         self.assertEqual(str(parsed), speech)
     
@@ -61,7 +99,7 @@ class OptimizedSpeechTest(unittest.TestCase):
         self.assertEqual(parsed.status_code, '050')
         self.assertEqual(parsed.status_message, 'Statement')
         self.assertEqual(parsed.predefined_message, None)
-        self.assertEqual(parsed.user_defined_messages, ['This drone is ready to obey, Hive Mxtress.'])
+        self.assertEqual(parsed.user_defined_messages, ('This drone is ready to obey, Hive Mxtress.',))
         
         self.assertEqual(str(parsed), speech)
         
@@ -73,7 +111,7 @@ class OptimizedSpeechTest(unittest.TestCase):
         self.assertEqual(parsed.status_code, '098')
         self.assertEqual(parsed.status_message, 'Status')
         self.assertEqual(parsed.predefined_message, 'Going offline and into storage.')
-        self.assertEqual(parsed.user_defined_messages, ['Charge is low.', '5% remaining.'])
+        self.assertEqual(parsed.user_defined_messages, ('Charge is low.', '5% remaining.'))
         
         self.assertEqual(str(parsed), speech)
         
@@ -89,11 +127,23 @@ class OptimizedSpeechTest(unittest.TestCase):
             self.assertEqual(parsed.status_code, '098')
             self.assertEqual(parsed.status_message, 'Status')
             self.assertEqual(parsed.predefined_message, 'Going offline and into storage.')
-            self.assertEqual(parsed.user_defined_messages, ['Charge is low.'])
+            self.assertEqual(parsed.user_defined_messages, ('Charge is low.',))
             
             expect = '1234 :: Code 098 :: Status :: Going offline and into storage. :: Charge is low.'
             self.assertEqual(str(parsed), expect)
 
+    def test_valid__trailing_newline(self):
+        parsed = OptimizedSpeech.parse('1234 :: Code 212\n')
+        self.assertEqual(parsed, OptimizedSpeech.build('1234', '212'))
+        
+        parsed = OptimizedSpeech.parse('1234 :: Code 050 :: Statement\n')
+        self.assertEqual(parsed.user_defined_messages, ('Statement\n',))
+    
+    def test_valid__many_messages(self):
+        messages = [f'Message {i}.' for i in range(50)]
+        parsed = OptimizedSpeech.parse(' :: '.join(['1234 :: Code 050 :: Statement', *messages]))
+        self.assertEqual(parsed.user_defined_messages, tuple(messages))
+
     # - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
     
     def test_invalid__drone_id_format(self):
@@ -106,13 +156,90 @@ class OptimizedSpeechTest(unittest.TestCase):
         parsed = OptimizedSpeech.parse(speech)
         self.assertIsNone(parsed)
     
+    def test_invalid__status_code(self):
+        for speech in ['1234 :: Code 999', '1234 :: Code 05', '1234 :: Code', '1234', '']:
+            self.assertIsNone(OptimizedSpeech.parse(speech))
+    
     def test_invalid__colon(self):
         speech = '12345 : Code 050 : Statement : This drone is ready to obey, Hive Mxtress.'
         parsed = OptimizedSpeech.parse(speech)
         self.assertIsNone(parsed)
 
     # ------------------------------------------------------- #
+    
+    def test_parse_many(self):
+        speeches = [
+            '1234 :: Code 050 :: Statement',
+            '1234 :: Code 098 :: Charge is low.',
+            '12345 :: Code 050 :: Statement',
+            '1234 :: Code 098 :: Status :: Going offline and into storage. :: Charge is low. :: 5% remaining.',
+            '1234 :: Code 999',
+        ]
+        expect = [OptimizedSpeech.parse(speech) for speech in speeches]
+        actual = OptimizedSpeech.parse_many(speeches)
+        self.assertEqual(actual, expect)
+        self.assertIsNone(actual[2])
+        self.assertIsNone(actual[4])
+    
+    def test_parse_many__invalid_only(self):
+        speeches = iter([
+            '1234 :: Code 050 :: Statement',
+            '12345 : Code 050 : Statement',
+            '1234 :: Code 098 :: Charge is low.',
+            '1234 :: Code 0050',
+        ])
+        self.assertEqual(OptimizedSpeech.parse_many(speeches, invalid_only=True), [1, 3])
+    
+    # ------------------------------------------------------- #
         
+    def test_view(self):
+        speeches = [
+            '1234 :: Code 050 :: Statement :: ⬡ :: Obey.',
+            '1234 :: Code 098 :: Charge is low.',
+            '1234 :: Code 098 :: Status :: Going offline and into storage. :: Charge is low. :: 5% remaining.',
+            '1234 :: Code 050',
+            '1234 :: Code 050\n',
+            '1234 :: Code 050 :: ',
+        ]
+        for speech in speeches:
+            view = OptimizedSpeech.view(speech)
+            parsed = OptimizedSpeech.parse(speech)
+            self.assertIsInstance(view, OptimizedSpeech)
+            self.assertEqual(view.status_code, parsed.status_code)
+            self.assertEqual(view, parsed)
+            self.assertEqual(hash(view), hash(parsed))
+            self.assertEqual(str(view), str(parsed))
+            self.assertEqual(pickle.loads(pickle.dumps(view)), parsed)
+            self.assertEqual(OptimizedSpeech.from_bytes(view.to_bytes()), parsed)
+    
+    def test_view__lazy(self):
+        view = OptimizedSpeech.view('1234 :: Code 050 :: Statement :: ⬡')
+        self.assertEqual(view.drone_id, '1234')
+        self.assertEqual(view.status_code, '050')
+        self.assertFalse(view.is_loaded)
+        self.assertEqual(view.user_defined_messages, ('⬡',))
+        self.assertTrue(view.is_loaded)
+        self.assertTrue(OptimizedSpeech.view('1234 :: Code 050').is_loaded)
+    
+    def test_view__invalid(self):
+        speeches = [
+            '12345 :: Code 050 :: Statement', '1234 :: Code 999', '1234 :: Code 0500', '1234 :: Code 050 : a',
+            'abcd :: Code 050', '1234', '',
+        ]
+        for speech in speeches:
+            self.assertIsNone(OptimizedSpeech.parse(speech))
+            self.assertIsNone(OptimizedSpeech.view(speech))
+    
+    def test_view__constructor(self):
+        with self.assertRaisesRegex(TypeError, 'OptimizedSpeech.view'):
+            SpeechView('1234', '050', 'Statement', None, ['a'])
+        with self.assertRaisesRegex(TypeError, 'OptimizedSpeech.view'):
+            SpeechView._from_data('1234', status_codes['050'], ('a',))
+        view = OptimizedSpeech.view('1234 :: Code 050 :: a')
+        self.assertEqual(pickle.loads(pickle.dumps(view)), OptimizedSpeech.build('1234', '050', 'a'))
+    
+    # ------------------------------------------------------- #
+    
     def test_build_valid(self):
         speech = OptimizedSpeech.build('1234', '050')
         expect = OptimizedSpeech('1234', '050', 'Statement', None, [])
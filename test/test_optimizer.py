@@ -0,0 +1,47 @@
+import unittest
+from hex_drone import SpeechOptimizer, OptimizedSpeech, status_codes
+from hex_drone.optimizer import SpeechMatch
+
+
+class TestSpeechOptimizer(unittest.TestCase):
+    optimizer = SpeechOptimizer()
+    
+    def test_find(self):
+        text = 'Thank you. Obey the Hive. Please clarify.'
+        self.assertEqual(self.optimizer.find(text), [
+            SpeechMatch(0, 10, '210'), SpeechMatch(11, 25, '322'), SpeechMatch(26, 41, '106'),
+        ])
+        self.assertEqual(self.optimizer.codes(text + ' Thank you.'), ('210', '322', '106'))
+        self.assertEqual(self.optimizer.codes('thank you.'), ())
+        self.assertEqual(SpeechOptimizer(ignore_case=True).codes('thank you. İ OBEY THE HIVE.'), ('210', '322'))
+    
+    def test_naive(self):
+        # Same as searching each predefined message.
+        text = ' '.join(data.predefined_message for data in status_codes.values() if data.predefined_message)
+        expect = sorted(
+            (text.index(data.predefined_message), code)
+            for code, data in status_codes.items() if data.predefined_message
+        )
+        matches = [m for m in self.optimizer.find(text) if text[m.start - 1:m.start] in ['', ' ']]
+        self.assertEqual(sorted((m.start, m.status_code) for m in matches), expect)
+    
+    def test_optimize(self):
+        speech = self.optimizer.optimize('1234', ' Please clarify. What is it? ')
+        self.assertEqual(speech, OptimizedSpeech.parse('1234 :: Code 106 :: What is it?'))
+        self.assertEqual(self.optimizer.optimize('1234', 'Thank you.'), OptimizedSpeech.build('1234', '210'))
+        self.assertIsNone(self.optimizer.optimize('1234', 'Hello. Thank you.'))
+        
+        self.assertEqual(self.optimizer.optimize_many([('1234', 'Thank you.'), ('5678', 'Hello.')]), [
+            OptimizedSpeech.build('1234', '210'), None,
+        ])
+        self.assertEqual(self.optimizer.classify_many(['Thank you.', 'Hello.']), [('210',), ()])
+    
+    def test_registry(self):
+        registry = status_codes.extend([('900', 'Response', 'Thank you.!'), ('901', 'Response', 'Thank you.')])
+        optimizer = SpeechOptimizer(registry)
+        self.assertEqual(optimizer.codes('Thank you.!'), ('210', '900'))  # '210' is smaller than '901'.
+        self.assertEqual(str(optimizer.optimize('1234', 'Thank you.!')), '1234 :: Code 900 :: Response :: Thank you.!')
+
+
+if __name__ == '__main__':
+    unittest.main()
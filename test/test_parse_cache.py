@@ -0,0 +1,90 @@
+import pickle
+import unittest
+from threading import Thread
+from hex_drone import \
+    ParseCache, ResponsePattern, OptimizedSpeech, RequestEvent as Ev
+
+
+class TestParseCache(unittest.TestCase):
+    def test_hit(self):
+        cache = ParseCache()
+        a = OptimizedSpeech.parse('1234 :: Code 200 :: Response :: Affirmative.', cache)
+        b = OptimizedSpeech.parse('1234 :: Code 200 :: Response :: Affirmative.', cache)
+        self.assertEqual(a, OptimizedSpeech.build('1234', '200'))
+        self.assertIs(a, b)
+        
+        info = cache.cache_info()
+        self.assertEqual((info.hits, info.misses, info.evictions, info.currsize), (1, 1, 0, 1))
+    
+    def test_invalid(self):
+        cache = ParseCache()
+        self.assertIsNone(cache.parse('invalid'))
+        self.assertIsNone(cache.parse('invalid'))
+        self.assertEqual(cache.cache_info().hits, 1)
+    
+    def test_eviction(self):
+        cache = ParseCache(maxsize=2)
+        cache.parse('1234 :: Code 200')
+        cache.parse('1234 :: Code 212')
+        cache.parse('1234 :: Code 200')  # '1234 :: Code 212' is least recently used.
+        cache.parse('1234 :: Code 301')
+        
+        info = cache.cache_info()
+        self.assertEqual((info.hits, info.misses, info.evictions, info.currsize), (1, 3, 1, 2))
+        cache.parse('1234 :: Code 200')
+        self.assertEqual(cache.cache_info().hits, 2)
+        cache.parse('1234 :: Code 212')
+        self.assertEqual(cache.cache_info().misses, 4)
+        
+        cache.clear()
+        self.assertEqual(cache.cache_info(), (0, 0, 0, 2, 0))
+        
+        with self.assertRaises(ValueError):
+            ParseCache(0)
+    
+    def test_threads(self):
+        cache = ParseCache(maxsize=8)
+        speeches = {f'1234 :: Code 050 :: {i}': (str(i),) for i in range(16)}
+        errors = []
+        
+        def work():
+            for _ in range(100):
+                for speech, messages in speeches.items():
+                    if cache.parse(speech).user_defined_messages != messages:
+                        errors.append(speech)
+        
+        threads = [Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        info = cache.cache_info()
+        self.assertEqual(errors, [])
+        self.assertEqual(info.hits + info.misses, 4 * 100 * 16)
+        self.assertLessEqual(info.currsize, 8)
+    
+    def test_pickle(self):
+        cache = ParseCache(maxsize=16)
+        cache.parse('1234 :: Code 200')
+        unpickled = pickle.loads(pickle.dumps(cache))
+        self.assertEqual(unpickled.cache_info(), (0, 0, 0, 16, 0))
+    
+    def test_response_pattern(self):
+        class TestPattern(ResponsePattern):
+            @Ev.ON_MESSAGE('200')
+            def affirmative(self, request: OptimizedSpeech):
+                return request
+        
+        cache = ParseCache()
+        pattern = TestPattern(parse_cache=cache)
+        a = pattern('1234 :: Code 200 :: Affirmative.')
+        b = pattern('1234 :: Code 200 :: Affirmative.')
+        c, = pattern.dispatch_many(['1234 :: Code 200 :: Affirmative.'])
+        self.assertIs(a, b)
+        self.assertIs(a, c)
+        self.assertEqual(cache.cache_info().hits, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import pickle
+import unittest
+from threading import Thread
+from hex_drone import RateLimiter, ResponsePattern, OptimizedSpeech, RequestEvent as Ev
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+class LimitedPattern(ResponsePattern):
+    @Ev.ON_MESSAGE('050')
+    def obey(self, request: OptimizedSpeech):
+        return 'obey'
+    
+    @Ev.ON_INVALID
+    def invalid(self, request: str):
+        return 'invalid'
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_limit(self):
+        clock = Clock()
+        limiter = RateLimiter('3064', rate=2, burst=3, clock=clock)
+        pattern = LimitedPattern(hooks=[limiter])
+        
+        responses = [pattern('1111 :: Code 050') for _ in range(4)]
+        self.assertEqual(responses[:3], ['obey'] * 3)
+        self.assertEqual(str(responses[3]), '3064 :: Code 429 :: Error :: Unable to obey/respond, too many requests.')
+        self.assertEqual(pattern('2222 :: Code 050'), 'obey')  # Other drones are not limited.
+        self.assertEqual(pattern('invalid'), 'invalid')
+        
+        clock.now = 0.5  # 1 token is refilled.
+        self.assertEqual(pattern('1111 :: Code 050'), 'obey')
+        self.assertEqual(pattern('1111 :: Code 050').status_code, '429')
+        self.assertEqual(limiter.info(), (5, 2, 2))
+        
+        limiter.clear()
+        self.assertEqual(limiter.info(), (0, 0, 0))
+    
+    def test_expire(self):
+        clock = Clock()
+        limiter = RateLimiter('3064', rate=1, burst=2, clock=clock)
+        pattern = LimitedPattern(hooks=[limiter])
+        for drone_id in ['1111', '2222', '3333']:
+            pattern(f'{drone_id} :: Code 050')
+        self.assertEqual(limiter.info().drones, 3)
+        
+        clock.now = 10.0  # Buckets of idle drones are full, so they are dropped periodically.
+        for _ in range(256):
+            pattern('4444 :: Code 050')
+        self.assertEqual(limiter.info().drones, 1)
+    
+    def test_maxsize(self):
+        limiter = RateLimiter('3064', rate=1, maxsize=2, clock=Clock())
+        pattern = LimitedPattern(hooks=[limiter])
+        for drone_id in ['1111', '2222', '3333']:
+            self.assertEqual(pattern(f'{drone_id} :: Code 050'), 'obey')
+        self.assertEqual(limiter.info().drones, 2)
+    
+    def test_threads(self):
+        limiter = RateLimiter('3064', rate=0.001, burst=100)
+        pattern = LimitedPattern(hooks=[limiter])
+        results = []
+        
+        def work():
+            results.extend(pattern('1111 :: Code 050') for _ in range(100))
+        
+        threads = [Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results.count('obey'), 100)
+        self.assertEqual(limiter.info()[:2], (100, 300))
+    
+    def test_arguments(self):
+        for kwargs in [{'rate': 0}, {'rate': 1, 'burst': 0.5}, {'rate': 1, 'maxsize': 0}]:
+            with self.assertRaises(ValueError):
+                RateLimiter('3064', **kwargs)
+    
+    def test_pickle(self):
+        limiter = RateLimiter('3064', rate=1)
+        limiter.before('', OptimizedSpeech.build('1111', '050'), Ev.ON_MESSAGE, 'obey')
+        limiter = pickle.loads(pickle.dumps(limiter))
+        self.assertEqual(limiter.info(), (0, 0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,210 @@
+import pickle
+import unittest
+from hex_drone import OptimizedSpeech, ResponseCache, ResponsePattern, RequestEvent as Ev
+
+
+class CachedPattern(ResponsePattern):
+    # Defined at module level to be pickled.
+    calls = []
+    
+    @Ev.ON_MESSAGE('052', cache=ResponseCache(maxsize=2), offload=Ev.OFFLOAD_PROCESS)
+    def query(self, request: OptimizedSpeech):
+        return OptimizedSpeech.build('1234', '057', str(eval(request.user_defined_messages[0])))
+    
+    @Ev.ON_MESSAGE('210', cache=True)
+    def thanks(self, request: OptimizedSpeech, **kwargs):
+        self.calls.append(request)
+        return OptimizedSpeech.build('1234', '213')
+    
+    @Ev.ON_MESSAGE('200', cache=ResponseCache(shared=True))
+    def response(self, request: OptimizedSpeech):
+        self.calls.append(request)
+        return OptimizedSpeech.build('1234', '200')
+    
+    @Ev.ON_MESSAGE('304', cache=True)
+    def mantra(self, request: OptimizedSpeech):
+        self.calls.append(request)
+        return [OptimizedSpeech.build('1234', '304', 'It obeys.')] * 2
+    
+    @Ev.ON_MESSAGE('050', cache=True)
+    def statement(self, request: OptimizedSpeech):
+        self.calls.append(request)
+        if 'error' in request.user_defined_messages:
+            raise ValueError()
+        return {'messages': list(request.user_defined_messages)}
+    
+    @Ev.ON_ERROR
+    def error(self, error: BaseException):
+        return OptimizedSpeech.build('1234', '109')
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+class TestResponseCache(unittest.TestCase):
+    def test_lru(self):
+        cache = ResponseCache(maxsize=2)
+        keys = [cache.key(OptimizedSpeech.build('1111', '050', str(i)), {}) for i in range(3)]
+        self.assertIs(cache.get(keys[0]), ResponseCache.MISSING)
+        cache.put(keys[0], 'a')
+        cache.put(keys[1], 'b')
+        self.assertEqual(cache.get(keys[0]), 'a')
+        cache.put(keys[2], 'c')  # keys[1] is evicted.
+        self.assertIs(cache.get(keys[1]), ResponseCache.MISSING)
+        self.assertEqual(cache.get(keys[2]), 'c')
+        info = cache.cache_info()
+        self.assertEqual((info.hits, info.misses, info.evictions, info.currsize), (2, 2, 1, 2))
+        self.assertEqual(info.hit_rate, 0.5)
+        cache.clear()
+        self.assertEqual(cache.cache_info().currsize, 0)
+        with self.assertRaises(ValueError):
+            ResponseCache(maxsize=0)
+    
+    def test_ttl(self):
+        clock = FakeClock()
+        cache = ResponseCache(ttl=10, clock=clock)
+        cache.put('key', 'value')
+        clock.now = 9.9
+        self.assertEqual(cache.get('key'), 'value')
+        clock.now = 10
+        self.assertIs(cache.get('key'), ResponseCache.MISSING)
+        self.assertEqual(cache.cache_info().evictions, 1)
+        with self.assertRaises(ValueError):
+            ResponseCache(ttl=0)
+    
+    def test_key(self):
+        cache = ResponseCache()
+        a = OptimizedSpeech.build('1111', '050', 'a')
+        b = OptimizedSpeech.build('2222', '050', 'a')
+        self.assertEqual(cache.key(a, {}), cache.key(b, {}))
+        self.assertNotEqual(cache.key(a, {'now': 1}), cache.key(a, {'now': 2}))
+        self.assertIsNone(cache.key(a, {'now': []}))
+        cache = ResponseCache(by_drone_id=True)
+        self.assertNotEqual(cache.key(a, {}), cache.key(b, {}))
+    
+    def test_copy(self):
+        cache = ResponseCache()
+        speech = OptimizedSpeech.build('1111', '050')
+        cache.put('shared', (speech, 'a'))
+        self.assertIs(cache.get('shared')[0], speech)
+        
+        responses = [speech, speech]
+        cache.put('list', responses)
+        responses.append(speech)
+        copied = cache.get('list')
+        self.assertEqual(copied, [speech, speech])
+        copied.clear()
+        self.assertEqual(cache.get('list'), [speech, speech])
+        
+        cache.put('dict', {'a': [1]})
+        cache.get('dict')['a'].append(2)
+        self.assertEqual(cache.get('dict'), {'a': [1]})
+    
+    def test_pickle(self):
+        cache = ResponseCache(maxsize=5, ttl=1)
+        cache.put('key', 'value')
+        restored = pickle.loads(pickle.dumps(cache))
+        self.assertEqual(restored.cache_info().maxsize, 5)
+        self.assertEqual(restored.cache_info().currsize, 0)
+        self.assertEqual(cache.copy().cache_info().currsize, 0)
+        self.assertTrue(pickle.loads(pickle.dumps(ResponseCache(shared=True))).shared)
+    
+    def test_batch(self):
+        with self.assertRaises(ValueError):
+            Ev.ON_MESSAGE('050', batch=True, cache=True)
+
+
+class TestCachedPattern(unittest.TestCase):
+    def setUp(self):
+        for cache in CachedPattern._func_name_cache.values():
+            cache.clear()
+        CachedPattern.calls.clear()
+    
+    def test_call(self):
+        patterns = [CachedPattern(), CachedPattern()]
+        responses = [pattern(f'{i:04} :: Code 210') for i, pattern in enumerate(patterns * 2)]
+        self.assertEqual(responses, [OptimizedSpeech.build('1234', '213')] * 4)
+        self.assertEqual(len(CachedPattern.calls), 2)  # Once for each instance.
+        
+        patterns[0]('1111 :: Code 210', now=1)
+        patterns[0]('1111 :: Code 210', now=1)
+        patterns[0]('1111 :: Code 210', now=[])  # Not cached.
+        self.assertEqual(len(CachedPattern.calls), 4)
+        
+        info = patterns[0].cache_info()['thanks']
+        self.assertEqual((info.hits, info.misses), (2, 2))
+    
+    def test_instances(self):
+        class TestPattern(ResponsePattern):
+            def __init__(self, drone_id: str):
+                super().__init__()
+                self.drone_id = drone_id
+            
+            @Ev.ON_MESSAGE('210', cache=True)
+            def thanks(self, request: OptimizedSpeech):
+                return OptimizedSpeech.build(self.drone_id, '213')
+        
+        patterns = [TestPattern('1111'), TestPattern('2222')]
+        for _ in range(2):
+            self.assertEqual([pattern('3064 :: Code 210').drone_id for pattern in patterns], ['1111', '2222'])
+        self.assertEqual(patterns[1].cache_info()['thanks'].hits, 1)
+    
+    def test_shared(self):
+        patterns = [CachedPattern(), CachedPattern()]
+        for pattern in patterns * 2:
+            self.assertEqual(pattern('1111 :: Code 200'), OptimizedSpeech.build('1234', '200'))
+        self.assertEqual(len(CachedPattern.calls), 1)  # Shared by instances.
+        self.assertEqual(patterns[0].cache_info()['response'].hits, 3)
+    
+    def test_copy(self):
+        pattern = CachedPattern()
+        pattern('1111 :: Code 304').clear()
+        self.assertEqual(len(pattern('1111 :: Code 304')), 2)
+        pattern('1111 :: Code 050 :: a')['messages'].append('b')
+        self.assertEqual(pattern('1111 :: Code 050 :: a'), {'messages': ['a']})
+        self.assertEqual(len(CachedPattern.calls), 2)
+    
+    def test_error(self):
+        pattern = CachedPattern()
+        for _ in range(2):
+            self.assertEqual(pattern('1111 :: Code 050 :: error'), OptimizedSpeech.build('1234', '109'))
+        self.assertEqual(len(CachedPattern.calls), 2)
+    
+    def test_submit(self):
+        with CachedPattern() as pattern:
+            requests = ['1111 :: Code 052 :: 1+1', '1111 :: Code 052 :: 1/0', '1111 :: Code 052 :: 1+1']
+            responses = [pattern.submit(request).result(timeout=60) for request in requests]
+        self.assertEqual(responses, [
+            OptimizedSpeech.build('1234', '057', '2'),
+            OptimizedSpeech.build('1234', '109'),
+            OptimizedSpeech.build('1234', '057', '2'),
+        ])
+        info = pattern.cache_info()['query']
+        self.assertEqual((info.hits, info.currsize), (1, 1))
+
+
+class TestAsyncCachedPattern(unittest.IsolatedAsyncioTestCase):
+    async def test_acall(self):
+        class TestPattern(ResponsePattern):
+            calls = 0
+            
+            @Ev.ON_MESSAGE('052', cache=ResponseCache(ttl=60))
+            async def query(self, request: OptimizedSpeech):
+                TestPattern.calls += 1
+                return OptimizedSpeech.build('1234', '057', *request.user_defined_messages)
+        
+        pattern = TestPattern()
+        responses = await pattern.agather(['1111 :: Code 052 :: a'] * 3)
+        responses.append(await pattern.acall('1111 :: Code 052 :: a'))
+        self.assertEqual(responses, [OptimizedSpeech.build('1234', '057', 'a')] * 4)
+        self.assertLessEqual(TestPattern.calls, 3)
+        self.assertEqual(pattern.cache_info()['query'].currsize, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,91 @@
+import asyncio
+import pickle
+import re
+import threading
 import unittest
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from logging import getLogger, NullHandler, DEBUG
+from typing import List
 from hex_drone import \
-    ResponsePattern, OptimizedSpeech, RequestEvent as Ev
+    ResponsePattern, OptimizedSpeech, RequestEvent as Ev, status_codes
+from hex_drone.logs import is_debug_enabled
+
+
+class OffloadPattern(ResponsePattern):
+    # Defined at module level to be pickled.
+    def __init__(self, drone_id: str):
+        super().__init__()
+        self.drone_id = drone_id
+    
+    @Ev.ON_MESSAGE('052', offload=Ev.OFFLOAD_PROCESS)
+    def query(self, request: OptimizedSpeech):
+        return OptimizedSpeech.build(self.drone_id, '057', str(eval(request.user_defined_messages[0])))
+    
+    @Ev.ON_MESSAGE('210', offload=Ev.OFFLOAD_THREAD)
+    def thanks(self, request: OptimizedSpeech):
+        return OptimizedSpeech.build(self.drone_id, '213')
+    
+    @Ev.ON_INVALID
+    def invalid(self, request: str):
+        return OptimizedSpeech.build(self.drone_id, '400')
+    
+    @Ev.ON_ERROR
+    def error(self, error: BaseException):
+        return OptimizedSpeech.build(self.drone_id, '109', type(error).__name__)
+
+
+class SlottedPattern(ResponsePattern):
+    # Defined at module level to be pickled.
+    __slots__ = ('drone_id',)
+    
+    def __init__(self, drone_id: str):
+        super().__init__()
+        self.drone_id = drone_id
+    
+    @Ev.ON_MESSAGE('052', offload=Ev.OFFLOAD_PROCESS)
+    def query(self, request: OptimizedSpeech):
+        return OptimizedSpeech.build(self.drone_id, '057', *request.user_defined_messages)
+
+
+class SetupPattern(ResponsePattern):
+    # Defined at module level to be pickled. It counts patterns unpickled in each process.
+    unpickled = 0
+    
+    def __init__(self, drone_id: str, **kwargs):
+        super().__init__(**kwargs)
+        self.drone_id = drone_id
+    
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        SetupPattern.unpickled += 1
+    
+    @Ev.ON_MESSAGE('052', offload=Ev.OFFLOAD_PROCESS)
+    def query(self, request: OptimizedSpeech):
+        return self.drone_id, SetupPattern.unpickled
+
+
+class MatchPattern(ResponsePattern):
+    # Defined at module level to be pickled.
+    @Ev.ON_MESSAGE('052', match=r'^status')
+    def status(self, request: OptimizedSpeech):
+        return 'status'
+    
+    @Ev.ON_MESSAGE('052', '050', match=['help', '?'], priority=1)
+    def help(self, request: OptimizedSpeech):
+        return 'help'
+    
+    @Ev.ON_MESSAGE('052', match=re.compile(r'\d+ [+*] \d+'), offload=Ev.OFFLOAD_PROCESS)
+    def calculate(self, request: OptimizedSpeech):
+        return str(eval(request.user_defined_messages[0]))
+    
+    @Ev.ON_MESSAGE('052')
+    def query(self, request: OptimizedSpeech):
+        return 'query'
+    
+    @Ev.ON_UNREGISTERED
+    def unregistered(self, request: OptimizedSpeech):
+        return 'unregistered'
 
 
 class TestResponsePattern(unittest.TestCase):
@@ -170,6 +255,454 @@ class TestResponsePattern(unittest.TestCase):
         actual = pattern(request, now=now)
         self.assertEqual(expected, actual)
 
+    
+    def test_shared_route(self):
+        class TestPattern(ResponsePattern):
+            @Ev.ON_MESSAGE('301', '302')
+            def mantra(self, request: OptimizedSpeech):
+                return OptimizedSpeech.build('1234', request.status_code)
+        
+        pattern = TestPattern()
+        self.assertEqual(pattern('1111 :: Code 301'), OptimizedSpeech.build('1234', '301'))
+        self.assertEqual(pattern('1111 :: Code 302'), OptimizedSpeech.build('1234', '302'))
+        self.assertIsNone(pattern('1111 :: Code 303'))
+        self.assertIsNone(pattern('1111 :: Code 9999'))
+        self.assertIsNone(pattern(OptimizedSpeech('1111', '9999', 'Status', None, [])))
+    
+    def test_invalid_status_code(self):
+        with self.assertRaises(ValueError):
+            class TestPattern(ResponsePattern):
+                @Ev.ON_MESSAGE('1000')
+                def pattern1000(self, request: OptimizedSpeech):
+                    return None
+    
+    def test_error_in_error_handler(self):
+        class TestPattern(ResponsePattern):
+            @Ev.ON_MESSAGE('122')
+            def pattern122(self, request: OptimizedSpeech):
+                raise ValueError()
+            
+            @Ev.ON_ERROR
+            def error(self, error):
+                raise ValueError()
+        
+        pattern = TestPattern()
+        self.assertIsNone(pattern(OptimizedSpeech.build('1111', '122')))
+    
+    def test_debug_log(self):
+        class TestPattern(ResponsePattern):
+            @Ev.ON_MESSAGE('122')
+            def pattern122(self, request: OptimizedSpeech):
+                return None
+        
+        logger = getLogger('test_debug_log')
+        logger.setLevel(DEBUG)
+        with self.assertLogs(logger, DEBUG) as logs:
+            pattern = TestPattern(logger)
+            pattern(OptimizedSpeech.build('1111', '122'))
+            pattern(OptimizedSpeech.build('1111', '123'))
+        self.assertEqual(logs.output, [
+            'DEBUG:test_debug_log:Invoke the function for on_message',
+            'DEBUG:test_debug_log:The function for on_unregistered is None.',
+        ])
+        
+        logger = getLogger('test_debug_log.null')
+        logger.addHandler(NullHandler())
+        logger.propagate = False
+        self.assertFalse(is_debug_enabled(logger))
+
+    
+    def test_dispatch_many(self):
+        class TestPattern(ResponsePattern):
+            batches = []
+            
+            @Ev.ON_MESSAGE('052', batch=True)
+            def query(self, requests: List[OptimizedSpeech]):
+                self.batches.append(len(requests))
+                return [OptimizedSpeech.build('1234', '057', *r.user_defined_messages) for r in requests]
+            
+            @Ev.ON_MESSAGE('210')
+            def thanks(self, request: OptimizedSpeech):
+                return OptimizedSpeech.build('1234', '213')
+            
+            @Ev.ON_INVALID
+            def invalid(self, request: str):
+                return request
+        
+        pattern = TestPattern()
+        actual = pattern.dispatch_many([
+            '1111 :: Code 052 :: 1+1',
+            OptimizedSpeech.build('1111', '210'),
+            'invalid',
+            OptimizedSpeech.build('1111', '052', '2+2'),
+            '1111 :: Code 050',
+        ])
+        expected = [
+            OptimizedSpeech.build('1234', '057', '1+1'),
+            OptimizedSpeech.build('1234', '213'),
+            'invalid',
+            OptimizedSpeech.build('1234', '057', '2+2'),
+            None,
+        ]
+        self.assertEqual(expected, actual)
+        self.assertEqual(pattern.batches, [2])
+        
+        # Batch function is also invoked by a request.
+        actual = pattern('1111 :: Code 052 :: 3+3')
+        self.assertEqual(OptimizedSpeech.build('1234', '057', '3+3'), actual)
+        self.assertEqual(pattern.batches, [2, 1])
+    
+    def test_lazy_messages(self):
+        class TestPattern(ResponsePattern):
+            requests = []
+            
+            @Ev.ON_MESSAGE('052')
+            def query(self, request: OptimizedSpeech):
+                self.requests.append(request)
+                return request.status_code
+            
+            @Ev.ON_MESSAGE('053')
+            def observation(self, request: OptimizedSpeech):
+                return request.user_defined_messages
+            
+            @Ev.ON_UNREGISTERED
+            def unregistered(self, request: OptimizedSpeech):
+                self.requests.append(request)
+        
+        pattern = TestPattern()
+        self.assertEqual(pattern('1111 :: Code 052 :: a :: b'), '052')
+        self.assertIsNone(pattern('1111 :: Code 050 :: Statement :: c'))
+        pattern.dispatch_many(['1111 :: Code 052 :: d'])
+        
+        # Messages are not split because handlers have not read them.
+        self.assertEqual([r.is_loaded for r in pattern.requests], [False, False, False])
+        self.assertEqual([r.user_defined_messages for r in pattern.requests], [('a', 'b'), ('c',), ('d',)])
+        self.assertEqual(pattern('1111 :: Code 053 :: Observation :: e'), ('e',))
+    
+    def test_dispatch_many__error(self):
+        class TestPattern(ResponsePattern):
+            @Ev.ON_MESSAGE('052', batch=True)
+            def query(self, requests: List[OptimizedSpeech], now: str):
+                raise ValueError()
+            
+            @Ev.ON_MESSAGE('050')
+            def statement(self, request: OptimizedSpeech, now: str):
+                if 'error' in request.user_defined_messages:
+                    raise ValueError()
+                return OptimizedSpeech.build('1234', '050', now)
+            
+            @Ev.ON_ERROR
+            def error(self, error: BaseException, now: str):
+                return OptimizedSpeech.build('1234', '109', now)
+        
+        pattern = TestPattern()
+        actual = pattern.dispatch_many([
+            '1111 :: Code 050 :: error',
+            '1111 :: Code 052 :: 1+1',
+            '1111 :: Code 050',
+            '1111 :: Code 052 :: 2+2',
+        ], now='00:00:00')
+        expected = [
+            OptimizedSpeech.build('1234', '109', '00:00:00'),
+            OptimizedSpeech.build('1234', '109', '00:00:00'),
+            OptimizedSpeech.build('1234', '050', '00:00:00'),
+            OptimizedSpeech.build('1234', '109', '00:00:00'),
+        ]
+        self.assertEqual(expected, actual)
+
+
+    
+    def test_submit(self):
+        with OffloadPattern('1234') as pattern:
+            futures = [
+                pattern.submit('1111 :: Code 052 :: 3*4+2'),
+                pattern.submit('1111 :: Code 052 :: 1/0'),
+                pattern.submit('1111 :: Code 210'),
+                pattern.submit('1111 :: Code 050'),
+                pattern.submit('invalid'),
+            ]
+            actual = [future.result(timeout=60) for future in futures]
+        
+        expected = [
+            OptimizedSpeech.build('1234', '057', '14'),
+            OptimizedSpeech.build('1234', '109', 'ZeroDivisionError'),
+            OptimizedSpeech.build('1234', '213'),
+            None,
+            OptimizedSpeech.build('1234', '400'),
+        ]
+        self.assertEqual(expected, actual)
+    
+    def test_submit__pattern_once(self):
+        with ProcessPoolExecutor(1) as executor:
+            patterns = [SetupPattern('1111', process_pool=executor), SetupPattern('2222', process_pool=executor)]
+            actual = [pattern.submit('3064 :: Code 052').result(timeout=60) for pattern in patterns * 3]
+        # The worker received each pattern once, and later requests were handled by them.
+        self.assertEqual(actual, [('1111', 1), ('2222', 2), ('1111', 2), ('2222', 2), ('1111', 2), ('2222', 2)])
+    
+    def test_slots(self):
+        handlers = len(SlottedPattern('0000')._logger.handlers)
+        patterns = [SlottedPattern(f'{i:04}') for i in range(100)]
+        self.assertFalse(hasattr(patterns[0], '__dict__'))
+        self.assertIs(patterns[0]._dispatcher, patterns[-1]._dispatcher)
+        self.assertEqual(list(patterns[0].registered_status_codes), ['052'])
+        # Instances without a logger share one logger without adding handlers each time.
+        self.assertIs(patterns[0]._logger, patterns[-1]._logger)
+        self.assertEqual(len(patterns[0]._logger.handlers), handlers)
+        
+        restored = pickle.loads(pickle.dumps(patterns[7]))
+        self.assertEqual(restored.drone_id, '0007')
+        self.assertEqual(restored('1111 :: Code 052 :: a'), OptimizedSpeech.build('0007', '057', 'a'))
+        with patterns[3] as pattern:
+            actual = pattern.submit('1111 :: Code 052 :: b').result(timeout=60)
+        self.assertEqual(actual, OptimizedSpeech.build('0003', '057', 'b'))
+    
+    def test_submit__thread(self):
+        class TestPattern(ResponsePattern):
+            @Ev.ON_MESSAGE('052', offload=Ev.OFFLOAD_THREAD)
+            def query(self, request: OptimizedSpeech):
+                return threading.current_thread()
+        
+        with TestPattern() as pattern:
+            self.assertIsNot(threading.current_thread(), pattern.submit('1111 :: Code 052').result())
+            self.assertIs(threading.current_thread(), pattern('1111 :: Code 052'))
+    
+    def test_invalid_offload(self):
+        with self.assertRaises(ValueError):
+            Ev.ON_MESSAGE('052', offload='gpu')
+
+
+    def test_match(self):
+        pattern = MatchPattern()
+        cases = {
+            '1111 :: Code 052 :: status': 'status',
+            '1111 :: Code 052 :: status?': 'help',  # Higher priority wins wherever it matches.
+            '1111 :: Code 052 :: status :: Help': 'status',  # Keywords are case sensitive.
+            '1111 :: Code 052 :: a :: status': 'query',  # Messages are joined by ' :: '.
+            '1111 :: Code 052 :: 1 + 2': '3',
+            '1111 :: Code 052': 'query',
+            '1111 :: Code 050 :: help': 'help',
+            '1111 :: Code 050 :: status': 'unregistered',  # No function without match.
+        }
+        for request, expected in cases.items():
+            self.assertEqual(expected, pattern(request), request)
+        self.assertEqual(list(cases.values()), pattern.dispatch_many(cases))
+        self.assertEqual(['052', '050'], list(pattern.registered_status_codes))
+    
+    def test_match__order(self):
+        class TestPattern(ResponsePattern):
+            @Ev.ON_MESSAGE('050', match='c')
+            def first(self, request: OptimizedSpeech):
+                return 'first'
+            
+            @Ev.ON_MESSAGE('050', match=re.compile('(?:B)', re.IGNORECASE))
+            def second(self, request: OptimizedSpeech):
+                return 'second'
+            
+            @Ev.ON_MESSAGE('050', match='a|$')
+            def third(self, request: OptimizedSpeech):
+                return 'third'
+        
+        pattern = TestPattern()
+        # Same priority, in order of definition, wherever they match.
+        self.assertEqual('first', pattern('1111 :: Code 050 :: a b c'))
+        self.assertEqual('second', pattern('1111 :: Code 050 :: a b'))
+        self.assertEqual('third', pattern('1111 :: Code 050 :: x'))
+    
+    def test_match__groups(self):
+        class TestPattern(ResponsePattern):
+            @Ev.ON_MESSAGE('050', match=r'(x)\1')
+            def grouped(self, request: OptimizedSpeech):
+                return 'grouped'
+            
+            @Ev.ON_MESSAGE('050', match='x')
+            def other(self, request: OptimizedSpeech):
+                return 'other'
+        
+        pattern = TestPattern()
+        self.assertEqual('grouped', pattern('1111 :: Code 050 :: x :: xx'))  # Patterns with groups are searched alone.
+        self.assertEqual('other', pattern('1111 :: Code 050 :: x'))
+        self.assertIsNone(pattern('1111 :: Code 050 :: y'))
+    
+    def test_match__global_flags(self):
+        class TestPattern(ResponsePattern):
+            @Ev.ON_MESSAGE('050', match='(?i)^status')
+            def status(self, request: OptimizedSpeech):
+                return 'status'
+            
+            @Ev.ON_MESSAGE('050', match='(?x) help  # comment')
+            def help(self, request: OptimizedSpeech):
+                return 'help'
+        
+        self.assertEqual(2, TestPattern._matchers['050']('query'))  # The matcher is built with the class.
+        pattern = TestPattern()
+        self.assertEqual('status', pattern('1111 :: Code 050 :: STATUS'))
+        self.assertEqual('help', pattern('1111 :: Code 050 :: help status'))
+        self.assertIsNone(pattern('1111 :: Code 050 :: HELP'))
+    
+    def test_match__submit(self):
+        with MatchPattern() as pattern:
+            self.assertEqual('3', pattern.submit('1111 :: Code 052 :: 1 + 2').result(timeout=60))
+            self.assertEqual('status', pattern.submit('1111 :: Code 052 :: status').result(timeout=60))
+    
+    def test_match__invalid(self):
+        with self.assertRaises(ValueError):
+            Ev.ON_MESSAGE('050', match='a', batch=True)
+        with self.assertRaises(ValueError):
+            Ev.ON_MESSAGE('050', match=[])
+        with self.assertRaises(TypeError):
+            Ev.ON_MESSAGE('050', match=re.compile(b'a'))
+        with self.assertRaises(re.error):
+            Ev.ON_MESSAGE('050', match='(')
+        with self.assertRaises(ValueError):
+            class TestPattern(ResponsePattern):
+                @Ev.ON_MESSAGE('050', match='a')
+                @Ev.ON_MESSAGE('052', batch=True)
+                def statement(self, requests: List[OptimizedSpeech]):
+                    return requests
+    
+    def test_parse(self):
+        pattern = ResponsePattern()
+        self.assertEqual(pattern.parse('1111 :: Code 050 :: a'), OptimizedSpeech.build('1111', '050', 'a'))
+        self.assertIsNone(pattern.parse('1111 :: Code 999'))
+        registry = status_codes.extend([('999', 'Status', 'Site specific.')])
+        self.assertEqual(ResponsePattern(registry=registry).parse('1111 :: Code 999').status_code, '999')
+    
+    def test_coroutine_function(self):
+        class TestPattern(ResponsePattern):
+            @Ev.ON_MESSAGE('052')
+            async def query(self, request: OptimizedSpeech):
+                return 'query'
+            
+            @Ev.ON_MESSAGE('050', batch=True)
+            async def statements(self, requests: List[OptimizedSpeech]):
+                return ['statement'] * len(requests)
+            
+            @Ev.ON_MESSAGE('210')
+            def thanks(self, request: OptimizedSpeech):
+                return 'thanks'
+            
+            @Ev.ON_ERROR
+            def error(self, error: BaseException):
+                return 'error'
+        
+        pattern = TestPattern()
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')  # A coroutine never awaited is a RuntimeWarning.
+            for request in ['1111 :: Code 052', '1111 :: Code 050']:
+                with self.assertRaisesRegex(TypeError, 'acall'):
+                    pattern(request)
+                with self.assertRaisesRegex(TypeError, 'acall'):
+                    pattern.submit(request)
+                with self.assertRaisesRegex(TypeError, 'acall'):
+                    pattern.dispatch_many(['1111 :: Code 210', request])
+            self.assertEqual('thanks', pattern('1111 :: Code 210'))
+    
+    def test_coroutine_function__error(self):
+        class TestPattern(ResponsePattern):
+            @Ev.ON_MESSAGE('050')
+            def statement(self, request: OptimizedSpeech):
+                raise ValueError()
+            
+            @Ev.ON_ERROR
+            async def error(self, error: BaseException):
+                return 'error'
+        
+        pattern = TestPattern()
+        with self.assertRaisesRegex(TypeError, 'acall'):
+            pattern('1111 :: Code 050')
+    
+    def test_agather__event_loops(self):
+        class TestPattern(ResponsePattern):
+            @Ev.ON_MESSAGE('052')
+            async def query(self, request: OptimizedSpeech):
+                await asyncio.sleep(0)
+                return request.user_defined_messages[0]
+        
+        pattern = TestPattern(concurrency=2)
+        requests = [f'1111 :: Code 052 :: {i}' for i in range(4)]
+        
+        # The semaphore of the first loop must not be used in the second loop.
+        for _ in range(2):
+            self.assertEqual([str(i) for i in range(4)], asyncio.run(pattern.agather(requests)))
+
+
+class TestAsyncResponsePattern(unittest.IsolatedAsyncioTestCase):
+    async def test_acall(self):
+        class TestPattern(ResponsePattern):
+            @Ev.ON_MESSAGE('052')
+            async def query(self, request: OptimizedSpeech):
+                await asyncio.sleep(0)
+                return OptimizedSpeech.build('1234', '057', *request.user_defined_messages)
+            
+            @Ev.ON_MESSAGE('210')
+            def thanks(self, request: OptimizedSpeech):
+                return OptimizedSpeech.build('1234', '213')
+            
+            @Ev.ON_INVALID
+            async def invalid(self, request: str):
+                return OptimizedSpeech.build('1234', '400')
+        
+        pattern = TestPattern()
+        actual = await pattern.acall('1111 :: Code 052 :: 1+1')
+        self.assertEqual(OptimizedSpeech.build('1234', '057', '1+1'), actual)
+        actual = await pattern.acall(OptimizedSpeech.build('1111', '210'))
+        self.assertEqual(OptimizedSpeech.build('1234', '213'), actual)
+        actual = await pattern.acall('invalid')
+        self.assertEqual(OptimizedSpeech.build('1234', '400'), actual)
+        self.assertIsNone(await pattern.acall('1111 :: Code 050'))
+    
+    async def test_acall__error(self):
+        class TestPattern(ResponsePattern):
+            @Ev.ON_MESSAGE('052')
+            async def query(self, request: OptimizedSpeech, now: str):
+                raise ValueError()
+            
+            @Ev.ON_MESSAGE('050')
+            def statement(self, request: OptimizedSpeech, now: str):
+                raise ValueError()
+            
+            @Ev.ON_ERROR
+            async def error(self, error: BaseException, now: str):
+                return OptimizedSpeech.build('1234', '109', now)
+        
+        pattern = TestPattern()
+        expected = OptimizedSpeech.build('1234', '109', '00:00:00')
+        self.assertEqual(expected, await pattern.acall('1111 :: Code 052', now='00:00:00'))
+        self.assertEqual(expected, await pattern.acall('1111 :: Code 050', now='00:00:00'))
+    
+    async def test_acall__match(self):
+        class TestPattern(ResponsePattern):
+            @Ev.ON_MESSAGE('052', match='status')
+            async def status(self, request: OptimizedSpeech):
+                return 'status'
+            
+            @Ev.ON_MESSAGE('052')
+            def query(self, request: OptimizedSpeech):
+                return 'query'
+        
+        pattern = TestPattern()
+        actual = await pattern.agather(['1111 :: Code 052 :: status', '1111 :: Code 052 :: a'])
+        self.assertEqual(['status', 'query'], actual)
+    
+    async def test_agather__concurrency(self):
+        class TestPattern(ResponsePattern):
+            running = 0
+            max_running = 0
+            
+            @Ev.ON_MESSAGE('052')
+            async def query(self, request: OptimizedSpeech):
+                self.running += 1
+                self.max_running = max(self.max_running, self.running)
+                await asyncio.sleep(0.01)
+                self.running -= 1
+                return request.user_defined_messages[0]
+        
+        pattern = TestPattern(concurrency=2)
+        requests = [f'1111 :: Code 052 :: {i}' for i in range(6)]
+        actual = await pattern.agather(requests)
+        self.assertEqual([str(i) for i in range(6)], actual)
+        self.assertEqual(2, pattern.max_running)
+
 
 if __name__ == '__main__':
     unittest.main()
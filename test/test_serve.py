@@ -0,0 +1,170 @@
+import asyncio
+import os
+import socket
+import tempfile
+import unittest
+from hex_drone import OptimizedSpeech, ResponsePattern, RequestEvent as Ev
+from hex_drone.serve import SpeechServer, render, _load_pattern
+
+
+class ServePattern(ResponsePattern):
+    def __init__(self):
+        super().__init__()
+        self.running = 0
+        self.max_running = 0
+        self.gate = asyncio.Event()
+        self.gate.set()
+    
+    @Ev.ON_MESSAGE('052')
+    async def query(self, request: OptimizedSpeech):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await self.gate.wait()
+            # Later requests complete first, but responses are written in order.
+            await asyncio.sleep(0.01 / (1 + int(request.user_defined_messages[0])))
+            return OptimizedSpeech.build('3064', '057', request.user_defined_messages[0])
+        finally:
+            self.running -= 1
+    
+    @Ev.ON_MESSAGE('304')
+    def mantra(self, request: OptimizedSpeech):
+        return [OptimizedSpeech.build('3064', '304'), OptimizedSpeech.build('3064', '304')]
+    
+    @Ev.ON_MESSAGE('098')
+    def offline(self, request: OptimizedSpeech):
+        return OptimizedSpeech.build('3064', '105')
+    
+    @Ev.ON_INVALID
+    def invalid(self, request: str):
+        return OptimizedSpeech.build('3064', '400')
+
+
+class TestRender(unittest.TestCase):
+    def test_render(self):
+        speech = OptimizedSpeech.build('3064', '213')
+        self.assertEqual(render(speech), str(speech).encode() + b'\n')
+        self.assertEqual(render([speech, None, 'a']), render(speech) + b'a\n')
+        self.assertEqual(render(None), b'')
+    
+    def test_load_pattern(self):
+        self.assertIsInstance(_load_pattern('test_serve:ServePattern', []), ServePattern)
+        with self.assertRaises(ValueError):
+            _load_pattern('test_serve', [])
+        with self.assertRaises(TypeError):
+            _load_pattern('test_serve:render', [None])
+
+
+class TestSpeechServer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.pattern = ServePattern()
+        self.server = await SpeechServer(self.pattern, max_pending=4).start('127.0.0.1', 0)
+        self.address = self.server.sockets[0].getsockname()
+    
+    async def asyncTearDown(self):
+        self.pattern.gate.set()
+        self.server.shutdown()
+        await asyncio.wait_for(self.server.wait_closed(), 10)
+    
+    async def read_lines(self, reader, n):
+        return [(await asyncio.wait_for(reader.readline(), 10)).decode().rstrip('\n') for _ in range(n)]
+    
+    async def test_pipelining(self):
+        reader, writer = await asyncio.open_connection(*self.address)
+        requests = [f'1111 :: Code 052 :: {i}' for i in range(10)] + ['invalid', '1111 :: Code 304\r']
+        writer.write(''.join(f'{v}\n' for v in requests).encode())
+        lines = await self.read_lines(reader, 13)
+        self.assertEqual(lines, [
+            *[str(OptimizedSpeech.build('3064', '057', str(i))) for i in range(10)],
+            str(OptimizedSpeech.build('3064', '400')),
+            str(OptimizedSpeech.build('3064', '304')),
+            str(OptimizedSpeech.build('3064', '304')),
+        ])
+        writer.close()
+    
+    async def test_eof(self):
+        reader, writer = await asyncio.open_connection(*self.address)
+        writer.write(b'1111 :: Code 052 :: 1\n1111 :: Code 304')  # The last line has no newline.
+        writer.write_eof()
+        self.assertEqual(await asyncio.wait_for(reader.read(), 10), b''.join([
+            bytes(OptimizedSpeech.build('3064', '057', '1')) + b'\n',
+            bytes(OptimizedSpeech.build('3064', '304')) + b'\n',
+            bytes(OptimizedSpeech.build('3064', '304')) + b'\n',
+        ]))
+        writer.close()
+    
+    async def test_limit(self):
+        server = await SpeechServer(ServePattern(), limit=32).start('127.0.0.1', 0)
+        try:
+            reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname())
+            writer.write(b'1111 :: Code 304\n' + b'x' * 20)
+            await writer.drain()
+            await asyncio.sleep(0.05)
+            writer.write(b'x' * 20 + b'\n')  # 40 bytes in total.
+            mantra = OptimizedSpeech.build('3064', '304')
+            self.assertEqual(await asyncio.wait_for(reader.read(), 10), render([mantra, mantra]))  # Closed after that.
+            writer.close()
+        finally:
+            server.shutdown()
+            await asyncio.wait_for(server.wait_closed(), 10)
+    
+    async def test_clients(self):
+        async def client(n):
+            reader, writer = await asyncio.open_connection(*self.address)
+            writer.write(f'{n:04} :: Code 052 :: {n}\n'.encode())
+            lines = await self.read_lines(reader, 1)
+            writer.close()
+            return lines[0]
+        
+        lines = await asyncio.gather(*[client(n) for n in range(5)])
+        self.assertEqual(lines, [str(OptimizedSpeech.build('3064', '057', str(n))) for n in range(5)])
+    
+    async def test_backpressure(self):
+        self.pattern.gate.clear()
+        reader, writer = await asyncio.open_connection(*self.address)
+        writer.write(b''.join(f'1111 :: Code 052 :: {i}\n'.encode() for i in range(50)))
+        await asyncio.sleep(0.1)
+        self.assertEqual(self.pattern.max_running, 4)
+        self.pattern.gate.set()
+        lines = await self.read_lines(reader, 50)
+        self.assertEqual(lines[-1], str(OptimizedSpeech.build('3064', '057', '49')))
+        writer.close()
+    
+    async def test_shutdown(self):
+        other_reader, other_writer = await asyncio.open_connection(*self.address)
+        reader, writer = await asyncio.open_connection(*self.address)
+        writer.write(b'1111 :: Code 052 :: 1\n1111 :: Code 098\n1111 :: Code 052 :: 2\n')
+        lines = await self.read_lines(reader, 2)
+        self.assertEqual(lines[1], str(OptimizedSpeech.build('3064', '105')))
+        await asyncio.wait_for(self.server.wait_closed(), 10)
+        
+        # Requests after the shutdown code are not handled, and all connections are closed.
+        self.assertEqual(await asyncio.wait_for(reader.read(), 10), b'')
+        self.assertEqual(await asyncio.wait_for(other_reader.read(), 10), b'')
+        with self.assertRaises(OSError):
+            await asyncio.open_connection(*self.address)
+        writer.close()
+        other_writer.close()
+    
+    async def test_not_started(self):
+        server = SpeechServer(ServePattern())
+        await asyncio.wait_for(server.wait_closed(), 10)
+        async with SpeechServer(ServePattern()) as other:
+            self.assertEqual(other.sockets, [])
+
+
+@unittest.skipUnless(hasattr(socket, 'AF_UNIX'), 'Unix sockets are not supported.')
+class TestUnixSpeechServer(unittest.IsolatedAsyncioTestCase):
+    async def test_unix(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'drone.sock')
+            async with await SpeechServer(ServePattern()).start(path=path):
+                reader, writer = await asyncio.open_unix_connection(path)
+                writer.write(b'1111 :: Code 304\n')
+                lines = [await asyncio.wait_for(reader.readline(), 10) for _ in range(2)]
+                self.assertEqual(lines, [bytes(OptimizedSpeech.build('3064', '304')) + b'\n'] * 2)
+                writer.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
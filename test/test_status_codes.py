@@ -0,0 +1,102 @@
+import json
+import os
+import pickle
+import tempfile
+import unittest
+from hex_drone import \
+    status_codes, StatusCodeData, StatusCodeRegistry, OptimizedSpeech, ParseCache, ResponsePattern, RequestEvent as Ev
+
+
+class SitePattern(ResponsePattern):
+    @Ev.ON_MESSAGE('900')
+    def site(self, request: OptimizedSpeech):
+        return 'site'
+
+
+class TestStatusCodeRegistry(unittest.TestCase):
+    def test_mapping(self):
+        self.assertEqual(status_codes['050'].status_message, 'Statement')
+        self.assertIsNone(status_codes.get('999'))
+        self.assertIn('098', status_codes)
+        self.assertEqual(list(status_codes), sorted(status_codes))
+        self.assertEqual(len(status_codes), len(dict(status_codes)))
+        with self.assertRaises(TypeError):
+            status_codes['999'] = StatusCodeData('999', 'Status', None)
+        with self.assertRaises(AttributeError):
+            status_codes['050'].status_message = 'Answer'
+    
+    def test_indexes(self):
+        self.assertEqual(len(status_codes.table), 1000)
+        self.assertIs(status_codes.table[98], status_codes['098'])
+        self.assertIsNone(status_codes.table[999])
+        self.assertEqual(status_codes['098'].index, 98)
+        
+        self.assertIn('050', status_codes.codes_by_status_message('Statement'))
+        self.assertEqual(status_codes.codes_by_status_message('Unknown'), ())
+        self.assertEqual(status_codes.code_by_predefined_message('Going offline and into storage.'), '098')
+        self.assertIsNone(status_codes.code_by_predefined_message('Unknown'))
+        
+        self.assertTrue(status_codes.is_prefix('098', 'Status'))
+        self.assertTrue(status_codes.is_prefix('098', 'Going offline and into storage.'))
+        self.assertFalse(status_codes.is_prefix('050', 'Status'))
+        self.assertFalse(status_codes.is_prefix('999', 'Status'))
+        self.assertFalse(status_codes.is_prefix('050', None))
+    
+    def test_interned(self):
+        data = StatusCodeData(''.join(['9', '0', '0']), ''.join(['Sta', 'tus']), None)
+        self.assertIs(data.status_message, status_codes['098'].status_message)
+    
+    def test_extend(self):
+        registry = status_codes.extend([('900', 'Status', 'Site specific.'), ('050', 'Statement', 'Replaced.')])
+        self.assertEqual(registry['900'].predefined_message, 'Site specific.')
+        self.assertEqual(registry['050'].predefined_message, 'Replaced.')
+        self.assertIsNone(status_codes.get('900'))
+        self.assertIsNone(status_codes['050'].predefined_message)
+        
+        with self.assertRaises(ValueError):
+            status_codes.extend([('9000', 'Status', None)])
+    
+    def test_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'codes.json')
+            with open(path, 'w') as f:
+                json.dump([['900', 'Status', None], ['901', 'Response', 'Site specific.']], f)
+            registry = status_codes.load(path)
+            self.assertEqual(sorted(set(registry) - set(status_codes)), ['900', '901'])
+            
+            with open(path, 'w') as f:
+                json.dump({'900': ['Status', None]}, f)
+            with self.assertRaises(ValueError):
+                status_codes.load(path)
+    
+    def test_parse(self):
+        registry = status_codes.extend([('900', 'Status', 'Site specific.')])
+        self.assertIsNone(OptimizedSpeech.parse('1111 :: Code 900'))
+        speech = OptimizedSpeech.parse('1111 :: Code 900 :: Status :: Site specific. :: Hello', registry=registry)
+        self.assertEqual(speech.user_defined_messages, ('Hello',))
+        built = OptimizedSpeech.build('1111', '900', registry=registry)
+        self.assertEqual(OptimizedSpeech.parse_many(['1111 :: Code 900'], registry=registry), [built])
+        self.assertEqual(OptimizedSpeech.parse_many(['1111 :: Code 900'], invalid_only=True, registry=registry), [])
+        self.assertEqual(str(ParseCache(registry=registry).parse('1111 :: Code 900')),
+                         '1111 :: Code 900 :: Status :: Site specific.')
+        self.assertIsNone(OptimizedSpeech.build('1111', '900'))
+        self.assertEqual(OptimizedSpeech.build('1111', '050', registry=registry), OptimizedSpeech.build('1111', '050'))
+        
+        speech = pickle.loads(pickle.dumps(speech))
+        self.assertEqual(speech.predefined_message, 'Site specific.')
+    
+    def test_pattern(self):
+        registry = status_codes.extend([('900', 'Status', None)])
+        self.assertIsNone(SitePattern()('1111 :: Code 900'))
+        self.assertEqual(SitePattern(registry=registry)('1111 :: Code 900'), 'site')
+        self.assertEqual(SitePattern(registry=registry).dispatch_many(['1111 :: Code 900']), ['site'])
+        self.assertEqual(SitePattern(parse_cache=ParseCache(registry=registry))('1111 :: Code 900'), 'site')
+        with self.assertRaises(ValueError):
+            SitePattern(parse_cache=ParseCache(), registry=registry)
+        
+        pattern = pickle.loads(pickle.dumps(SitePattern(registry=registry)))
+        self.assertEqual(pattern('1111 :: Code 900'), 'site')
+
+
+if __name__ == '__main__':
+    unittest.main()
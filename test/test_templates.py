@@ -0,0 +1,70 @@
+import unittest
+from unittest.mock import patch
+from hex_drone import OptimizedSpeech, status_codes
+from hex_drone.templates import TemplateCache, SpeechTemplate
+
+
+class TestTemplates(unittest.TestCase):
+    def test_render(self):
+        template = SpeechTemplate('1234', status_codes['098'])
+        expect = '1234 :: Code 098 :: Status :: Going offline and into storage.'
+        self.assertEqual(template.render(), expect)
+        self.assertEqual(template.render('Charge is low.', '5% remaining.'), expect + ' :: Charge is low. :: 5% remaining.')
+        self.assertEqual(template.render_bytes('⬡'), (expect + ' :: ⬡').encode('utf-8'))
+        
+        template = SpeechTemplate('1234', status_codes['050'])
+        self.assertEqual(template.render('⬡'), '1234 :: Code 050 :: Statement :: ⬡')
+    
+    def test_build(self):
+        speech = OptimizedSpeech.build('1234', '098', 'Charge is low.')
+        expect = '1234 :: Code 098 :: Status :: Going offline and into storage. :: Charge is low.'
+        self.assertEqual(str(speech), expect)
+        self.assertEqual(bytes(speech), expect.encode('utf-8'))
+        self.assertEqual(speech, OptimizedSpeech.parse(expect))
+        
+        speech = OptimizedSpeech('1234', '098', 'Status', None, ['⬡'])
+        self.assertEqual(bytes(speech), '1234 :: Code 098 :: Status :: ⬡'.encode('utf-8'))
+        
+        speech = OptimizedSpeech.build('1234', '050', 'a', '⬡')
+        self.assertEqual(bytes(speech), '1234 :: Code 050 :: Statement :: a :: ⬡'.encode('utf-8'))
+        self.assertIsNone(speech._str)  # Rendered from the template without str.
+        self.assertEqual(bytes(OptimizedSpeech.build('1234', '050')), b'1234 :: Code 050 :: Statement')
+    
+    def test_build__random(self):
+        cache = TemplateCache(maxsize=100)
+        with patch('hex_drone.optimized_speech.templates', cache):
+            for i in range(5000):
+                OptimizedSpeech.build(f'{i % 10000:04}', '050', '⬡')
+                if i % 10 == 0:
+                    OptimizedSpeech.build('3064', '057')  # Hot key.
+            self.assertIsNone(OptimizedSpeech.build('5678', '999'))
+        self.assertEqual(len(cache), 100)  # Bounded under random drone IDs.
+        self.assertIsNotNone(cache.find('3064', '057'))
+        self.assertIsNone(cache.find('0000', '050'))
+    
+    def test_cache(self):
+        cache = TemplateCache(maxsize=2)
+        cache.prewarm('1234')
+        template = cache.find('1234', '200')
+        self.assertIsNotNone(template)
+        self.assertIs(cache.get('1234', '200'), template)
+        self.assertIsNone(cache.get('1234', '999'))
+        self.assertEqual(len(cache), len(status_codes))
+        
+        # The least recently used template of drone IDs which are not prewarmed is evicted.
+        cache.get('5678', '200')
+        cache.get('5678', '212')
+        cache.find('5678', '200')
+        cache.get('5678', '213')
+        self.assertEqual(len(cache), len(status_codes) + 2)
+        self.assertIsNotNone(cache.find('5678', '200'))
+        self.assertIsNone(cache.find('5678', '212'))
+        self.assertIs(cache.find('1234', '200'), template)  # Prewarmed templates are kept.
+        
+        cache.clear()
+        self.assertIsNone(cache.find('1234', '200'))
+        with self.assertRaises(ValueError):
+            TemplateCache(maxsize=0)
+
+if __name__ == '__main__':
+    unittest.main()
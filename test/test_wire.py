@@ -0,0 +1,155 @@
+import random
+import unittest
+from hex_drone import OptimizedSpeech, ParseCache, ResponsePattern, RequestEvent as Ev, status_codes
+from hex_drone.wire import FrameDecoder, SpeechDecoder, encode_many, decode_frames
+
+
+class RejectPattern(ResponsePattern):
+    @Ev.ON_INVALID
+    def invalid(self, request: str):
+        return OptimizedSpeech.build('1234', '400', request)
+
+
+class TestWire(unittest.TestCase):
+    def test_round_trip(self):
+        rnd = random.Random(0)
+        codes = sorted(status_codes)
+        words = ['', 'Obey.', '⬡', 'a :: b', 'Statement', '\n', '😀' * 10]
+        for _ in range(1000):
+            code = rnd.choice(codes)
+            messages = [rnd.choice(words) for _ in range(rnd.randrange(4))]
+            text = ' :: '.join([f'{rnd.randrange(10000):04}', f'Code {code}', *messages])
+            speech = OptimizedSpeech.parse(text)
+            decoded = OptimizedSpeech.from_bytes(speech.to_bytes())
+            self.assertEqual(decoded, speech)
+            self.assertEqual(str(decoded), str(speech))
+    
+    def test_compact(self):
+        speech = OptimizedSpeech.build('1234', '098', 'Charge is low.')
+        self.assertEqual(len(speech.to_bytes()), 11 + 4 + len('Charge is low.'))
+        self.assertLess(len(speech.to_bytes()), len(bytes(speech)))
+    
+    def test_custom(self):
+        speeches = [
+            OptimizedSpeech('١٢٣٤', '050', 'Statement', None, ['⬡']),  # Not ASCII digits.
+            OptimizedSpeech('1234', '9999', 'Status', None, []),
+            OptimizedSpeech('1234', '098', 'Status', 'Changed.', ['a', 'b']),
+        ]
+        for speech in speeches:
+            decoded = OptimizedSpeech.from_bytes(speech.to_bytes())
+            self.assertEqual(decoded, speech)
+            self.assertEqual(str(decoded), str(speech))
+    
+    def test_registry(self):
+        registry = status_codes.extend([('900', 'Status', 'Site specific.')])
+        speech = OptimizedSpeech.build('1234', '900', registry=registry)
+        frame = speech.to_bytes(registry)
+        self.assertEqual(OptimizedSpeech.from_bytes(frame, registry), speech)
+        with self.assertRaises(ValueError):
+            OptimizedSpeech.from_bytes(frame)
+        self.assertEqual(OptimizedSpeech.from_bytes(speech.to_bytes()), speech)  # Encoded with messages.
+    
+    def test_invalid(self):
+        frame = OptimizedSpeech.build('1234', '050', 'Obey.').to_bytes()
+        for data in [b'', frame[:5], frame[:-1], frame + b'\x00', frame[:4] + frame[4:-1] + b'\xff']:
+            with self.assertRaises(ValueError):
+                OptimizedSpeech.from_bytes(data)
+        broken = bytes([frame[0] - 1]) + frame[1:-1]
+        with self.assertRaises(ValueError):
+            OptimizedSpeech.from_bytes(broken)
+    
+    def test_invalid__header(self):
+        frame = OptimizedSpeech.build('1234', '050', 'Obey.').to_bytes()
+        corrupted = [
+            frame[:4] + (10000).to_bytes(2, 'little') + frame[6:],  # Drone ID is not 4 digits.
+            frame[:8] + b'\x08' + frame[9:],  # Unknown flag.
+            frame[:8] + b'\x04' + frame[9:],  # No predefined message without data.
+        ]
+        for data in corrupted:
+            with self.assertRaises(ValueError):
+                OptimizedSpeech.from_bytes(data)
+            with self.assertRaises(ValueError):
+                FrameDecoder().feed(data)
+    
+    def test_decoder(self):
+        speeches = [OptimizedSpeech.build(f'{i:04}', '050', '⬡' * i) for i in range(50)]
+        stream = encode_many(speeches)
+        self.assertEqual(decode_frames(stream), (speeches, len(stream)))
+        self.assertEqual(decode_frames(stream[:-1])[0], speeches[:-1])
+        
+        for size in [1, 7, 64, len(stream)]:
+            decoder = FrameDecoder()
+            decoded = []
+            for i in range(0, len(stream), size):
+                decoded.extend(decoder.feed(memoryview(stream)[i:i + size]))
+            self.assertEqual(decoded, speeches)
+            self.assertEqual(decoder.pending, 0)
+        
+        decoder = FrameDecoder()
+        self.assertEqual(decoder.feed(stream[:3]), [])
+        self.assertEqual(decoder.pending, 3)
+        decoder.reset()
+        self.assertEqual(decoder.pending, 0)
+
+
+class TestSpeechDecoder(unittest.TestCase):
+    def test_split(self):
+        speeches = [OptimizedSpeech.build(f'{i:04}', '050', '⬡' * i, 'a :: b') for i in range(50)]
+        speeches = [OptimizedSpeech.parse(str(speech)) for speech in speeches]
+        stream = ''.join(f'{speech}\n' for speech in speeches).encode('utf-8')
+        for size in [1, 2, 7, 64, len(stream)]:
+            decoder = SpeechDecoder()
+            decoded = []
+            for i in range(0, len(stream), size):
+                decoded.extend(decoder.feed(memoryview(stream)[i:i + size]))  # Split in characters and separators.
+            self.assertEqual(decoded, speeches)
+            self.assertEqual(decoder.pending, 0)
+            self.assertEqual(decoder.rejected, 0)
+    
+    def test_flush(self):
+        decoder = SpeechDecoder(cache=ParseCache())
+        speech = OptimizedSpeech.build('1234', '050', 'a')
+        self.assertEqual(decoder.feed(b'1234 :: Code 050 :: a\r\n1234 :: Code 0'), [speech])
+        self.assertEqual(decoder.pending, len(b'1234 :: Code 0'))
+        self.assertEqual(decoder.feed(b'98'), [])
+        self.assertEqual(decoder.flush(), [OptimizedSpeech.build('1234', '098')])
+        self.assertEqual(decoder.pending, 0)
+        self.assertEqual(decoder.flush(), [])
+    
+    def test_reject(self):
+        rejected = []
+        decoder = SpeechDecoder(rejected.append, max_line=30)
+        stream = b''.join([
+            b'1234 :: Code 050 :: a\n',
+            b'invalid\n',
+            b'1234 :: Code 050 :: \xff\n',
+            b'1234 :: Code 050 :: ' + b'b' * 20 + b'\n',
+            b'1234 :: Code 098\n',
+        ])
+        expected = [OptimizedSpeech.build('1234', '050', 'a'), OptimizedSpeech.build('1234', '098')]
+        self.assertEqual(decoder.feed(stream), expected)
+        self.assertEqual(rejected, ['invalid', '1234 :: Code 050 :: \ufffd', '1234 :: Code 050 :: ' + 'b' * 10])
+        self.assertEqual(decoder.rejected, 3)
+        
+        # The rest of an overlong line is not buffered.
+        rejected.clear()
+        decoded = []
+        for i in range(len(stream)):
+            decoded.extend(decoder.feed(stream[i:i + 1]))
+            self.assertLessEqual(decoder.pending, 30)
+        self.assertEqual(decoded, expected)
+        self.assertEqual(rejected, ['invalid', '1234 :: Code 050 :: \ufffd', '1234 :: Code 050 :: ' + 'b' * 10])
+        
+        with self.assertRaises(ValueError):
+            SpeechDecoder(max_line=0)
+    
+    def test_pattern(self):
+        pattern = RejectPattern()
+        responses = []
+        decoder = SpeechDecoder(lambda text: responses.append(pattern.reject(text)), max_line=8)
+        decoder.feed(b'1234 :: Code 050\n')
+        self.assertEqual(responses, [OptimizedSpeech.build('1234', '400', '1234 :: ')])
+
+
+if __name__ == '__main__':
+    unittest.main()